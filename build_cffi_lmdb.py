@@ -261,6 +261,27 @@ _CFFI_CDEF = '''
                                 char *key_s, size_t keylen,
                                 char *val_s, size_t vallen, int flags);
 
+    // zlmdb adaptation: batched range scan (see Cursor.getbatch)
+    static int zlmdb_cursor_scan(MDB_cursor *cursor, MDB_val *key, MDB_val *data,
+                                 char *bound_s, size_t bound_len, int reverse,
+                                 MDB_val *keys, MDB_val *vals, size_t n,
+                                 size_t *count);
+
+    // zlmdb adaptation: range and prefix counting (see Cursor.count_range)
+    static int zlmdb_cursor_count_range(MDB_cursor *cursor,
+                                        char *from_s, size_t from_len,
+                                        char *to_s, size_t to_len,
+                                        size_t *count);
+    static int zlmdb_cursor_count_prefix(MDB_cursor *cursor,
+                                         char *prefix_s, size_t prefix_len,
+                                         size_t *count);
+
+    // zlmdb adaptation: put reserving space for the value (see Transaction.reserve)
+    static int zlmdb_put_reserve(MDB_txn *txn, MDB_dbi dbi,
+                                 char *key_s, size_t keylen,
+                                 size_t vallen, unsigned int flags,
+                                 MDB_val *val_out);
+
     // Memory prefaulting helper
     static void preload(int rc, void *x, size_t size);
 '''
@@ -279,6 +300,7 @@ if _have_patched_lmdb:
 _CFFI_VERIFY = '''
     #include <stdlib.h>
     #include <stdio.h>
+    #include <string.h>
     #include <sys/types.h>
     #include <errno.h>
     #include "lmdb.h"
@@ -337,6 +359,129 @@ _CFFI_VERIFY = '''
         MDB_val tmpval = {vallen, val_s};
         return mdb_cursor_put(cursor, &tmpkey, &tmpval, flags);
     }
+
+    // zlmdb adaptation: batched range scan. Starting with the current cursor
+    // position (key, data), fill up to `n` (key, value) pairs, moving forward
+    // (or backward, if `reverse`) after each pair. The scan stops before the
+    // first key >= bound (forward) or < bound (reverse), unless bound_s is NULL.
+    // Returns 0 if the batch is full, with (key, data) at the next position, or
+    // MDB_NOTFOUND if the end of the range or database was reached.
+    static int zlmdb_cursor_scan(MDB_cursor *cursor, MDB_val *key, MDB_val *data,
+                                 char *bound_s, size_t bound_len, int reverse,
+                                 MDB_val *keys, MDB_val *vals, size_t n,
+                                 size_t *count)
+    {
+        MDB_txn *txn = mdb_cursor_txn(cursor);
+        MDB_dbi dbi = mdb_cursor_dbi(cursor);
+        MDB_val bound = {bound_len, bound_s};
+        MDB_cursor_op op = reverse ? MDB_PREV : MDB_NEXT;
+        size_t i = 0;
+        int rc = 0;
+
+        while(i < n) {
+            if(bound_s != NULL) {
+                int cmp = mdb_cmp(txn, dbi, key, &bound);
+                if(reverse ? cmp < 0 : cmp >= 0) {
+                    rc = MDB_NOTFOUND;
+                    break;
+                }
+            }
+            keys[i] = *key;
+            vals[i] = *data;
+            i++;
+            rc = mdb_cursor_get(cursor, key, data, op);
+            if(rc) {
+                break;
+            }
+        }
+        *count = i;
+        return rc;
+    }
+
+    // zlmdb adaptation: count records (including duplicates) with keys
+    // from_s <= key < to_s (no upper bound if to_s is NULL).
+    static int zlmdb_cursor_count_range(MDB_cursor *cursor,
+                                        char *from_s, size_t from_len,
+                                        char *to_s, size_t to_len,
+                                        size_t *count)
+    {
+        MDB_txn *txn = mdb_cursor_txn(cursor);
+        MDB_dbi dbi = mdb_cursor_dbi(cursor);
+        MDB_val key = {from_len, from_s};
+        MDB_val data = {0, NULL};
+        MDB_val to = {to_len, to_s};
+        size_t cnt = 0;
+        int rc;
+
+        if(from_len) {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_SET_RANGE);
+        } else {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_FIRST);
+        }
+        while(! rc) {
+            if(to_s != NULL && mdb_cmp(txn, dbi, &key, &to) >= 0) {
+                break;
+            }
+            cnt++;
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_NEXT);
+        }
+        *count = cnt;
+        return rc == MDB_NOTFOUND ? 0 : rc;
+    }
+
+    // zlmdb adaptation: count records (including duplicates) with keys
+    // starting with prefix_s.
+    static int zlmdb_cursor_count_prefix(MDB_cursor *cursor,
+                                         char *prefix_s, size_t prefix_len,
+                                         size_t *count)
+    {
+        MDB_val key = {prefix_len, prefix_s};
+        MDB_val data = {0, NULL};
+        size_t cnt = 0;
+        int rc;
+
+        if(prefix_len) {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_SET_RANGE);
+        } else {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_FIRST);
+        }
+        while(! rc) {
+            if(key.mv_size < prefix_len ||
+               memcmp(key.mv_data, prefix_s, prefix_len) != 0) {
+                break;
+            }
+            cnt++;
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_NEXT);
+        }
+        *count = cnt;
+        return rc == MDB_NOTFOUND ? 0 : rc;
+    }
+
+    // zlmdb adaptation: store a record with MDB_RESERVE, returning the address
+    // of vallen bytes of space reserved for the value in val_out, for the
+    // caller to fill in before the next update in the transaction. Not
+    // supported for MDB_DUPSORT databases (EINVAL).
+    static int zlmdb_put_reserve(MDB_txn *txn, MDB_dbi dbi,
+                                 char *key_s, size_t keylen,
+                                 size_t vallen, unsigned int flags,
+                                 MDB_val *val_out)
+    {
+        MDB_val key = {keylen, key_s};
+        unsigned int dbi_flags;
+        int rc = mdb_dbi_flags(txn, dbi, &dbi_flags);
+
+        if(rc) {
+            return rc;
+        }
+        // values of sorted duplicates are compared on insert, so they
+        // cannot be filled in afterwards
+        if(dbi_flags & MDB_DUPSORT) {
+            return EINVAL;
+        }
+        val_out->mv_size = vallen;
+        val_out->mv_data = NULL;
+        return mdb_put(txn, dbi, &key, val_out, flags | MDB_RESERVE);
+    }
 '''
 
 
@@ -142,13 +142,20 @@ from ._pmap import (
     MapUuidJson,
     MapUuidCbor,
     MapUuidPickle,
+    MapUuidPickle5,
+    MapUuidNdarray,
+    MapUuidArrow,
     MapUuidFlatBuffers,
+    MapUuidFlexBuffers,
     MapUuidTimestampFlatBuffers,
     MapUuidBytes20Uint8FlatBuffers,
     MapUuidBytes20Uint8UuidFlatBuffers,
     MapUuidBytes20Bytes20Uint8UuidFlatBuffers,
     MapUuidTimestampCbor,
     MapTimestampFlatBuffers,
+    MapTimestampFlexBuffers,
+    MapTimestampNdarray,
+    MapTimestampArrow,
     MapTimestampStringFlatBuffers,
     MapTimestampUuidFlatBuffers,
     MapTimestampUuidStringFlatBuffers,
@@ -178,7 +185,11 @@ from ._pmap import (
     MapStringJson,
     MapStringCbor,
     MapStringPickle,
+    MapStringPickle5,
+    MapStringNdarray,
+    MapStringArrow,
     MapStringFlatBuffers,
+    MapStringFlexBuffers,
     MapStringTimestampCbor,
     MapTimestampStringCbor,
     MapOidString,
@@ -187,7 +198,11 @@ from ._pmap import (
     MapOidJson,
     MapOidCbor,
     MapOidPickle,
+    MapOidPickle5,
+    MapOidNdarray,
+    MapOidArrow,
     MapOidFlatBuffers,
+    MapOidFlexBuffers,
     MapOidOidFlatBuffers,
     MapOid3FlatBuffers,
     MapOidOidSet,
@@ -223,6 +238,8 @@ from ._pmap import (
 from ._transaction import Transaction, TransactionStats
 from ._database import Database
 from ._schema import Schema
+from ._fbs import FlatBuffersCodec, FlatBuffersRecord
+from ._keys import KeyCodec
 
 __all__ = (
     "__version__",
@@ -234,6 +251,9 @@ __all__ = (
     "Database",
     "Transaction",
     "TransactionStats",
+    "FlatBuffersCodec",
+    "FlatBuffersRecord",
+    "KeyCodec",
     "MapSlotUuidUuid",
     "table",
     #
@@ -249,11 +269,18 @@ __all__ = (
     "MapUuidJson",
     "MapUuidCbor",
     "MapUuidPickle",
+    "MapUuidPickle5",
+    "MapUuidNdarray",
+    "MapUuidArrow",
     "MapUuidFlatBuffers",
+    "MapUuidFlexBuffers",
     # UUID/Timestamp-combined pmap types for flatbuffers values
     "MapUuidTimestampFlatBuffers",
     "MapTimestampUuidFlatBuffers",
     "MapTimestampFlatBuffers",
+    "MapTimestampFlexBuffers",
+    "MapTimestampNdarray",
+    "MapTimestampArrow",
     "MapTimestampStringFlatBuffers",
     "MapTimestampUuidStringFlatBuffers",
     "MapUuidTimestampUuidFlatBuffers",
@@ -293,7 +320,11 @@ __all__ = (
     "MapStringJson",
     "MapStringCbor",
     "MapStringPickle",
+    "MapStringPickle5",
+    "MapStringNdarray",
+    "MapStringArrow",
     "MapStringFlatBuffers",
+    "MapStringFlexBuffers",
     "MapStringTimestampCbor",
     "MapTimestampStringCbor",
     # String (utf8) based pmap types for indexes
@@ -307,7 +338,11 @@ __all__ = (
     "MapOidJson",
     "MapOidCbor",
     "MapOidPickle",
+    "MapOidPickle5",
+    "MapOidNdarray",
+    "MapOidArrow",
     "MapOidFlatBuffers",
+    "MapOidFlexBuffers",
     "MapOidOidFlatBuffers",
     "MapOidTimestampFlatBuffers",
     "MapOid3FlatBuffers",
@@ -357,7 +392,19 @@ Map of table UUIDs to persistent maps stored in slots in a KV store.
 """
 
 
-def table(oid, marshal=None, parse=None, build=None, cast=None, compress=None):
+def table(
+    oid,
+    marshal=None,
+    parse=None,
+    build=None,
+    cast=None,
+    compress=None,
+    compress_min_size=None,
+    counted=False,
+    dupsort=False,
+    dupfixed=False,
+    sidecar=False,
+):
     if type(oid) == str:
         oid = uuid.UUID(oid)
 
@@ -369,7 +416,17 @@ def table(oid, marshal=None, parse=None, build=None, cast=None, compress=None):
     assert compress is None or compress in [
         PersistentMap.COMPRESS_ZLIB,
         PersistentMap.COMPRESS_SNAPPY,
+        PersistentMap.COMPRESS_ZSTD,
+        PersistentMap.COMPRESS_LZ4,
     ]
+    assert compress_min_size is None or (
+        type(compress_min_size) == int and compress_min_size >= 0
+    )
+    assert type(counted) == bool
+    assert type(dupsort) == bool
+    assert type(dupfixed) == bool
+    assert dupsort or not dupfixed
+    assert type(sidecar) == bool
 
     def decorate(o):
         if oid in TABLES_BY_UUID:
@@ -391,6 +448,23 @@ def table(oid, marshal=None, parse=None, build=None, cast=None, compress=None):
             assert TABLES_BY_UUID[oid]._zlmdb_compress == compress, "{} != {}".format(
                 TABLES_BY_UUID[oid]._zlmdb_compress, compress
             )
+            assert TABLES_BY_UUID[oid]._zlmdb_compress_min_size == compress_min_size, (
+                "{} != {}".format(
+                    TABLES_BY_UUID[oid]._zlmdb_compress_min_size, compress_min_size
+                )
+            )
+            assert TABLES_BY_UUID[oid]._zlmdb_counted == counted, "{} != {}".format(
+                TABLES_BY_UUID[oid]._zlmdb_counted, counted
+            )
+            assert TABLES_BY_UUID[oid]._zlmdb_dupsort == dupsort, "{} != {}".format(
+                TABLES_BY_UUID[oid]._zlmdb_dupsort, dupsort
+            )
+            assert TABLES_BY_UUID[oid]._zlmdb_dupfixed == dupfixed, "{} != {}".format(
+                TABLES_BY_UUID[oid]._zlmdb_dupfixed, dupfixed
+            )
+            assert TABLES_BY_UUID[oid]._zlmdb_sidecar == sidecar, "{} != {}".format(
+                TABLES_BY_UUID[oid]._zlmdb_sidecar, sidecar
+            )
             return
         assert oid not in TABLES_BY_UUID, (
             "oid {} already in map (pointing to {})".format(oid, TABLES_BY_UUID[oid])
@@ -410,6 +484,20 @@ def table(oid, marshal=None, parse=None, build=None, cast=None, compress=None):
         # for value compression
         o._zlmdb_compress = compress
 
+        # for tagged values, compressing only values of at least this size
+        o._zlmdb_compress_min_size = compress_min_size
+
+        # for maintaining a record counter
+        o._zlmdb_counted = counted
+
+        # for non-unique indexes (requires database storage mode "dbi")
+        o._zlmdb_dupsort = dupsort
+        o._zlmdb_dupfixed = dupfixed
+
+        # for storing index keys of records in sidecars (index maintenance without
+        # reading previous records)
+        o._zlmdb_sidecar = sidecar
+
         TABLES_BY_UUID[oid] = o
         return o
 
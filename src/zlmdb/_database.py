@@ -158,6 +158,7 @@ class Slot(ConfigurationElement):
     __slots__ = (
         "_slot",
         "_creator",
+        "_storage",
     )
 
     def __init__(
@@ -168,12 +169,14 @@ class Slot(ConfigurationElement):
         tags: Optional[List[str]] = None,
         slot: Optional[int] = None,
         creator: Optional[str] = None,
+        storage: Optional[str] = None,
     ):
         ConfigurationElement.__init__(
             self, oid=oid, name=name, description=description, tags=tags
         )
         self._slot = slot
         self._creator = creator
+        self._storage = storage
 
     @property
     def creator(self) -> Optional[str]:
@@ -183,6 +186,11 @@ class Slot(ConfigurationElement):
     def slot(self) -> Optional[int]:
         return self._slot
 
+    @property
+    def storage(self) -> str:
+        # slots written before storage modes were introduced are all prefix mode
+        return self._storage or Database.STORAGE_PREFIX
+
     def __str__(self) -> str:
         return pprint.pformat(self.marshal())
 
@@ -192,6 +200,7 @@ class Slot(ConfigurationElement):
             {
                 "creator": self._creator,
                 "slot": self._slot,
+                "storage": self._storage,
             }
         )
         return obj
@@ -204,6 +213,7 @@ class Slot(ConfigurationElement):
 
         slot = data.get("slot", None)
         creator = data.get("creator", None)
+        storage = data.get("storage", None)
 
         drvd_obj = Slot(
             oid=obj.oid,
@@ -212,6 +222,7 @@ class Slot(ConfigurationElement):
             tags=obj.tags,
             slot=slot,
             creator=creator,
+            storage=storage,
         )
         return drvd_obj
 
@@ -328,11 +339,24 @@ class Database(object):
         "_open_now",
         "_writemap",
         "_context",
+        "_storage",
+        "_maxdbs",
         "_slots",
         "_slots_by_index",
+        "_dbis",
         "_env",
     )
 
+    STORAGE_PREFIX = "prefix"
+    """
+    Store all tables in the main LMDB database, with keys prefixed by the 2 byte slot index.
+    """
+
+    STORAGE_DBI = "dbi"
+    """
+    Store each table in a LMDB sub-database (named DBI) of its own.
+    """
+
     def __init__(
         self,
         dbpath: Optional[str] = None,
@@ -345,6 +369,8 @@ class Database(object):
         writemap: bool = False,
         context: Any = None,
         log: Optional[txaio.interfaces.ILogger] = None,
+        storage: str = STORAGE_PREFIX,
+        maxdbs: int = 256,
     ):
         """
 
@@ -361,7 +387,18 @@ class Database(object):
             using any storage other than locally attached filesystem/drive.
         :param context: Optional context within which this database instance is created.
         :param log: Log object to use for logging from this class.
+        :param storage: Storage mode for tables attached to this database: either
+            ``"prefix"`` (default) to store all tables in the main LMDB database under
+            their slot key prefix, or ``"dbi"`` to store each table in a LMDB
+            sub-database (named DBI) of its own. Slots record the storage mode they were
+            created with, and attaching a table stored in the other mode fails. Use
+            :meth:`migrate_to_dbi` to migrate tables from a prefix mode database.
+        :param maxdbs: Maximum number of LMDB sub-databases (named DBIs) when
+            using storage mode ``"dbi"``.
         """
+        if storage not in [Database.STORAGE_PREFIX, Database.STORAGE_DBI]:
+            raise ValueError('invalid storage mode "{}"'.format(storage))
+
         self._context = context
 
         if log:
@@ -388,10 +425,16 @@ class Database(object):
         self._open_now = open_now
         self._writemap = writemap
         self._context = context
+        self._storage = storage
+        self._maxdbs = maxdbs
 
         self._slots: Optional[Dict[uuid.UUID, Slot]] = None
         self._slots_by_index: Optional[Dict[uuid.UUID, int]] = None
 
+        # LMDB sub-database (named DBI) handles opened, with their dupsort and dupfixed
+        # flags, by slot index
+        self._dbis: Dict[int, Tuple[Any, bool, bool]] = {}
+
         # in a context manager environment we initialize with LMDB handle
         # when we enter the actual temporary, managed context ..
         self._env: Optional[lmdb.Environment] = None
@@ -468,6 +511,9 @@ class Database(object):
                         subdir=True,
                         lock=self._lock,
                         writemap=self._writemap,
+                        max_dbs=self._maxdbs
+                        if self._storage == Database.STORAGE_DBI
+                        else 0,
                     )
 
                     # ok, good: we've got a LMDB env
@@ -511,6 +557,7 @@ class Database(object):
         if self._env:
             self._env.close()
             self._env = None
+            self._dbis = {}
             if not self._is_temp and self._dbpath in _LMDB_MYPID_ENVS:
                 del _LMDB_MYPID_ENVS[self._dbpath]
 
@@ -526,6 +573,8 @@ class Database(object):
         writemap: bool = False,
         context: Any = None,
         log: Optional[txaio.interfaces.ILogger] = None,
+        storage: str = "prefix",
+        maxdbs: int = 256,
     ) -> "Database":
         if dbpath is not None and dbpath in _LMDB_MYPID_ENVS:
             db, _ = _LMDB_MYPID_ENVS[dbpath]
@@ -546,6 +595,8 @@ class Database(object):
                 writemap=writemap,
                 context=context,
                 log=log,
+                storage=storage,
+                maxdbs=maxdbs,
             )
             print(
                 '{}: creating new database instance for path "{}" in context {}'.format(
@@ -602,6 +653,14 @@ class Database(object):
         """
         return self._writemap
 
+    @property
+    def storage(self) -> str:
+        """
+
+        :return:
+        """
+        return self._storage
+
     @property
     def is_open(self) -> bool:
         """
@@ -632,7 +691,13 @@ class Database(object):
         """
 
         :param write:
-        :param buffers:
+        :param buffers: Zero-copy read mode. Keys and values are read from the LMDB
+            memory map without copying to ``bytes`` where the table type supports it:
+            FlatBuffers cast functions get a ``memoryview``, Pickle5 values get their
+            out-of-band buffers as views into the map, and struct-based keys are decoded
+            straight from the map. Objects read in this mode may reference the memory
+            map, and must not be used after the transaction ends, and in write
+            transactions, not after the next write in the transaction.
         :param stats:
         :return:
         """
@@ -669,6 +734,8 @@ class Database(object):
             "create": self._create,
             "open_now": self._open_now,
             "writemap": self._writemap,
+            "storage": self._storage,
+            "maxdbs": self._maxdbs,
             "context": str(self._context) if self._context else None,
         }
         return res
@@ -719,17 +786,31 @@ class Database(object):
         if include_slots:
             slots = self._get_slots()
             res["slots"] = []
+
+            # sub-databases must be opened before starting the transaction using them
+            pmaps = {}
+            for slot_id in slots:
+                slot = slots[slot_id]
+                pmap = _pmap.PersistentMap(slot.slot)
+                if slot.storage == Database.STORAGE_DBI:
+                    if self._storage != Database.STORAGE_DBI:
+                        continue
+                    with self.begin(write=not self._readonly) as txn:
+                        pmap._bind_dbi(self._open_dbi(slot.slot, txn))
+                pmaps[slot_id] = pmap
+
             with self.begin() as txn:
                 for slot_id in slots:
                     slot = slots[slot_id]
-                    pmap = _pmap.PersistentMap(slot.slot)
+                    pmap = pmaps.get(slot_id, None)
                     res["slots"].append(
                         {
                             "oid": str(slot_id),
                             "slot": slot.slot,
                             "name": slot.name,
                             "description": slot.description,
-                            "records": pmap.count(txn),
+                            "storage": slot.storage,
+                            "records": pmap.count(txn) if pmap is not None else None,
                         }
                     )
 
@@ -747,26 +828,209 @@ class Database(object):
             from_key = struct.pack(">H", 0)
             to_key = struct.pack(">H", 1)
 
-            cursor = txn._txn.cursor()
-            found = cursor.set_range(from_key)
-            while found:
-                _key = cursor.key()
-                if _key >= to_key:
-                    break
+            with txn._txn.cursor() as cursor:
+                found = cursor.set_range(from_key)
+                while found:
+                    _key = cursor.key()
+                    if _key >= to_key:
+                        break
 
-                if len(_key) >= 4:
-                    # key = struct.unpack('>H', _key[0:2])
-                    slot_index = struct.unpack(">H", _key[2:4])[0]
-                    slot = Slot.parse(cbor2.loads(cursor.value()))
-                    assert slot.slot == slot_index
-                    slots[slot.oid] = slot
-                    slots_by_index[slot.oid] = slot_index
+                    # skip (foreign) keys too short to be slot records or metadata
+                    if len(_key) < 4:
+                        found = cursor.next()
+                        continue
 
-                found = cursor.next()
+                    # slot records have 4 byte keys, longer keys are per-slot metadata (eg record
+                    # counters or index sidecars), which sort after the slot record
+                    slot_index = struct.unpack(">H", _key[2:4])[0]
+                    if len(_key) == 4:
+                        slot = Slot.parse(cbor2.loads(cursor.value()))
+                        assert slot.slot == slot_index
+                        slots[slot.oid] = slot
+                        slots_by_index[slot.oid] = slot_index
+
+                    # skip the metadata of the slot, seeking to the next slot record
+                    if slot_index == 0xFFFF:
+                        break
+                    found = cursor.set_range(
+                        b"\0\0" + struct.pack(">H", slot_index + 1)
+                    )
 
         self._slots = slots
         self._slots_by_index = slots_by_index
 
+    def _open_dbi(
+        self,
+        slot_index: int,
+        txn: Transaction,
+        dupsort: Optional[bool] = None,
+        dupfixed: Optional[bool] = None,
+    ):
+        """
+        Open (and create if necessary) the LMDB sub-database (named DBI) for a slot.
+
+        :param slot_index:
+        :param txn: The transaction in which to open the sub-database (a write
+            transaction, unless the database is read-only). The caller's (active)
+            transaction must be passed, since LMDB allows only one write transaction
+            at a time. The handle becomes valid for other transactions when the
+            transaction is committed.
+        :param dupsort: Allow multiple (sorted) values per key. If not given, the
+            sub-database is opened with the flags it was created with.
+        :param dupfixed: All values of a key have the same size (requires ``dupsort``).
+        :return: LMDB database handle.
+        """
+        assert self._env is not None
+        assert self._storage == Database.STORAGE_DBI
+
+        if slot_index not in self._dbis:
+            name = "zlmdb-slot-{:05d}".format(slot_index).encode("ascii")
+            dbi = self._env.open_db(
+                name,
+                txn=txn._txn,
+                create=not self._readonly,
+                dupsort=bool(dupsort),
+                dupfixed=bool(dupfixed),
+            )
+            # an existing sub-database keeps the flags it was created with
+            flags = dbi.flags()
+            self._dbis[slot_index] = (dbi, flags["dupsort"], flags["dupfixed"])
+
+        dbi, _dupsort, _dupfixed = self._dbis[slot_index]
+        if (dupsort is not None and dupsort != _dupsort) or (
+            dupfixed is not None and dupfixed != _dupfixed
+        ):
+            raise RuntimeError(
+                "sub-database of slot {} has dupsort={}, dupfixed={} (requested "
+                "dupsort={}, dupfixed={})".format(
+                    slot_index, _dupsort, _dupfixed, dupsort, dupfixed
+                )
+            )
+        return dbi
+
+    def migrate_to_dbi(self, oid: Optional[uuid.UUID] = None) -> Dict[uuid.UUID, int]:
+        """
+        Migrate tables stored in storage mode ``"prefix"`` to storage mode ``"dbi"``,
+        moving all records of a table from the main LMDB database into a sub-database
+        (named DBI) of its own.
+
+        The database must be opened with ``storage="dbi"``, and tables must be migrated
+        before attaching them. Each table is migrated in a write transaction of its own.
+
+        :param oid: Migrate only the table with this OID, or all tables if not given.
+        :return: Number of records moved, by table OID.
+        """
+        assert self._env is not None
+
+        if self._storage != Database.STORAGE_DBI:
+            raise RuntimeError(
+                'database must be opened with storage mode "dbi" to migrate'
+            )
+
+        slots = self._get_slots(cached=False)
+        if oid is not None:
+            if oid not in slots:
+                raise RuntimeError(
+                    "no slot found in database for DB table <{}>".format(oid)
+                )
+            slots = {oid: slots[oid]}
+
+        res = {}
+        for slot_oid, slot in slots.items():
+            if slot.storage != Database.STORAGE_PREFIX:
+                continue
+
+            slot_index = slot.slot
+            assert slot_index
+            with self.begin(write=True) as txn:
+                dbi = self._open_dbi(slot_index, txn)
+                if txn._txn.stat(dbi)["entries"]:
+                    raise RuntimeError(
+                        "cannot migrate DB table <{}>: sub-database not empty".format(
+                            slot_oid
+                        )
+                    )
+
+                key_from = struct.pack(">H", slot_index)
+                key_to = struct.pack(">H", slot_index + 1)
+
+                def _records(cursor):
+                    if cursor.set_range(key_from):
+                        for key, data in cursor.iternext():
+                            if key >= key_to:
+                                break
+                            yield key[2:], data
+
+                # keys keep their order when stripping the (common) slot prefix, so we can append
+                with txn._txn.cursor() as src, txn._txn.cursor(db=dbi) as dst:
+                    _, moved = dst.putmulti(_records(src), append=True)
+
+                _pmap.PersistentMap(slot_index).truncate(txn, rebuild_indexes=False)
+                txn._txn.delete(_pmap._counter_key(slot_index))
+
+                slot = Slot(
+                    oid=slot.oid,
+                    name=slot.name,
+                    description=slot.description,
+                    tags=slot.tags,
+                    slot=slot_index,
+                    creator=slot.creator,
+                    storage=Database.STORAGE_DBI,
+                )
+                txn._txn.put(
+                    b"\0\0" + struct.pack(">H", slot_index), cbor2.dumps(slot.marshal())
+                )
+
+            assert self._slots is not None
+            self._slots[slot_oid] = slot
+            res[slot_oid] = moved
+
+            self.log.info(
+                "Migrated {moved} records of database table <{oid}> in slot {slot_index:03d} to storage mode dbi",
+                moved=moved,
+                oid=slot_oid,
+                slot_index=slot_index,
+            )
+
+        return res
+
+    def build_index(
+        self,
+        table: _pmap.PersistentMap,
+        name: str,
+        chunk_size: Optional[int] = None,
+    ) -> int:
+        """
+        Build an index attached to a table online, backfilling the index in chunks
+        of table records, each in a short write transaction of its own, so other
+        writers are only blocked for the duration of one chunk. An interrupted
+        build is resumed from its persisted watermark.
+
+        :param table: The table (pmap) the index is attached to.
+        :param name: Name of the index to build.
+        :param chunk_size: Number of table records indexed per write transaction
+            (default: ``table.BUILD_INDEX_CHUNK_SIZE``).
+        :return: Number of table records indexed.
+        """
+        assert self._env is not None
+
+        with self.begin(write=True) as txn:
+            if not table.is_index_building(txn, name):
+                table.start_index_build(txn, name)
+
+        total = 0
+        done = False
+        while not done:
+            with self.begin(write=True) as txn:
+                cnt, done = table.build_index_chunk(txn, name, limit=chunk_size)
+            total += cnt
+            self.log.debug(
+                'Online build of index "{name}": {total} records indexed',
+                name=name,
+                total=total,
+            )
+        return total
+
     def _get_slots(self, cached=True) -> Dict[uuid.UUID, Slot]:
         """
 
@@ -829,7 +1093,18 @@ class Database(object):
                 result = txn.get(key)
                 if result:
                     txn._txn.delete(key)
+                    _pmap._delete_slot_meta(txn._txn, slot_index)
                     slot = Slot.parse(cbor2.loads(result))
+
+                    # delete the sub-database of the slot, and forget its (cached) handle
+                    if (
+                        slot.storage == Database.STORAGE_DBI
+                        and self._storage == Database.STORAGE_DBI
+                    ):
+                        dbi = self._open_dbi(slot_index, txn)
+                        txn._txn.drop(dbi, delete=True)
+                    self._dbis.pop(slot_index, None)
+
                     if slot.oid in self._slots:
                         del self._slots[slot.oid]
                     if slot.oid in self._slots_by_index:
@@ -882,6 +1157,10 @@ class Database(object):
             create=True,
             name=name,
             description=description,
+            counted=klass._zlmdb_counted,
+            dupsort=klass._zlmdb_dupsort,
+            dupfixed=klass._zlmdb_dupfixed,
+            sidecar=klass._zlmdb_sidecar,
         )
         return pmap
 
@@ -897,6 +1176,10 @@ class Database(object):
         create: bool = True,
         name: Optional[str] = None,
         description: Optional[str] = None,
+        counted: bool = False,
+        dupsort: bool = False,
+        dupfixed: bool = False,
+        sidecar: bool = False,
     ):
         """
 
@@ -910,6 +1193,10 @@ class Database(object):
         :param create:
         :param name:
         :param description:
+        :param counted:
+        :param dupsort:
+        :param dupfixed:
+        :param sidecar:
         :return:
         """
         assert isinstance(oid, uuid.UUID)
@@ -931,10 +1218,23 @@ class Database(object):
         assert compress is None or compress in [
             _pmap.PersistentMap.COMPRESS_ZLIB,
             _pmap.PersistentMap.COMPRESS_SNAPPY,
+            _pmap.PersistentMap.COMPRESS_ZSTD,
+            _pmap.PersistentMap.COMPRESS_LZ4,
         ]
         assert type(create) == bool
         assert name is None or type(name) == str
         assert description is None or type(description) == str
+        assert type(counted) == bool
+        assert type(dupsort) == bool
+        assert type(dupfixed) == bool
+        assert type(sidecar) == bool
+
+        if dupsort and self._storage != Database.STORAGE_DBI:
+            raise RuntimeError(
+                'DB table <{}>: "{}" uses dupsort, which requires storage mode "dbi"'.format(
+                    oid, name
+                )
+            )
 
         assert self._slots_by_index is not None
 
@@ -952,6 +1252,7 @@ class Database(object):
                     slot=slot_index,
                     name=name,
                     description=description,
+                    storage=self._storage,
                 )
                 self._set_slot(slot_index, slot)
                 self.log.info(
@@ -968,6 +1269,14 @@ class Database(object):
                 )
         else:
             slot_index = self._slots_by_index[oid]
+            slot = self._slots[oid]
+            if slot.storage != self._storage:
+                raise RuntimeError(
+                    'DB table <{}>: "{}" is stored in storage mode "{}", but database is opened '
+                    'with storage mode "{}" (migrate the database first)'.format(
+                        oid, name, slot.storage, self._storage
+                    )
+                )
             # pmap = _pmap.PersistentMap(slot_index)
             # with self.begin() as txn:
             #     records = pmap.count(txn)
@@ -987,4 +1296,39 @@ class Database(object):
         else:
             slot_pmap = klass(slot_index, compress=compress)
 
+        # store index keys of records in sidecars (see PersistentMap.has_sidecar)
+        slot_pmap._sidecar = sidecar
+
+        # load zstd compression dictionaries (see PersistentMap.train_zstd_dict), which
+        # with tagged values might be needed after switching to another codec
+        if compress == _pmap.PersistentMap.COMPRESS_ZSTD or (
+            slot_pmap._compress_min_size is not None and _pmap.HAS_ZSTD
+        ):
+            with self.begin() as txn:
+                dict_id = slot_pmap.load_zstd_dicts(txn)
+            self.log.debug(
+                "Zstd dictionary {dict_id} loaded for database table <{name}>",
+                name=name,
+                dict_id=dict_id,
+            )
+
+        if self._storage == Database.STORAGE_DBI:
+            # a sub-database knows its exact number of entries, no need for a record counter
+            with self.begin(write=not self._readonly) as txn:
+                dbi = self._open_dbi(
+                    slot_index, txn, dupsort=dupsort, dupfixed=dupfixed
+                )
+            slot_pmap._bind_dbi(dbi, dupsort=dupsort, dupfixed=dupfixed)
+        elif counted:
+            if self._readonly:
+                slot_pmap._counted = True
+            else:
+                with self.begin(write=True) as txn:
+                    records = slot_pmap.enable_counter(txn)
+                self.log.debug(
+                    "Record counter enabled for database table <{name}>: {records} records",
+                    name=name,
+                    records=records,
+                )
+
         return slot_pmap
@@ -0,0 +1,539 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) typedef int GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+"""FlatBuffers codec driven by reflection schemas"""
+
+import struct
+from typing import Any, Callable, Dict, Optional
+
+from zlmdb.flatbuffers import number_types as N
+from zlmdb.flatbuffers.reflection.BaseType import BaseType
+from zlmdb.flatbuffers.reflection.Schema import Schema as _Schema
+
+_read_uoffset = struct.Struct("<I").unpack_from
+_read_soffset = struct.Struct("<i").unpack_from
+_read_voffset = struct.Struct("<H").unpack_from
+
+# struct format and builder flags of scalars (stored little-endian) by base type
+_SCALARS = {
+    BaseType.UType: ("B", N.Uint8Flags),
+    BaseType.Bool: ("?", N.BoolFlags),
+    BaseType.Byte: ("b", N.Int8Flags),
+    BaseType.UByte: ("B", N.Uint8Flags),
+    BaseType.Short: ("h", N.Int16Flags),
+    BaseType.UShort: ("H", N.Uint16Flags),
+    BaseType.Int: ("i", N.Int32Flags),
+    BaseType.UInt: ("I", N.Uint32Flags),
+    BaseType.Long: ("q", N.Int64Flags),
+    BaseType.ULong: ("Q", N.Uint64Flags),
+    BaseType.Float: ("f", N.Float32Flags),
+    BaseType.Double: ("d", N.Float64Flags),
+}
+
+
+def _read_string(buf, pos):
+    pos += _read_uoffset(buf, pos)[0]
+    n = _read_uoffset(buf, pos)[0]
+    return bytes(buf[pos + 4 : pos + 4 + n]).decode("utf8")
+
+
+def _unsupported(field):
+    return Exception(
+        'type {} of field "{}" not supported by FlatBuffers codec'.format(
+            field.base_type, field.name
+        )
+    )
+
+
+class FlatBuffersField(object):
+    """
+    Field of a FlatBuffers table or struct, with the accessor and builder functions
+    for the field type precomputed from the reflection schema.
+    """
+
+    def __init__(self, codec: "FlatBuffersCodec", field):
+        """
+
+        :param codec: Codec of the schema the field is defined in.
+        :param field: Reflection field (``zlmdb.flatbuffers.reflection.Field.Field``).
+        """
+        _type = field.Type()
+
+        self.name: str = field.Name().decode("utf8")
+        """
+        Field name.
+        """
+
+        self.id: int = field.Id()
+        """
+        Field ID (index of the field in the vtable of tables).
+        """
+
+        self.slot: int = field.Offset()
+        """
+        Offset of the field in the vtable of tables (or in the struct for struct fields).
+        """
+
+        self.base_type: int = _type.BaseType()
+        """
+        Field type (see ``zlmdb.flatbuffers.reflection.BaseType``).
+        """
+
+        self.element: int = _type.Element()
+        """
+        Element type of vector fields.
+        """
+
+        self.deprecated: bool = field.Deprecated()
+        self.padding: int = field.Padding()
+
+        # default value of scalars
+        self.default: Any = None
+        if self.base_type in _SCALARS and not field.Optional():
+            if self.base_type in (BaseType.Float, BaseType.Double):
+                self.default = field.DefaultReal()
+            elif self.base_type == BaseType.Bool:
+                self.default = bool(field.DefaultInteger())
+            else:
+                self.default = field.DefaultInteger()
+
+        # table or struct type of (vectors of) objects
+        self.table: Optional[FlatBuffersTable] = None
+        if BaseType.Obj in (self.base_type, self.element):
+            self.table = codec._table(_type.Index())
+
+        self.flags = None
+        self.read: Callable = self._reader()
+
+    def _reader(self):
+        base_type = self.base_type
+        if base_type in _SCALARS:
+            fmt, self.flags = _SCALARS[base_type]
+            unpack = struct.Struct("<" + fmt).unpack_from
+            return lambda buf, pos: unpack(buf, pos)[0]
+
+        if base_type == BaseType.String:
+            return _read_string
+
+        if base_type == BaseType.Obj:
+            table = self.table
+            if table.is_struct:
+                return table.read_struct
+            return lambda buf, pos: FlatBuffersRecord(
+                table, buf, pos + _read_uoffset(buf, pos)[0]
+            )
+
+        if base_type == BaseType.Vector:
+            element = self.element
+            if element == BaseType.UByte:
+
+                def read(buf, pos):
+                    pos += _read_uoffset(buf, pos)[0]
+                    n = _read_uoffset(buf, pos)[0]
+                    return bytes(buf[pos + 4 : pos + 4 + n])
+
+            elif element in _SCALARS:
+                fmt = _SCALARS[element][0]
+
+                def read(buf, pos):
+                    pos += _read_uoffset(buf, pos)[0]
+                    n = _read_uoffset(buf, pos)[0]
+                    return list(
+                        struct.unpack_from("<{}{}".format(n, fmt), buf, pos + 4)
+                    )
+
+            elif element == BaseType.String:
+
+                def read(buf, pos):
+                    pos += _read_uoffset(buf, pos)[0]
+                    n = _read_uoffset(buf, pos)[0]
+                    return [_read_string(buf, pos + 4 + 4 * i) for i in range(n)]
+
+            elif element == BaseType.Obj and self.table.is_struct:
+                read_struct = self.table.read_struct
+                size = self.table.bytesize
+
+                def read(buf, pos):
+                    pos += _read_uoffset(buf, pos)[0]
+                    n = _read_uoffset(buf, pos)[0]
+                    return [read_struct(buf, pos + 4 + size * i) for i in range(n)]
+
+            elif element == BaseType.Obj:
+                table = self.table
+
+                def read(buf, pos):
+                    pos += _read_uoffset(buf, pos)[0]
+                    n = _read_uoffset(buf, pos)[0]
+                    records = []
+                    for i in range(n):
+                        p = pos + 4 + 4 * i
+                        records.append(
+                            FlatBuffersRecord(table, buf, p + _read_uoffset(buf, p)[0])
+                        )
+                    return records
+
+            else:
+                return self._read_unsupported
+
+            return read
+
+        # unions, fixed size arrays and 64 bit vectors
+        return self._read_unsupported
+
+    def _read_unsupported(self, buf, pos):
+        raise _unsupported(self)
+
+    def create(self, builder, value):
+        """
+        Create the (out-of-line) data of a string, vector or table field value.
+
+        :param builder: FlatBuffers builder.
+        :param value: Field value.
+        :return: Offset of the created data in the builder.
+        """
+        base_type = self.base_type
+        if base_type == BaseType.String:
+            return builder.CreateString(value)
+
+        if base_type == BaseType.Obj:
+            return self.table.build(value, builder)
+
+        if base_type == BaseType.Vector:
+            element = self.element
+            if element == BaseType.UByte and isinstance(
+                value, (bytes, bytearray, memoryview)
+            ):
+                return builder.CreateByteVector(bytes(value))
+
+            if element in _SCALARS:
+                flags = _SCALARS[element][1]
+                builder.StartVector(flags.bytewidth, len(value), flags.bytewidth)
+                for x in reversed(value):
+                    builder.Prepend(flags, x)
+                return builder.EndVector()
+
+            if element == BaseType.Obj and self.table.is_struct:
+                table = self.table
+                builder.StartVector(table.bytesize, len(value), table.minalign)
+                for x in reversed(value):
+                    table.build_struct(x, builder)
+                return builder.EndVector()
+
+            if element == BaseType.String:
+                offsets = [builder.CreateString(x) for x in value]
+            elif element == BaseType.Obj:
+                offsets = [self.table.build(x, builder) for x in value]
+            else:
+                raise _unsupported(self)
+            builder.StartVector(4, len(offsets), 4)
+            for offset in reversed(offsets):
+                builder.PrependUOffsetTRelative(offset)
+            return builder.EndVector()
+
+        raise _unsupported(self)
+
+
+class FlatBuffersTable(object):
+    """
+    FlatBuffers table (or struct) type of a reflection schema.
+    """
+
+    def __init__(self, codec: "FlatBuffersCodec", obj):
+        """
+
+        :param codec: Codec of the schema the type is defined in.
+        :param obj: Reflection object (``zlmdb.flatbuffers.reflection.Object.Object``).
+        """
+        self.name: str = obj.Name().decode("utf8")
+        self.is_struct: bool = obj.IsStruct()
+        self.minalign: int = obj.Minalign()
+        self.bytesize: int = obj.Bytesize()
+
+        # register before resolving fields, which may refer to this type
+        codec._tables[self.name] = self
+
+        _fields = [
+            FlatBuffersField(codec, obj.Fields(i)) for i in range(obj.FieldsLength())
+        ]
+
+        self.fields: Dict[str, FlatBuffersField] = {
+            field.name: field for field in _fields if not field.deprecated
+        }
+        """
+        Map of field names to fields (not including deprecated fields).
+        """
+
+        # number of vtable slots of tables (including deprecated fields)
+        self.num_slots = max([field.id + 1 for field in _fields] or [0])
+
+        # fields in order of the struct layout or vtable slots
+        self._fields = sorted(self.fields.values(), key=lambda field: field.slot)
+
+        # fields written into tables inline (scalars and structs), and fields referenced
+        self._inline = [
+            field
+            for field in self._fields
+            if field.flags
+            or (
+                field.table is not None
+                and field.table.is_struct
+                and field.base_type == BaseType.Obj
+            )
+        ]
+        self._referenced = [
+            field for field in self._fields if field not in self._inline
+        ]
+
+    def read_struct(self, buf, pos) -> Dict[str, Any]:
+        """
+        Read a struct stored inline at the given position into a dict.
+        """
+        return {field.name: field.read(buf, pos + field.slot) for field in self._fields}
+
+    def build_struct(self, value, builder):
+        """
+        Build a struct inline from a dict (or object with the fields as attributes).
+        """
+        get = value.get if isinstance(value, dict) else value.__getattribute__
+        builder.Prep(self.minalign, self.bytesize)
+        for field in reversed(self._fields):
+            if field.padding:
+                builder.Pad(field.padding)
+            if field.flags:
+                builder.Prepend(field.flags, get(field.name))
+            else:
+                field.table.build_struct(get(field.name), builder)
+
+    def build(self, value, builder) -> int:
+        """
+        Build a table from a dict (or object with the fields as attributes, such as
+        a :class:`FlatBuffersRecord`). Fields that are missing or ``None`` are not stored.
+
+        :param value: Table data.
+        :param builder: FlatBuffers builder.
+        :return: Offset of the table in the builder.
+        """
+        if isinstance(value, dict):
+            get = value.get
+        else:
+
+            def get(name):
+                return getattr(value, name, None)
+
+        # strings, vectors and tables must be created before the table itself
+        offsets = []
+        for field in self._referenced:
+            x = get(field.name)
+            if x is not None:
+                offsets.append((field, field.create(builder, x)))
+
+        builder.StartObject(self.num_slots)
+        for field in self._inline:
+            x = get(field.name)
+            if x is None:
+                continue
+            if field.flags:
+                builder.PrependSlot(field.flags, field.id, x, field.default)
+            else:
+                field.table.build_struct(x, builder)
+                builder.PrependStructSlot(field.id, builder.Offset(), 0)
+        for field, offset in offsets:
+            builder.PrependUOffsetTRelativeSlot(field.id, offset, 0)
+        return builder.EndObject()
+
+
+class FlatBuffersRecord(object):
+    """
+    Table record backed by a FlatBuffers buffer, with fields read lazily on first
+    access (as attributes or items) through the precomputed field accessors of the
+    table type.
+
+    Records read in zero-copy mode (see :meth:`zlmdb.Database.begin`) are backed by the
+    LMDB memory map, and must not be accessed after the transaction has ended.
+    """
+
+    __slots__ = ("_table", "_buf", "_pos", "_vtable", "_vtable_size", "_cache")
+
+    def __init__(self, table: FlatBuffersTable, buf, pos: int):
+        """
+
+        :param table: Table type of the record.
+        :param buf: Buffer with the record.
+        :param pos: Position of the table in the buffer.
+        """
+        self._table = table
+        self._buf = buf
+        self._pos = pos
+        self._vtable = pos - _read_soffset(buf, pos)[0]
+        self._vtable_size = _read_voffset(buf, self._vtable)[0]
+        self._cache: Dict[str, Any] = {}
+
+    def _read(self, field: FlatBuffersField):
+        if field.slot < self._vtable_size:
+            o = _read_voffset(self._buf, self._vtable + field.slot)[0]
+            if o:
+                return field.read(self._buf, self._pos + o)
+        return field.default
+
+    def __getattr__(self, name):
+        try:
+            return self._cache[name]
+        except KeyError:
+            pass
+        field = self._table.fields.get(name, None)
+        if field is None:
+            raise AttributeError(
+                'FlatBuffers table "{}" has no field "{}"'.format(
+                    self._table.name, name
+                )
+            )
+        value = self._read(field)
+        self._cache[name] = value
+        return value
+
+    def __getitem__(self, name):
+        if name not in self._table.fields:
+            raise KeyError(name)
+        return self.__getattr__(name)
+
+    def __repr__(self):
+        return "{}({})".format(self._table.name, self.to_dict())
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Read all fields of the record (and of records nested in it) into a dict.
+        """
+        data = {}
+        for name in self._table.fields:
+            value = self.__getattr__(name)
+            if isinstance(value, FlatBuffersRecord):
+                value = value.to_dict()
+            elif (
+                value
+                and isinstance(value, list)
+                and isinstance(value[0], FlatBuffersRecord)
+            ):
+                value = [record.to_dict() for record in value]
+            data[name] = value
+        return data
+
+
+class FlatBuffersCodec(object):
+    """
+    Generic codec for FlatBuffers tables driven by a FlatBuffers binary schema (``.bfbs``),
+    which does not require code generated by ``flatc``.
+
+    The codec provides ``build`` and ``cast`` functions for FlatBuffers maps, e.g.
+
+    .. code-block:: python
+
+        codec = zlmdb.FlatBuffersCodec("mnodelog.bfbs", "MNodeLog")
+
+        @zlmdb.table("256a071f-5aeb-47f3-8786-97cd8281bdb7",
+                     build=codec.build, cast=codec.cast)
+        class MNodeLogs(zlmdb.MapTimestampUuidFlatBuffers):
+            pass
+
+    Values are built from dicts (or objects with the fields as attributes), and read
+    as :class:`FlatBuffersRecord` with lazily read fields.
+    """
+
+    def __init__(self, schema, name: Optional[str] = None):
+        """
+
+        :param schema: FlatBuffers binary schema (as generated by ``flatc --binary --schema``),
+            either a ``.bfbs`` file name, the schema data or a reflection ``Schema``.
+        :type schema: str or bytes or zlmdb.flatbuffers.reflection.Schema.Schema
+
+        :param name: Fully qualified name of the FlatBuffers table, defaults to the
+            root type of the schema.
+        """
+        if isinstance(schema, str):
+            with open(schema, "rb") as f:
+                schema = f.read()
+        if isinstance(schema, (bytes, bytearray)):
+            schema = _Schema.GetRootAs(schema, 0)
+        self._schema = schema
+
+        # table and struct types, created when first referenced
+        self._tables: Dict[str, FlatBuffersTable] = {}
+
+        obj = None
+        if name is None:
+            obj = schema.RootTable()
+        else:
+            for i in range(schema.ObjectsLength()):
+                if schema.Objects(i).Name().decode("utf8") == name:
+                    obj = schema.Objects(i)
+                    break
+        if obj is None or obj.IsStruct():
+            raise Exception(
+                'no table "{}" in FlatBuffers schema'.format(name or "(root type)")
+            )
+
+        self.table: FlatBuffersTable = FlatBuffersTable(self, obj)
+        """
+        Table type read and built by this codec.
+        """
+
+    def _table(self, index: int) -> FlatBuffersTable:
+        obj = self._schema.Objects(index)
+        table = self._tables.get(obj.Name().decode("utf8"), None)
+        if table is None:
+            table = FlatBuffersTable(self, obj)
+        return table
+
+    @property
+    def name(self) -> str:
+        """
+        Fully qualified name of the table type.
+        """
+        return self.table.name
+
+    @property
+    def fields(self) -> Dict[str, FlatBuffersField]:
+        """
+        Map of field names to fields of the table type.
+        """
+        return self.table.fields
+
+    def build(self, value, builder) -> int:
+        """
+        Build a table from a dict (or object with the fields as attributes).
+
+        :param value: Table data.
+        :param builder: FlatBuffers builder.
+        :return: Offset of the table in the builder.
+        """
+        return self.table.build(value, builder)
+
+    def cast(self, buf) -> FlatBuffersRecord:
+        """
+        Cast a (finished) FlatBuffers buffer into a record with lazily read fields.
+
+        :param buf: Buffer with the table as root.
+        :return: Table record.
+        """
+        return FlatBuffersRecord(self.table, buf, _read_uoffset(buf, 0)[0])
@@ -0,0 +1,421 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) typedef int GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+"""Compiled key codecs"""
+
+import struct
+import sys
+import uuid
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    HAS_NUMPY = False
+else:
+    HAS_NUMPY = True
+    _DATETIME64_NS = np.dtype("datetime64[ns]")
+
+MAX_OID = 9007199254740992
+"""
+Valid OIDs are from the integer range [0, MAX_OID].
+"""
+
+
+class _KeyType(object):
+    """
+    Type of a key component, given as source templates for the generated code.
+    """
+
+    def __init__(self, name, size, zero, check, encode="{k}", decode="{d}", fmt=None):
+        # name used in key specs
+        self.name = name
+
+        # size of the serialized component in bytes, None for variable size
+        self.size = size
+
+        # value for None key components (in nullable keys)
+        self.zero = zero
+
+        # expression checking the type (and range) of component "{k}"
+        self.check = check
+
+        # expression serializing component "{k}", unless serialized with struct
+        self.encode = encode
+
+        # expression deserializing component data "{d}", or the struct value "{v}"
+        self.decode = decode
+
+        # struct format for integer components (big-endian)
+        self.fmt = fmt
+
+        # whether the component is serialized with struct
+        self.packed = fmt is not None and encode == "{k}"
+
+
+def _bytes_type(n):
+    return _KeyType(
+        "bytes{}".format(n),
+        n,
+        b"\x00" * n,
+        "type({k}) == bytes and len({k}) == %d" % n,
+        decode="bytes({d})",
+    )
+
+
+_KEY_TYPES: Dict[str, _KeyType] = {
+    t.name: t
+    for t in [
+        _KeyType(
+            "oid",
+            8,
+            0,
+            "type({k}) == int and 0 <= {k} <= %d" % MAX_OID,
+            decode="{v}",
+            fmt="Q",
+        ),
+        _KeyType(
+            "uint64",
+            8,
+            0,
+            "type({k}) == int and 0 <= {k} < 2**64",
+            decode="{v}",
+            fmt="Q",
+        ),
+        _KeyType(
+            "uint16",
+            2,
+            0,
+            "type({k}) == int and 0 <= {k} < 2**16",
+            decode="{v}",
+            fmt="H",
+        ),
+        _KeyType(
+            "uint8", 1, 0, "type({k}) == int and 0 <= {k} < 2**8", decode="{v}", fmt="B"
+        ),
+        # timestamps are serialized in big-endian byte order
+        _KeyType(
+            "timestamp",
+            8,
+            np.datetime64(0, "ns") if HAS_NUMPY else None,
+            "isinstance({k}, _datetime64)",
+            encode="_dt_ns({k}).tobytes()[::-1]"
+            if sys.byteorder == "little"
+            else "_dt_ns({k}).tobytes()",
+            decode='_datetime64({v}, "ns")',
+            fmt="q",
+        ),
+        _KeyType(
+            "uuid",
+            16,
+            uuid.UUID(bytes=b"\x00" * 16),
+            "isinstance({k}, _UUID)",
+            encode="{k}.bytes",
+            decode="_UUID(bytes=bytes({d}))",
+        ),
+        _KeyType(
+            "string",
+            None,
+            "",
+            "type({k}) == str",
+            encode='{k}.encode("utf8")',
+            decode='str({d}, "utf8")',
+        ),
+        _bytes_type(16),
+        _bytes_type(20),
+        _bytes_type(32),
+    ]
+}
+
+
+def _dt_ns(dt):
+    # timestamps are serialized in nanoseconds, whatever the unit given
+    return dt if dt.dtype == _DATETIME64_NS else dt.astype(_DATETIME64_NS)
+
+
+class _NoDatetime64(object):
+    # stands in for np.datetime64 when numpy is not installed
+    def __new__(cls, *args):
+        raise Exception("timestamp key components require numpy")
+
+
+def _successor(prefix: bytes) -> Optional[bytes]:
+    # the smallest byte string larger than all byte strings starting with prefix
+    prefix = prefix.rstrip(b"\xff")
+    if not prefix:
+        return None
+    return prefix[:-1] + bytes([prefix[-1] + 1])
+
+
+class KeyCodec(object):
+    """
+    Key serializer and deserializer for a (composite) key type given as tuple of
+    key component types, compiled into a specialized pair of functions using
+    precompiled ``struct.Struct`` objects.
+
+    Key component types are ``"oid"``, ``"uint64"``, ``"uint16"``, ``"uint8"``,
+    ``"timestamp"``, ``"uuid"``, ``"string"``, ``"bytes16"``, ``"bytes20"`` and
+    ``"bytes32"``. At most one component may be of variable size (``"string"``).
+    Integers are serialized in big-endian byte order, so that keys sort numerically.
+
+    .. code-block:: python
+
+        codec = KeyCodec(("uuid", "timestamp", "string"), nullable=True)
+
+        data = codec.encode((oid, np.datetime64(time_ns(), "ns"), "sensor1"))
+        oid, ts, name = codec.decode(data)
+        from_key, to_key = codec.prefix_bounds((oid,))
+
+    Keys of a single component are given as the component itself (not as a tuple).
+    """
+
+    def __init__(self, spec: Tuple[str, ...], nullable: bool = False):
+        """
+
+        :param spec: Key component types.
+        :param nullable: If set, ``None`` key components are serialized as zero values
+            (e.g. the null UUID), which allows to give key ranges with partial keys.
+        """
+        for name in spec:
+            if name not in _KEY_TYPES:
+                raise Exception('invalid key component type "{}"'.format(name))
+        if len([name for name in spec if _KEY_TYPES[name].size is None]) > 1:
+            raise Exception("only one variable size key component allowed")
+        self._spec = tuple(spec)
+        self._types = [_KEY_TYPES[name] for name in spec]
+        self._nullable = nullable
+        self._namespace: Dict[str, Any] = {
+            "_UUID": uuid.UUID,
+            "_datetime64": np.datetime64 if HAS_NUMPY else _NoDatetime64,
+            "_dt_ns": _dt_ns,
+        }
+        for i, t in enumerate(self._types):
+            self._namespace["_z{}".format(i)] = t.zero
+
+        self.encode = self._compile_encode()
+        """
+        Serialize a key.
+        """
+
+        self.decode = self._compile_decode()
+        """
+        Deserialize a key.
+        """
+
+        # component serializers for prefixes
+        self._encode_component = [
+            self._eval(
+                "lambda k: {}".format(
+                    "_S{}.pack(k)".format(i) if t.packed else t.encode.format(k="k")
+                )
+            )
+            for i, t in enumerate(self._types)
+        ]
+
+    @property
+    def spec(self) -> Tuple[str, ...]:
+        """
+        Key component types.
+        """
+        return self._spec
+
+    @property
+    def size(self) -> Optional[int]:
+        """
+        Size of serialized keys in bytes, or ``None`` for variable size keys.
+        """
+        if any(t.size is None for t in self._types):
+            return None
+        return sum(t.size for t in self._types)
+
+    def _eval(self, source):
+        return eval(source, self._namespace)
+
+    def _struct(self, name, fmt):
+        s = struct.Struct(">" + fmt)
+        self._namespace[name] = s
+        return s
+
+    def _compile_encode(self):
+        types = self._types
+        single = len(types) == 1
+        lines = ["def encode(key):"]
+        if single:
+            lines.append("    k0 = key")
+        else:
+            lines.append(
+                "    assert type(key) == tuple and len(key) == {}, "
+                '"key must be a tuple of {}, was {{}}".format(key)'.format(
+                    len(types), len(types)
+                )
+            )
+            lines.append(
+                "    {} = key".format(
+                    ", ".join("k{}".format(i) for i in range(len(types)))
+                )
+            )
+        for i, t in enumerate(types):
+            k = "k{}".format(i)
+            if self._nullable:
+                lines.append(
+                    "    if {k} is None:\n        {k} = _z{i}".format(k=k, i=i)
+                )
+            lines.append(
+                '    assert {}, "key component {} must be {}, was {{}}".format(type({}))'.format(
+                    t.check.format(k=k), i, t.name, k
+                )
+            )
+
+        # consecutive integer components are packed with one struct
+        parts = []
+        i = 0
+        while i < len(types):
+            j = i
+            while j < len(types) and types[j].packed:
+                j += 1
+            if j > i:
+                name = "_P{}".format(i)
+                self._struct(name, "".join(t.fmt for t in types[i:j]))
+                parts.append(
+                    "{}.pack({})".format(
+                        name, ", ".join("k{}".format(n) for n in range(i, j))
+                    )
+                )
+                i = j
+            else:
+                parts.append(types[i].encode.format(k="k{}".format(i)))
+                i += 1
+        lines.append("    return " + " + ".join(parts))
+
+        for i, t in enumerate(types):
+            if t.packed:
+                self._struct("_S{}".format(i), t.fmt)
+
+        exec("\n".join(lines), self._namespace)
+        return self._namespace.pop("encode")
+
+    def _compile_decode(self):
+        types = self._types
+        var = [i for i, t in enumerate(types) if t.size is None]
+        head = types[: var[0]] if var else types
+        tail = types[var[0] + 1 :] if var else []
+        head_size = sum(t.size for t in head)
+        tail_size = sum(t.size for t in tail)
+
+        lines = ["def decode(data):"]
+        if var:
+            lines.append("    assert len(data) >= {}".format(head_size + tail_size))
+            if tail:
+                lines.append("    n = len(data) - {}".format(tail_size))
+        else:
+            lines.append("    assert len(data) == {}".format(head_size))
+
+        exprs = []
+
+        # components at fixed offsets from the start (head), or the end (tail) of keys
+        for part, first, base, base_expr in [
+            (head, 0, 0, "0"),
+            (tail, len(head) + 1, 0, "n"),
+        ]:
+            if not part:
+                continue
+            fmt = ""
+            values = []
+            offset = base
+            for n, t in enumerate(part):
+                i = first + n
+                if t.fmt:
+                    fmt += t.fmt
+                    values.append("v{}".format(i))
+                    exprs.append((i, t.decode.format(v="v{}".format(i))))
+                else:
+                    fmt += "{}x".format(t.size)
+                    if base_expr == "0":
+                        d = "data[{}:{}]".format(offset, offset + t.size)
+                    else:
+                        d = "data[n + {}:n + {}]".format(offset, offset + t.size)
+                    exprs.append((i, t.decode.format(d=d)))
+                offset += t.size
+            if values:
+                name = "_U{}".format(first)
+                self._struct(name, fmt.rstrip("0123456789x") or fmt)
+                lines.append(
+                    "    {}, = {}.unpack_from(data, {})".format(
+                        ", ".join(values), name, base_expr
+                    )
+                )
+
+        if var:
+            i = var[0]
+            end = "n" if tail else ""
+            exprs.append(
+                (i, types[i].decode.format(d="data[{}:{}]".format(head_size, end)))
+            )
+
+        exprs = [expr for _, expr in sorted(exprs)]
+        if len(types) == 1:
+            lines.append("    return " + exprs[0])
+        else:
+            lines.append("    return ({},)".format(", ".join(exprs)))
+
+        exec("\n".join(lines), self._namespace)
+        return self._namespace.pop("decode")
+
+    def encode_prefix(self, prefix: Any) -> bytes:
+        """
+        Serialize a key prefix, given as the leading components of keys. Trailing
+        ``None`` components are omitted.
+
+        :param prefix: Key prefix (for composite keys, a tuple of the leading components,
+            or the first component).
+        :return: Serialized key prefix.
+        """
+        if len(self._types) == 1 or type(prefix) != tuple:
+            prefix = (prefix,)
+        prefix = list(prefix)
+        while prefix and prefix[-1] is None:
+            prefix.pop()
+        assert len(prefix) <= len(self._types)
+
+        data = b""
+        for i, key in enumerate(prefix):
+            t = self._types[i]
+            if key is None and self._nullable:
+                key = t.zero
+            if t.size is None and i < len(prefix) - 1:
+                raise Exception("variable size key component must end the prefix")
+            data += self._encode_component[i](key)
+        return data
+
+    def prefix_bounds(self, prefix: Any) -> Tuple[bytes, Optional[bytes]]:
+        """
+        Get the range of serialized keys starting with a key prefix.
+
+        :param prefix: Key prefix (see :meth:`encode_prefix`).
+        :return: Serialized keys ``(from_key, to_key)``, with ``from_key`` inclusive and
+            ``to_key`` exclusive, or ``None`` if there is no upper bound.
+        """
+        data = self.encode_prefix(prefix)
+        return data, _successor(data)
@@ -315,6 +315,14 @@ class Transaction(Generic[_VT_co]):
         append: bool = False,
         db: _Database | None = None,
     ) -> bool: ...
+    def reserve(
+        self,
+        key: Buffer,
+        size: int,
+        overwrite: bool = True,
+        append: bool = False,
+        db: _Database | None = None,
+    ) -> memoryview | None: ...
     def replace(
         self, key: Buffer, value: Buffer, db: _Database | None = None
     ) -> _VT_co | None: ...
@@ -400,6 +408,27 @@ class Cursor(Generic[_VT_co]):
         values: bool = True,
     ) -> memoryview: ...
 
+    #
+    @overload  # values=True (default)
+    def getbatch(
+        self,
+        n: int,
+        bound: Buffer | None = None,
+        reverse: bool = False,
+        values: Literal[True] = True,
+    ) -> list[tuple[_VT_co, _VT_co]]: ...
+    @overload  # values=False
+    def getbatch(
+        self,
+        n: int,
+        bound: Buffer | None = None,
+        reverse: bool = False,
+        *,
+        values: Literal[False],
+    ) -> list[_VT_co]: ...
+    def count_range(self, from_key: Buffer, to_key: Buffer | None = None) -> int: ...
+    def count_prefix(self, prefix: Buffer) -> int: ...
+
     #
     def put(
         self,
@@ -275,6 +275,7 @@ class AsyncTransaction:
     abort = _async_method_locked(Transaction.abort)
     get = _async_method_locked(Transaction.get)
     put = _async_method_locked(Transaction.put)
+    reserve = _async_method_locked(Transaction.reserve)
     replace = _async_method_locked(Transaction.replace)
     pop = _async_method_locked(Transaction.pop)
     delete = _async_method_locked(Transaction.delete)
@@ -349,6 +350,9 @@ class AsyncCursor:
     pop = _async_method_locked(Cursor.pop)
     get = _async_method_locked(Cursor.get)
     getmulti = _async_method_locked(Cursor.getmulti)
+    getbatch = _async_method_locked(Cursor.getbatch)
+    count_range = _async_method_locked(Cursor.count_range)
+    count_prefix = _async_method_locked(Cursor.count_prefix)
 
     iternext = _collect_locked(Cursor.iternext)
     iternext_dup = _collect_locked(Cursor.iternext_dup)
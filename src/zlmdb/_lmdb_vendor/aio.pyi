@@ -150,6 +150,14 @@ class AsyncTransaction(Generic[_VT_co]):
         append: bool = False,
         db: _Database | None = None,
     ) -> bool: ...
+    async def reserve(
+        self,
+        key: Buffer,
+        size: int,
+        overwrite: bool = True,
+        append: bool = False,
+        db: _Database | None = None,
+    ) -> memoryview | None: ...
     async def replace(
         self, key: Buffer, value: Buffer, db: _Database | None = None
     ) -> _VT_co | None: ...
@@ -358,3 +366,26 @@ class AsyncCursor(Generic[_VT_co]):
         keyfixed: Literal[True],
         values: bool = True,
     ) -> memoryview: ...
+
+    #
+    @overload  # values=True (default)
+    async def getbatch(
+        self,
+        n: int,
+        bound: Buffer | None = None,
+        reverse: bool = False,
+        values: Literal[True] = True,
+    ) -> list[tuple[_VT_co, _VT_co]]: ...
+    @overload  # values=False
+    async def getbatch(
+        self,
+        n: int,
+        bound: Buffer | None = None,
+        reverse: bool = False,
+        *,
+        values: Literal[False],
+    ) -> list[_VT_co]: ...
+    async def count_range(
+        self, from_key: Buffer, to_key: Buffer | None = None
+    ) -> int: ...
+    async def count_prefix(self, prefix: Buffer) -> int: ...
@@ -297,6 +297,27 @@ _CFFI_CDEF = '''
                                 char *key_s, size_t keylen,
                                 char *val_s, size_t vallen, int flags);
 
+    // zlmdb adaptation: batched range scan (see Cursor.getbatch)
+    static int zlmdb_cursor_scan(MDB_cursor *cursor, MDB_val *key, MDB_val *data,
+                                 char *bound_s, size_t bound_len, int reverse,
+                                 MDB_val *keys, MDB_val *vals, size_t n,
+                                 size_t *count);
+
+    // zlmdb adaptation: range and prefix counting (see Cursor.count_range)
+    static int zlmdb_cursor_count_range(MDB_cursor *cursor,
+                                        char *from_s, size_t from_len,
+                                        char *to_s, size_t to_len,
+                                        size_t *count);
+    static int zlmdb_cursor_count_prefix(MDB_cursor *cursor,
+                                         char *prefix_s, size_t prefix_len,
+                                         size_t *count);
+
+    // zlmdb adaptation: put reserving space for the value (see Transaction.reserve)
+    static int zlmdb_put_reserve(MDB_txn *txn, MDB_dbi dbi,
+                                 char *key_s, size_t keylen,
+                                 size_t vallen, unsigned int flags,
+                                 MDB_val *val_out);
+
     // Prefaults a range
     static void preload(int rc, void *x, size_t size);
 
@@ -308,6 +329,7 @@ _CFFI_CDEF_PATCHED = '''
 
 _CFFI_VERIFY = '''
     #include <sys/stat.h>
+    #include <string.h>
     #include "lmdb.h"
     #include "preload.h"
 
@@ -366,6 +388,129 @@ _CFFI_VERIFY = '''
         return mdb_cursor_put(cursor, &tmpkey, &tmpval, flags);
     }
 
+    // zlmdb adaptation: batched range scan. Starting with the current cursor
+    // position (key, data), fill up to `n` (key, value) pairs, moving forward
+    // (or backward, if `reverse`) after each pair. The scan stops before the
+    // first key >= bound (forward) or < bound (reverse), unless bound_s is NULL.
+    // Returns 0 if the batch is full, with (key, data) at the next position, or
+    // MDB_NOTFOUND if the end of the range or database was reached.
+    static int zlmdb_cursor_scan(MDB_cursor *cursor, MDB_val *key, MDB_val *data,
+                                 char *bound_s, size_t bound_len, int reverse,
+                                 MDB_val *keys, MDB_val *vals, size_t n,
+                                 size_t *count)
+    {
+        MDB_txn *txn = mdb_cursor_txn(cursor);
+        MDB_dbi dbi = mdb_cursor_dbi(cursor);
+        MDB_val bound = {bound_len, bound_s};
+        MDB_cursor_op op = reverse ? MDB_PREV : MDB_NEXT;
+        size_t i = 0;
+        int rc = 0;
+
+        while(i < n) {
+            if(bound_s != NULL) {
+                int cmp = mdb_cmp(txn, dbi, key, &bound);
+                if(reverse ? cmp < 0 : cmp >= 0) {
+                    rc = MDB_NOTFOUND;
+                    break;
+                }
+            }
+            keys[i] = *key;
+            vals[i] = *data;
+            i++;
+            rc = mdb_cursor_get(cursor, key, data, op);
+            if(rc) {
+                break;
+            }
+        }
+        *count = i;
+        return rc;
+    }
+
+    // zlmdb adaptation: count records (including duplicates) with keys
+    // from_s <= key < to_s (no upper bound if to_s is NULL).
+    static int zlmdb_cursor_count_range(MDB_cursor *cursor,
+                                        char *from_s, size_t from_len,
+                                        char *to_s, size_t to_len,
+                                        size_t *count)
+    {
+        MDB_txn *txn = mdb_cursor_txn(cursor);
+        MDB_dbi dbi = mdb_cursor_dbi(cursor);
+        MDB_val key = {from_len, from_s};
+        MDB_val data = {0, NULL};
+        MDB_val to = {to_len, to_s};
+        size_t cnt = 0;
+        int rc;
+
+        if(from_len) {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_SET_RANGE);
+        } else {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_FIRST);
+        }
+        while(! rc) {
+            if(to_s != NULL && mdb_cmp(txn, dbi, &key, &to) >= 0) {
+                break;
+            }
+            cnt++;
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_NEXT);
+        }
+        *count = cnt;
+        return rc == MDB_NOTFOUND ? 0 : rc;
+    }
+
+    // zlmdb adaptation: count records (including duplicates) with keys
+    // starting with prefix_s.
+    static int zlmdb_cursor_count_prefix(MDB_cursor *cursor,
+                                         char *prefix_s, size_t prefix_len,
+                                         size_t *count)
+    {
+        MDB_val key = {prefix_len, prefix_s};
+        MDB_val data = {0, NULL};
+        size_t cnt = 0;
+        int rc;
+
+        if(prefix_len) {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_SET_RANGE);
+        } else {
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_FIRST);
+        }
+        while(! rc) {
+            if(key.mv_size < prefix_len ||
+               memcmp(key.mv_data, prefix_s, prefix_len) != 0) {
+                break;
+            }
+            cnt++;
+            rc = mdb_cursor_get(cursor, &key, &data, MDB_NEXT);
+        }
+        *count = cnt;
+        return rc == MDB_NOTFOUND ? 0 : rc;
+    }
+
+    // zlmdb adaptation: store a record with MDB_RESERVE, returning the address
+    // of vallen bytes of space reserved for the value in val_out, for the
+    // caller to fill in before the next update in the transaction. Not
+    // supported for MDB_DUPSORT databases (EINVAL).
+    static int zlmdb_put_reserve(MDB_txn *txn, MDB_dbi dbi,
+                                 char *key_s, size_t keylen,
+                                 size_t vallen, unsigned int flags,
+                                 MDB_val *val_out)
+    {
+        MDB_val key = {keylen, key_s};
+        unsigned int dbi_flags;
+        int rc = mdb_dbi_flags(txn, dbi, &dbi_flags);
+
+        if(rc) {
+            return rc;
+        }
+        // values of sorted duplicates are compared on insert, so they
+        // cannot be filled in afterwards
+        if(dbi_flags & MDB_DUPSORT) {
+            return EINVAL;
+        }
+        val_out->mv_size = vallen;
+        val_out->mv_data = NULL;
+        return mdb_put(txn, dbi, &key, val_out, flags | MDB_RESERVE);
+    }
+
 '''
 
 if not _reading_docs():
@@ -1846,6 +1991,10 @@ class Transaction:
             raise BadValsizeError("Key cannot be None")
         if value is None:
             value = b""
+        # zlmdb adaptation: accept any contiguous buffer (eg a memoryview) as the
+        # value, which is handed to LMDB without copying it to a bytestring first.
+        elif type(value) is not bytes:
+            value = _ffi.from_buffer(value)
 
         flags = 0
         if not dupdata:
@@ -1864,6 +2013,57 @@ class Transaction:
             raise _error("mdb_put", rc)
         return True
 
+    # zlmdb adaptation: expose MDB_RESERVE, to serialize values directly into
+    # the database page rather than into an intermediate bytestring.
+    def reserve(self, key, size, overwrite=True, append=False, db=None):
+        """Store a record with a value of `size` bytes, returning a writable
+        buffer of the space reserved for the value in the database, or
+        ``None`` if the key was already present and `overwrite=False`.
+
+        The caller must fill in the buffer before the next update in the
+        transaction, and must not use it after that. Not supported for
+        `dupsort=True` databases.
+
+        Equivalent to `mdb_put()
+        <http://lmdb.tech/doc/group__mdb.html#ga4fa8573d9236d54687c61827ebf8cac0>`_
+        with ``MDB_RESERVE``.
+
+            `key`:
+                Bytestring key to store.
+
+            `size`:
+                Size of the value in bytes.
+
+            `overwrite`:
+                If ``False``, do not overwrite the value for the key if it
+                exists, just return ``None``.
+
+            `append`:
+                If ``True``, append the pair to the end of the database without
+                comparing its order first.
+
+            `db`:
+                Named database to operate on. If unspecified, defaults to the
+                database given to the :py:class:`Transaction` constructor.
+        """
+        if key is None:
+            raise BadValsizeError("Key cannot be None")
+
+        flags = 0
+        if not overwrite:
+            flags |= _lib.MDB_NOOVERWRITE
+        if append:
+            flags |= _lib.MDB_APPEND
+
+        rc = _lib.zlmdb_put_reserve(self._txn, (db or self._db)._dbi,
+                                    key, len(key), size, flags, self._val)
+        self._mutations += 1
+        if rc:
+            if rc == _lib.MDB_KEYEXIST:
+                return None
+            raise _error("mdb_put", rc)
+        return memoryview(_ffi.buffer(self._val.mv_data, size))
+
     def replace(self, key, value, db=None):
         """Use a temporary cursor to invoke :py:meth:`Cursor.replace`.
 
@@ -2013,6 +2213,7 @@ class Cursor:
         self._val = _ffi.new('MDB_val *')
         self._valid = False
         self._to_py = txn._to_py
+        self._batch = None # zlmdb adaptation: MDB_val arrays for getbatch()
         curpp = _ffi.new('MDB_cursor **')
         self._cur = None
         rc = _lib.mdb_cursor_open(self._txn, self._dbi, curpp)
@@ -2503,6 +2704,105 @@ class Cursor:
         else:
             return lst
 
+    # zlmdb adaptation: batched range scans, filling a batch of records per
+    # call in C rather than calling key(), value() and next() per record.
+    def getbatch(self, n, bound=None, reverse=False, values=True):
+        """Return up to `n` records starting with the current record, moving
+        the cursor forward (or backward, if `reverse` is ``True``) past them.
+
+        Returns a list of `(key, value)` tuples, or of keys if `values` is
+        ``False``. The list is shorter than `n` when the end of the range or
+        database was reached, in which case the cursor becomes unpositioned.
+
+            `bound`:
+                If given, stop before the first key greater than or equal to
+                `bound` (forward), or before the first key less than `bound`
+                (reverse).
+        """
+        if self._last_mutation != self.txn._mutations:
+            self._cursor_get(_lib.MDB_GET_CURRENT)
+        if not self._valid or n < 1:
+            return []
+
+        if self._batch is None or len(self._batch[0]) < n:
+            self._batch = (_ffi.new('MDB_val[]', n), _ffi.new('MDB_val[]', n))
+        keys, vals = self._batch
+        count = _ffi.new('size_t *')
+
+        if bound is None:
+            bound = _ffi.NULL
+            bound_len = 0
+        else:
+            bound_len = len(bound)
+
+        with self.txn.env._close_lock:
+            if not self._cur:
+                raise _error("Attempt to operate on closed cursor",
+                              _lib.EINVAL)
+            rc = _lib.zlmdb_cursor_scan(self._cur, self._key, self._val,
+                                        bound, bound_len, reverse, keys,
+                                        vals, n, count)
+        self._last_mutation = self.txn._mutations
+        if rc:
+            self._valid = False
+            self._key.mv_size = 0
+            self._val.mv_size = 0
+            if rc != _lib.MDB_NOTFOUND:
+                raise _error("mdb_cursor_get", rc)
+
+        to_py = self._to_py
+        if values:
+            return [(to_py(keys[i]), to_py(vals[i])) for i in range(count[0])]
+        return [to_py(keys[i]) for i in range(count[0])]
+
+    # zlmdb adaptation: range and prefix counting in C, rather than walking
+    # the cursor from Python.
+    def count_range(self, from_key, to_key=None):
+        """Count records (including duplicates for `dupsort=True` databases)
+        with keys greater than or equal to `from_key` and less than `to_key`
+        (or up to the end of the database, if `to_key` is ``None``). The cursor
+        is left unpositioned.
+        """
+        if to_key is None:
+            to_key = _ffi.NULL
+            to_len = 0
+        else:
+            to_len = len(to_key)
+        count = _ffi.new('size_t *')
+        with self.txn.env._close_lock:
+            if not self._cur:
+                raise _error("Attempt to operate on closed cursor",
+                              _lib.EINVAL)
+            rc = _lib.zlmdb_cursor_count_range(self._cur, from_key,
+                                               len(from_key), to_key, to_len,
+                                               count)
+        self._invalidate_position()
+        if rc:
+            raise _error("mdb_cursor_get", rc)
+        return count[0]
+
+    def count_prefix(self, prefix):
+        """Count records (including duplicates for `dupsort=True` databases)
+        with keys starting with `prefix`. The cursor is left unpositioned.
+        """
+        count = _ffi.new('size_t *')
+        with self.txn.env._close_lock:
+            if not self._cur:
+                raise _error("Attempt to operate on closed cursor",
+                              _lib.EINVAL)
+            rc = _lib.zlmdb_cursor_count_prefix(self._cur, prefix,
+                                                len(prefix), count)
+        self._invalidate_position()
+        if rc:
+            raise _error("mdb_cursor_get", rc)
+        return count[0]
+
+    def _invalidate_position(self):
+        self._valid = False
+        self._key.mv_size = 0
+        self._val.mv_size = 0
+        self._last_mutation = self.txn._mutations
+
     def set_range(self, key):
         """Seek to the first key greater than or equal to `key`, returning
         ``True`` on success, or ``False`` to indicate key was past end of
@@ -2621,7 +2921,9 @@ class Cursor:
         if not overwrite:
             flags |= _lib.MDB_NOOVERWRITE
         if append:
-            if self.txn._db._flags & _lib.MDB_DUPSORT:
+            # zlmdb adaptation: check the flags of the database this cursor is
+            # bound to, rather than of the transaction's default database
+            if self.db._flags & _lib.MDB_DUPSORT:
                 flags |= _lib.MDB_APPENDDUP
             else:
                 flags |= _lib.MDB_APPEND
@@ -2675,7 +2977,9 @@ class Cursor:
         if not overwrite:
             flags |= _lib.MDB_NOOVERWRITE
         if append:
-            if self.txn._db._flags & _lib.MDB_DUPSORT:
+            # zlmdb adaptation: check the flags of the database this cursor is
+            # bound to, rather than of the transaction's default database
+            if self.db._flags & _lib.MDB_DUPSORT:
                 flags |= _lib.MDB_APPENDDUP
             else:
                 flags |= _lib.MDB_APPEND
@@ -25,11 +25,16 @@
 ###############################################################################
 """Persistent mappings."""
 
+import heapq
 import struct
 import sys
+import tempfile
+import threading
 import uuid
 import zlib
-from typing import Optional, List, Callable, Any, Tuple, Dict
+from typing import Optional, List, Callable, Any, Tuple, Dict, Iterable, Iterator
+
+import cbor2
 
 from zlmdb import _types, _errors
 from zlmdb._transaction import Transaction
@@ -41,6 +46,27 @@ except ImportError:
 else:
     HAS_SNAPPY = True
 
+try:
+    import zstandard
+except ImportError:
+    HAS_ZSTD = False
+else:
+    HAS_ZSTD = True
+
+try:
+    import lz4.block
+except ImportError:
+    HAS_LZ4 = False
+else:
+    HAS_LZ4 = True
+
+try:
+    import pyarrow as pa
+except ImportError:
+    HAS_PYARROW = False
+else:
+    HAS_PYARROW = True
+
 if sys.version_info < (3,):
     from UserDict import DictMixin as MutableMapping
 
@@ -56,7 +82,7 @@ class Index(object):
     Holds book-keeping metadata for indexes on tables (pmaps).
     """
 
-    def __init__(self, name, fkey, pmap, nullable=False, unique=True):
+    def __init__(self, name, fkey, pmap, nullable=False, unique=True, projection=None):
         """
 
         :param name: Index name.
@@ -74,12 +100,17 @@ class Index(object):
 
         :param unique: Whether the indexed table column must take unique values.
         :type unique: bool
+
+        :param projection: Optional function that extracts a projection from the indexed
+            table, stored in index records alongside the primary key (covering index).
+        :type projection: callable
         """
         self._name = name
         self._fkey = fkey
         self._pmap = pmap
         self._nullable = nullable
         self._unique = unique
+        self._projection = projection
 
     @property
     def name(self):
@@ -132,6 +163,62 @@ class Index(object):
         """
         return self._unique
 
+    @property
+    def projection(self):
+        """
+        Index projection property.
+
+        :return: Function to extract the projection stored in index records from
+            the indexed table, or ``None`` if this is not a covering index.
+        :rtype: callable
+        """
+        return self._projection
+
+    def pack(self, key, value):
+        """
+        Serialize an index record value, for a record in the indexed table.
+
+        For covering indexes, the index record value is the length (uint32, big endian)
+        of the serialized primary key, the serialized primary key and the CBOR
+        serialized projection of the record. Otherwise, the index record value is just
+        the serialized primary key.
+
+        :param key: Primary key of the record in the indexed table.
+
+        :param value: Record in the indexed table.
+
+        :return: Index record value.
+        :rtype: bytes
+        """
+        _data = self._pmap._serialize_value(key)
+        if self._projection:
+            _data = (
+                struct.pack(">I", len(_data))
+                + _data
+                + cbor2.dumps(self._projection(value))
+            )
+        return _data
+
+    def unpack(self, data):
+        """
+        Deserialize an index record value.
+
+        :param data: Index record value.
+        :type data: bytes
+
+        :return: Primary key of the record in the indexed table and the projection
+            (``None`` if this is not a covering index).
+        :rtype: tuple
+        """
+        if self._projection:
+            data = memoryview(data)
+            _len = struct.unpack(">I", data[:4])[0]
+            key = self._pmap._deserialize_value(bytes(data[4 : 4 + _len]))
+            return key, cbor2.loads(data[4 + _len :])
+        if type(data) is not bytes:
+            data = bytes(data)
+        return self._pmap._deserialize_value(data), None
+
 
 def is_null(value):
     """
@@ -160,6 +247,201 @@ def qual(obj):
     return "{}.{}".format(obj.__class__.__module__, obj.__class__.__name__)
 
 
+# tag of per-slot record counter in database metadata area (see PersistentMap.enable_counter)
+_SLOT_META_COUNTER = 1
+
+
+def _counter_key(slot):
+    """
+    Key of the record counter for a slot, stored in the database metadata area
+    (slot 0) next to the slot record ``b"\\0\\0" + struct.pack(">H", slot)``.
+    """
+    return b"\0\0" + struct.pack(">HB", slot, _SLOT_META_COUNTER)
+
+
+# tag of per-record index key sidecars in database metadata area (see PersistentMap.has_sidecar)
+_SLOT_META_SIDECAR = 2
+
+
+def _sidecar_key(slot, key=b""):
+    """
+    Key of the index key sidecar of a record, stored in the database metadata
+    area (slot 0). Without a (serialized) record key, this is the prefix of all
+    sidecars of the slot.
+    """
+    return b"\0\0" + struct.pack(">HB", slot, _SLOT_META_SIDECAR) + key
+
+
+# tag of index build watermarks in database metadata area (see PersistentMap.start_index_build)
+_SLOT_META_INDEX_BUILD = 3
+
+
+def _index_build_key(slot):
+    """
+    Key of the build watermark of an index (slot) while the index is being built
+    online, stored in the database metadata area (slot 0).
+    """
+    return b"\0\0" + struct.pack(">HB", slot, _SLOT_META_INDEX_BUILD)
+
+
+# tag of zstd compression dictionaries in database metadata area (see PersistentMap.train_zstd_dict)
+_SLOT_META_ZSTD_DICT = 4
+
+
+def _zstd_dict_key(slot, dict_id=None):
+    """
+    Key of a (versioned) zstd compression dictionary of a slot, stored in the
+    database metadata area (slot 0). Without a dictionary ID, this is the prefix
+    of all dictionaries of the slot.
+    """
+    key = b"\0\0" + struct.pack(">HB", slot, _SLOT_META_ZSTD_DICT)
+    if dict_id is not None:
+        key += struct.pack(">I", dict_id)
+    return key
+
+
+def _delete_slot_meta(txn, slot, tags=None):
+    """
+    Delete the per-slot metadata of a slot from the database metadata area (slot 0),
+    that is all keys following the slot record ``b"\\0\\0" + struct.pack(">H", slot)``.
+
+    :param txn: The (native) write transaction in which to run.
+    :param slot: The slot index.
+    :param tags: Delete only metadata with these tags (e.g. ``_SLOT_META_COUNTER``),
+        defaults to all metadata.
+    :return: The number of metadata records deleted.
+    """
+    if tags is None:
+        prefixes = [b"\0\0" + struct.pack(">H", slot)]
+    else:
+        prefixes = [b"\0\0" + struct.pack(">HB", slot, tag) for tag in tags]
+    cnt = 0
+    with txn.cursor() as cursor:
+        for prefix in prefixes:
+            # the slot record itself has the 4 byte key prefix (all metadata)
+            if cursor.set_range(prefix + b"\0" if tags is None else prefix):
+                while bytes(cursor.key()).startswith(prefix):
+                    if not cursor.delete():
+                        break
+                    cnt += 1
+    return cnt
+
+
+def _putmulti_sorted(cursor, items, dupsort=False):
+    """
+    Write records, sorted by key and without duplicate keys, using the given cursor.
+    Records with keys beyond the last key currently in the database are written
+    in append mode.
+
+    :param cursor: The (write) cursor to use.
+    :type cursor: :class:`lmdb.Cursor`
+
+    :param items: List of ``(key, data)`` pairs, strictly ordered by key (or by
+        ``(key, data)`` for ``dupsort`` databases).
+    :type items: list
+
+    :param dupsort: Whether the cursor's database was opened with ``dupsort=True``.
+    :type dupsort: bool
+
+    :return: Number of records written.
+    :rtype: int
+    """
+    if not items:
+        return 0
+
+    # MDB_APPEND requires keys to be greater than the last key of the whole
+    # database, not just of the slot (key prefix) written to
+    i = len(items)
+    if cursor.last():
+        if dupsort:
+            # positioned on the last value of the last key
+            _last = (bytes(cursor.key()), bytes(cursor.value()))
+            while i > 0 and items[i - 1] > _last:
+                i -= 1
+        else:
+            _last_key = bytes(cursor.key())
+            while i > 0 and items[i - 1][0] > _last_key:
+                i -= 1
+    else:
+        i = 0
+
+    added = 0
+    if i > 0:
+        added += cursor.putmulti(items[:i])[1]
+    if i < len(items):
+        added += cursor.putmulti(items[i:], append=True)[1]
+    return added
+
+
+class _ExternalSort(object):
+    """
+    Sort ``(key, data)`` pairs of bytes in bounded memory: pairs are buffered up to
+    a maximum number, and full buffers are sorted and spilled to temporary files as
+    sorted runs, which are merged when iterating.
+    """
+
+    def __init__(self, max_items: int):
+        """
+
+        :param max_items: Maximum number of pairs buffered in memory.
+        """
+        assert type(max_items) == int and max_items > 0
+
+        self._max_items = max_items
+        self._items: List[Tuple[bytes, bytes]] = []
+        self._runs: List[Any] = []
+
+    def add(self, key: bytes, data: bytes):
+        """
+
+        :param key:
+        :param data:
+        """
+        self._items.append((key, data))
+        if len(self._items) >= self._max_items:
+            self._spill()
+
+    def _spill(self):
+        self._items.sort()
+        run = tempfile.TemporaryFile()
+        for key, data in self._items:
+            run.write(struct.pack(">II", len(key), len(data)))
+            run.write(key)
+            run.write(data)
+        run.seek(0)
+        self._runs.append(run)
+        self._items = []
+
+    @staticmethod
+    def _read_run(run):
+        while True:
+            _len = run.read(8)
+            if not _len:
+                break
+            key_len, data_len = struct.unpack(">II", _len)
+            yield run.read(key_len), run.read(data_len)
+
+    def __iter__(self):
+        """
+        Iterate over all pairs added, in sorted order.
+        """
+        self._items.sort()
+        if not self._runs:
+            return iter(self._items)
+        return heapq.merge(
+            self._items, *[_ExternalSort._read_run(run) for run in self._runs]
+        )
+
+    def close(self):
+        """
+        Release buffered pairs and remove any temporary files.
+        """
+        for run in self._runs:
+            run.close()
+        self._runs = []
+        self._items = []
+
+
 class PersistentMap(MutableMapping):
     """
     Abstract base class for persistent maps stored in LMDB.
@@ -167,6 +449,40 @@ class PersistentMap(MutableMapping):
 
     COMPRESS_ZLIB = 1
     COMPRESS_SNAPPY = 2
+    COMPRESS_ZSTD = 3
+    COMPRESS_LZ4 = 4
+
+    # default minimum size (in bytes) of values compressed, for pmaps with tagged values
+    COMPRESS_MIN_SIZE = 64
+
+    # zstd compression level
+    ZSTD_LEVEL = 3
+
+    # size (in bytes) of zstd dictionaries trained in train_zstd_dict()
+    ZSTD_DICT_SIZE = 16384
+
+    # maximum number of values sampled for training zstd dictionaries
+    ZSTD_DICT_SAMPLES = 10000
+
+    # number of primary keys resolved from the table in one go in select_by_index()
+    SELECT_BY_INDEX_BATCH_SIZE = 256
+
+    # number of index records per index sorted in memory in rebuild_index(), before
+    # spilling to temporary files
+    REBUILD_INDEX_SORT_SIZE = 100000
+
+    # number of index records written in one go in rebuild_index()
+    REBUILD_INDEX_BATCH_SIZE = 10000
+
+    # number of table records indexed per transaction in online index builds
+    BUILD_INDEX_CHUNK_SIZE = 10000
+
+    # number of records converted into one Arrow record batch in to_arrow()
+    ARROW_BATCH_SIZE = 65536
+
+    # values serialized to at least this many bytes are written directly into space
+    # reserved in the database page (MDB_RESERVE), see _serialize_value_parts()
+    RESERVE_MIN_SIZE = 4096
 
     # these are filled by table decorate @zlmdb.table
     _zlmdb_oid: Optional[uuid.UUID] = None
@@ -175,6 +491,16 @@ class PersistentMap(MutableMapping):
     _zlmdb_build: Optional[Callable] = None
     _zlmdb_cast: Optional[Callable] = None
     _zlmdb_compress: Optional[int] = None
+    _zlmdb_compress_min_size: Optional[int] = None
+    _zlmdb_counted: bool = False
+    _zlmdb_dupsort: bool = False
+    _zlmdb_dupfixed: bool = False
+    _zlmdb_sidecar: bool = False
+
+    # whether _deserialize_key() and _deserialize_value() accept memoryviews into the
+    # LMDB memory map, rather than bytes, in zero-copy mode (see Database.begin())
+    _ZEROCOPY_KEYS = False
+    _ZEROCOPY_VALUES = False
 
     def __init__(self, slot: Optional[int], compress: Optional[int] = None):
         """
@@ -186,31 +512,71 @@ class PersistentMap(MutableMapping):
         assert compress is None or compress in [
             PersistentMap.COMPRESS_ZLIB,
             PersistentMap.COMPRESS_SNAPPY,
+            PersistentMap.COMPRESS_ZSTD,
+            PersistentMap.COMPRESS_LZ4,
         ]
 
         self._slot = slot
 
+        # with tagged values, every value is stored in an envelope starting with the codec
+        # (0 for none) it was compressed with, and only values of at least this size are
+        # compressed. pmaps with untagged values store all values compressed (if at all)
+        self._compress_mode = compress
+        self._compress_min_size = self._zlmdb_compress_min_size
+        if self._compress_min_size is None and compress == PersistentMap.COMPRESS_LZ4:
+            self._compress_min_size = self.COMPRESS_MIN_SIZE
+        self._compressed = bool(compress) or self._compress_min_size is not None
+
+        # zstd dictionaries of this pmap by dictionary ID, the ID of the dictionary
+        # used for compressing new values (0 for none), and per-thread zstd contexts
+        self._zstd_dicts: Dict[int, Any] = {}
+        self._zstd_dict_id = 0
+        self._zstd = threading.local()
+
+        # LMDB sub-database (named DBI) the records of this pmap are stored in (see
+        # Database storage mode "dbi"), or None when stored in the main database
+        self._dbi = None
+
+        # whether the sub-database of this pmap allows multiple (sorted) values per key
+        self._dupsort = False
+
+        # whether all values of a key in the (dupsort) sub-database have the same size
+        self._dupfixed = False
+
+        # prefix of (serialized) keys of this pmap: the slot index in the main
+        # database, or empty when stored in a sub-database of its own
+        self._prefix = struct.pack(">H", slot) if slot is not None else b""
+
         if compress:
             if compress not in [
                 PersistentMap.COMPRESS_ZLIB,
                 PersistentMap.COMPRESS_SNAPPY,
+                PersistentMap.COMPRESS_ZSTD,
+                PersistentMap.COMPRESS_LZ4,
             ]:
                 raise Exception("invalid compression mode")
             if compress == PersistentMap.COMPRESS_SNAPPY and not HAS_SNAPPY:
                 raise Exception(
                     "snappy compression requested, but snappy is not installed"
                 )
-            if compress == PersistentMap.COMPRESS_ZLIB:
-                self._compress = zlib.compress
-                self._decompress = zlib.decompress
-            elif compress == PersistentMap.COMPRESS_SNAPPY:
-                self._compress = snappy.compress
-                self._decompress = snappy.uncompress
-            else:
-                raise Exception("logic error")
+            if compress == PersistentMap.COMPRESS_ZSTD and not HAS_ZSTD:
+                raise Exception(
+                    "zstd compression requested, but zstandard is not installed"
+                )
+            if compress == PersistentMap.COMPRESS_LZ4 and not HAS_LZ4:
+                raise Exception("lz4 compression requested, but lz4 is not installed")
+
+        if self._compress_min_size is not None:
+            self._compress = self._compress_tagged
+            self._decompress = self._decompress_tagged
+        elif compress == PersistentMap.COMPRESS_ZSTD:
+            self._compress, self._decompress = self._codec(compress)
+        elif compress:
+            self._compress, _decompress = self._codec(compress)
+            self._decompress = lambda data, txn=None: _decompress(data)  # type: ignore
         else:
             self._compress = lambda data: data  # type: ignore
-            self._decompress = lambda data: data  # type: ignore
+            self._decompress = lambda data, txn=None: data  # type: ignore
 
         # if this pmap is an index, the table-pmap the index-pmap is attached to
         self._index_attached_to = None
@@ -218,6 +584,12 @@ class PersistentMap(MutableMapping):
         # if this pmap is NOT an index, any indexes attached to this (table-)pmap
         self._indexes: Dict[str, Index] = {}
 
+        # whether a record counter is maintained for this pmap (see enable_counter())
+        self._counted = False
+
+        # whether index keys of records are stored in sidecar records (see has_sidecar())
+        self._sidecar = False
+
     def indexes(self) -> List[str]:
         """
 
@@ -233,6 +605,448 @@ class PersistentMap(MutableMapping):
         """
         return self._index_attached_to is not None
 
+    def is_dbi(self) -> bool:
+        """
+        Flag indicating whether this pmap is stored in a LMDB sub-database (named DBI)
+        of its own, rather than under its slot key prefix in the main database.
+
+        :return:
+        """
+        return self._dbi is not None
+
+    def is_dupsort(self) -> bool:
+        """
+        Flag indicating whether this pmap is stored in a LMDB sub-database allowing
+        multiple (sorted) values per key (``MDB_DUPSORT``).
+
+        :return:
+        """
+        return self._dupsort
+
+    def _bind_dbi(self, dbi, dupsort: bool = False, dupfixed: bool = False):
+        """
+        Store the records of this pmap in the given LMDB sub-database (named DBI).
+
+        :param dbi: The LMDB database handle as returned from ``Environment.open_db``.
+        :param dupsort: Whether the sub-database was opened with ``dupsort=True``.
+        :param dupfixed: Whether the sub-database was opened with ``dupfixed=True``.
+        """
+        self._dbi = dbi
+        self._dupsort = dupsort
+        self._dupfixed = dupfixed
+        self._prefix = b""
+
+    def _slot_end(self) -> Optional[bytes]:
+        """
+        Upper bound (exclusive) of keys of this pmap, or ``None`` when stored
+        in a sub-database of its own.
+        """
+        if self._dbi is not None:
+            return None
+        return struct.pack(">H", self._slot + 1)
+
+    def is_counted(self) -> bool:
+        """
+        Flag indicating whether a record counter is maintained for this pmap.
+
+        :return:
+        """
+        return self._counted
+
+    def enable_counter(self, txn: Transaction) -> int:
+        """
+        Enable maintaining a record counter for this pmap. The counter is stored
+        in the database metadata area (next to the slot record), and kept up to
+        date transactionally on writes, so that :meth:`count` without a prefix
+        becomes a single lookup.
+
+        If no counter is stored yet, it is initialized by counting the records
+        currently in the slot.
+
+        .. note::
+
+            All writers to this slot must enable the counter, since writes from a
+            pmap without counter enabled will not update the stored counter.
+
+        :param txn: The (write) transaction in which to run.
+
+        :returns: The current number of records.
+        """
+        assert txn._txn
+        assert self._slot
+
+        _data = txn._txn.get(_counter_key(self._slot))
+        if _data is None:
+            cnt = self._count_scan(txn)
+            txn._txn.put(_counter_key(self._slot), struct.pack(">Q", cnt))
+        else:
+            cnt = struct.unpack(">Q", _data)[0]
+
+        self._counted = True
+        return cnt
+
+    def disable_counter(self, txn: Transaction):
+        """
+        Disable maintaining a record counter for this pmap, and delete any stored counter.
+
+        :param txn: The (write) transaction in which to run.
+        """
+        assert txn._txn
+        assert self._slot
+
+        txn._txn.delete(_counter_key(self._slot))
+        self._counted = False
+
+    def _count_add(self, txn: Transaction, delta: int):
+        if delta:
+            _key = _counter_key(self._slot)
+            _data = txn._txn.get(_key)
+            assert _data is not None, "record counter of slot {} missing".format(
+                self._slot
+            )
+            cnt = struct.unpack(">Q", _data)[0] + delta
+            assert cnt >= 0, (
+                "record counter of slot {} out of sync (written from pmaps without "
+                "counter enabled?)".format(self._slot)
+            )
+            txn._txn.put(_key, struct.pack(">Q", cnt))
+
+    def _codec(self, codec):
+        """
+        Get the compress and decompress functions of a codec.
+        """
+        if codec == PersistentMap.COMPRESS_ZLIB:
+            return zlib.compress, zlib.decompress
+        elif codec == PersistentMap.COMPRESS_SNAPPY and HAS_SNAPPY:
+            return snappy.compress, snappy.uncompress
+        elif codec == PersistentMap.COMPRESS_ZSTD and HAS_ZSTD:
+            return self._zstd_compress, self._zstd_decompress
+        elif codec == PersistentMap.COMPRESS_LZ4 and HAS_LZ4:
+            return self._lz4_compress, self._lz4_decompress
+        else:
+            raise Exception("codec {} not supported or not installed".format(codec))
+
+    def _compress_tagged(self, data):
+        if self._compress_mode and len(data) >= self._compress_min_size:
+            _compress, _ = self._codec(self._compress_mode)
+            _data = struct.pack(">B", self._compress_mode) + _compress(data)
+
+            # only keep compressed values that are actually smaller
+            if len(_data) <= len(data):
+                return _data
+        return b"\0" + data
+
+    def _decompress_tagged(self, data, txn=None):
+        data = memoryview(data)
+        if data[0] == 0:
+            return data[1:]
+        if data[0] == PersistentMap.COMPRESS_ZSTD:
+            return self._zstd_decompress(data[1:], txn)
+        _, _decompress = self._codec(data[0])
+        return _decompress(data[1:])
+
+    def _lz4_compress(self, data):
+        # the uncompressed size is stored in front of the LZ4 block
+        return struct.pack(">I", len(data)) + lz4.block.compress(data, store_size=False)
+
+    def _lz4_decompress(self, data):
+        size = struct.unpack(">I", data[:4])[0]
+        return lz4.block.decompress(data[4:], uncompressed_size=size)
+
+    def _zstd_compress(self, data):
+        _cctx = getattr(self._zstd, "cctx", None)
+        if _cctx is None or _cctx[0] != self._zstd_dict_id:
+            if self._zstd_dict_id:
+                cctx = zstandard.ZstdCompressor(
+                    level=self.ZSTD_LEVEL,
+                    dict_data=self._zstd_dicts[self._zstd_dict_id],
+                    write_dict_id=False,
+                )
+            else:
+                cctx = zstandard.ZstdCompressor(level=self.ZSTD_LEVEL)
+            _cctx = self._zstd.cctx = (self._zstd_dict_id, cctx)
+
+        # values carry the ID of the dictionary they were compressed with
+        return struct.pack(">I", _cctx[0]) + _cctx[1].compress(data)
+
+    def _zstd_decompress(self, data, txn=None):
+        data = memoryview(data)
+        dict_id = struct.unpack(">I", data[:4])[0]
+
+        dctxs = getattr(self._zstd, "dctxs", None)
+        if dctxs is None:
+            dctxs = self._zstd.dctxs = {}
+        dctx = dctxs.get(dict_id, None)
+        if dctx is None:
+            if dict_id:
+                if dict_id not in self._zstd_dicts:
+                    self._load_zstd_dict(txn, dict_id)
+                dctx = zstandard.ZstdDecompressor(dict_data=self._zstd_dicts[dict_id])
+            else:
+                dctx = zstandard.ZstdDecompressor()
+            dctxs[dict_id] = dctx
+
+        return dctx.decompress(data[4:])
+
+    def _load_zstd_dict(self, txn, dict_id):
+        # the dictionary might have been trained (from another process) after the
+        # dictionaries of this pmap were loaded
+        _data = txn._txn.get(_zstd_dict_key(self._slot, dict_id)) if txn else None
+        if _data is None:
+            raise Exception(
+                "zstd dictionary {} of slot {} not found".format(dict_id, self._slot)
+            )
+        self._zstd_dicts[dict_id] = zstandard.ZstdCompressionDict(bytes(_data))
+
+    def load_zstd_dicts(self, txn: Transaction) -> int:
+        """
+        Load the zstd compression dictionaries of this (table-)pmap stored in the
+        database metadata area, and use the latest for compressing new values. This
+        is done when the table is attached (see :meth:`zlmdb.Database.attach_table`).
+
+        :param txn: The transaction in which to run.
+
+        :returns: The ID of the dictionary used for compressing new values, or ``0``
+            if no dictionary has been trained.
+        """
+        assert txn._txn
+        assert self._slot
+
+        dicts = {}
+        _prefix = _zstd_dict_key(self._slot)
+        with txn._txn.cursor() as cursor:
+            found = cursor.set_range(_prefix)
+            while found:
+                _key = bytes(cursor.key())
+                if not _key.startswith(_prefix):
+                    break
+                dict_id = struct.unpack(">I", _key[len(_prefix) :])[0]
+                dicts[dict_id] = zstandard.ZstdCompressionDict(bytes(cursor.value()))
+                found = cursor.next()
+
+        self._zstd_dicts = dicts
+        self._zstd_dict_id = max(dicts) if dicts else 0
+        return self._zstd_dict_id
+
+    def train_zstd_dict(
+        self,
+        txn: Transaction,
+        dict_size: Optional[int] = None,
+        samples: Optional[int] = None,
+    ) -> int:
+        """
+        Train a zstd compression dictionary from a sample of the values stored in
+        this (table-)pmap, store it as a new version in the database metadata area,
+        and use it for compressing new values. Values stored before keep referring
+        to the dictionary they were compressed with, and are recompressed with the
+        new dictionary when rewritten.
+
+        .. note::
+
+            The new dictionary is used by this pmap right away. Should the
+            transaction be aborted, reload the stored dictionaries using
+            :meth:`load_zstd_dicts`.
+
+        :param txn: The (write) transaction in which to run.
+
+        :param dict_size: Size of the dictionary in bytes, defaults to ``ZSTD_DICT_SIZE``.
+
+        :param samples: Maximum number of values sampled (evenly across the table),
+            defaults to ``ZSTD_DICT_SAMPLES``.
+
+        :returns: The ID of the new dictionary.
+        """
+        assert txn._txn
+        assert self._slot
+
+        if self._compress_mode != PersistentMap.COMPRESS_ZSTD:
+            raise Exception(
+                "pmap in slot {} does not use zstd compression".format(self._slot)
+            )
+
+        dict_size = dict_size or self.ZSTD_DICT_SIZE
+        samples = samples or self.ZSTD_DICT_SAMPLES
+
+        step = max(1, self.count(txn) // samples)
+        key_to = self._slot_end()
+        _samples = []
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            found = cursor.set_range(self._prefix)
+            i = 0
+            while found and len(_samples) < samples:
+                if key_to is not None and bytes(cursor.key()) >= key_to:
+                    break
+                if i % step == 0:
+                    _samples.append(bytes(self._decompress(cursor.value(), txn)))
+                i += 1
+                found = cursor.next()
+
+        _dict = zstandard.train_dictionary(dict_size, _samples)
+
+        # dictionaries might have been added since loading them
+        dict_id = self.load_zstd_dicts(txn) + 1
+        txn._txn.put(_zstd_dict_key(self._slot, dict_id), _dict.as_bytes())
+
+        self._zstd_dicts[dict_id] = _dict
+        self._zstd_dict_id = dict_id
+        return dict_id
+
+    def has_sidecar(self) -> bool:
+        """
+        Flag indicating whether the index records derived from each record of this
+        (table-)pmap are stored in a compact sidecar record in the database metadata
+        area. Index maintenance on updates and deletes then diffs index records
+        against the sidecar, rather than reading and deserializing the previous record.
+
+        .. note::
+
+            All writers to this slot must have the sidecar enabled and the same indexes
+            attached, since writes from other pmaps will not update stored sidecars.
+
+        :return:
+        """
+        return self._sidecar
+
+    def _index_records(
+        self, key: Any, value: Any, check: bool = True
+    ) -> Dict[str, Optional[Tuple[bytes, bytes]]]:
+        """
+        Compute the index records for a record of this (table-)pmap.
+
+        :param key: Primary key of the record.
+        :param value: The record.
+        :param check: Check NOT NULL constraints of indexes.
+
+        :return: Map of index name to serialized index key (without key prefix) and
+            index record value, or ``None`` when the indexed value is NULL.
+        """
+        records: Dict[str, Optional[Tuple[bytes, bytes]]] = {}
+        for index in self._indexes.values():
+            _fkey = index.fkey(value)
+            if is_null(_fkey):
+                if check and not index.nullable:
+                    raise _errors.NullValueConstraint(
+                        'cannot insert NULL value into non-nullable index "{}::{}"'.format(
+                            qual(self), index.name
+                        )
+                    )
+                records[index.name] = None
+            else:
+                records[index.name] = (
+                    index.pmap._serialize_key(_fkey),
+                    index.pack(key, value),
+                )
+        return records
+
+    def _decode_sidecar(
+        self, data
+    ) -> Optional[Dict[str, Optional[Tuple[bytes, bytes]]]]:
+        """
+        Decode the index records stored in a sidecar, or return ``None`` if the
+        sidecar does not cover all indexes currently attached.
+        """
+        _records = cbor2.loads(data)
+        records: Dict[str, Optional[Tuple[bytes, bytes]]] = {}
+        for name in self._indexes:
+            if name not in _records:
+                return None
+            _record = _records[name]
+            records[name] = tuple(_record) if _record is not None else None  # type: ignore
+        return records
+
+    def _old_index_records(self, txn: Transaction, key: Any, _key: bytes):
+        """
+        Get the index records of the record currently stored under a key.
+
+        :return: Tuple ``(records, exists, stored)`` with the index records (or
+            ``None``), whether a record exists, and whether the index records were
+            read from the sidecar.
+        """
+        if self._sidecar:
+            _data = txn._txn.get(_sidecar_key(self._slot, _key[len(self._prefix) :]))
+            if _data is not None:
+                records = self._decode_sidecar(_data)
+                if records is not None:
+                    return records, True, True
+
+        _data = txn.get(_key, db=self._dbi)
+        if not _data:
+            return None, _data is not None, False
+        return (
+            self._index_records(key, self._decode_value(_data, txn), check=False),
+            True,
+            False,
+        )
+
+    def _old_index_records_many(self, txn: Transaction, records: List[Tuple]):
+        """
+        Batched variant of :meth:`_old_index_records` for records (sorted by key)
+        as prepared in :meth:`put_many`.
+        """
+        result: List[Any] = [None] * len(records)
+        _missing = list(range(len(records)))
+
+        if self._sidecar:
+            _len = len(self._prefix)
+            _keys = [_sidecar_key(self._slot, _record[0][_len:]) for _record in records]
+            with txn._txn.cursor() as cursor:
+                _found = {bytes(_key): _data for _key, _data in cursor.getmulti(_keys)}
+            _missing = []
+            for i, _key in enumerate(_keys):
+                _data = _found.get(_key, None)
+                _idx_records = (
+                    self._decode_sidecar(_data) if _data is not None else None
+                )
+                if _idx_records is not None:
+                    result[i] = (_idx_records, True, True)
+                else:
+                    _missing.append(i)
+
+        if _missing:
+            with txn._txn.cursor(db=self._dbi) as cursor:
+                _found = {
+                    bytes(_key): _data
+                    for _key, _data in cursor.getmulti(
+                        [records[i][0] for i in _missing]
+                    )
+                }
+            for i in _missing:
+                _data = _found.get(records[i][0], None)
+                if not _data:
+                    result[i] = (None, _data is not None, False)
+                else:
+                    result[i] = (
+                        self._index_records(
+                            records[i][2], self._decode_value(_data, txn), check=False
+                        ),
+                        True,
+                        False,
+                    )
+        return result
+
+    def _write_index_records(self, txn: Transaction, old, new):
+        """
+        Update index records, deleting and inserting only those that changed.
+
+        :param old: Index records of the previous record (or ``None``).
+        :param new: Index records of the new record.
+        """
+        for name, index in self._indexes.items():
+            _old = old.get(name, None) if old else None
+            _new = new[name]
+            if _old == _new:
+                continue
+            _idx_pmap = index.pmap
+            # dupsort (non-unique) indexes also need the old record deleted when only
+            # the index record value changed (projection of covering indexes)
+            if _old is not None and (
+                _new is None or _old[0] != _new[0] or _idx_pmap._dupsort
+            ):
+                # the value is only matched for dupsort (non-unique) indexes
+                txn.delete(_idx_pmap._prefix + _old[0], _old[1], db=_idx_pmap._dbi)
+            if _new is not None:
+                txn.put(_idx_pmap._prefix + _new[0], _new[1], db=_idx_pmap._dbi)
+
     def attach_index(
         self,
         name: str,
@@ -240,6 +1054,7 @@ class PersistentMap(MutableMapping):
         fkey: Callable,
         nullable: bool = False,
         unique: bool = True,
+        projection: Optional[Callable] = None,
     ):
         """
 
@@ -247,7 +1062,15 @@ class PersistentMap(MutableMapping):
         :param pmap:
         :param fkey:
         :param nullable:
-        :param unique:
+        :param unique: Whether indexed values must be unique. Non-unique indexes stored
+            in a sub-database opened with ``dupsort=True`` map each indexed value to
+            all primary keys of records having that value.
+        :param projection: Make this a covering index: function that extracts a projection
+            from records (any CBOR serializable value), which is stored in index records
+            alongside the primary key, and can be selected straight from the index
+            using ``select_by_index(..., covering=True)``. Index records of covering
+            indexes cannot be read via the index pmap directly, and covering indexes
+            cannot be stored in a sub-database opened with ``dupfixed=True``.
         """
         if self._index_attached_to:
             raise Exception(
@@ -261,8 +1084,17 @@ class PersistentMap(MutableMapping):
             )
         if name in self._indexes:
             raise Exception('index with name "{}" already exists'.format(name))
+        if unique and pmap._dupsort:
+            raise Exception(
+                'unique index "{}" cannot be stored in a dupsort pmap'.format(name)
+            )
+        if projection and pmap._dupfixed:
+            raise Exception(
+                'covering index "{}" cannot be stored in a dupfixed pmap (index record '
+                "values with projections vary in size)".format(name)
+            )
 
-        self._indexes[name] = Index(name, fkey, pmap, nullable, unique)
+        self._indexes[name] = Index(name, fkey, pmap, nullable, unique, projection)
         pmap._index_attached_to = self  # type: ignore
 
     def detach_index(self, name: str):
@@ -273,18 +1105,148 @@ class PersistentMap(MutableMapping):
         if name in self._indexes:
             del self._indexes[name]
 
+    def _decode_key(self, data):
+        """
+        Deserialize a (prefixed) key read from the database. In zero-copy mode, the
+        key is a buffer into the LMDB memory map, which is sliced without copying.
+        """
+        if type(data) is bytes:
+            return self._deserialize_key(data[len(self._prefix) :])
+        data = memoryview(data).toreadonly()[len(self._prefix) :]
+        if not self._ZEROCOPY_KEYS:
+            data = bytes(data)
+        return self._deserialize_key(data)
+
+    def _decode_value(self, data, txn=None):
+        """
+        Decompress and deserialize a value read from the database. In zero-copy mode,
+        the value is a buffer into the LMDB memory map, which is handed to value types
+        that support it (``_ZEROCOPY_VALUES``) as a read-only memoryview (the memory map
+        must not be written to), and copied otherwise.
+        """
+        if self._decompress:
+            data = self._decompress(data, txn)
+        if type(data) is not bytes:
+            data = (
+                memoryview(data).toreadonly() if self._ZEROCOPY_VALUES else bytes(data)
+            )
+        return self._deserialize_value(data)
+
+    def _decode_values(self, data, txn=None):
+        """
+        Decompress and deserialize a batch of values read from the database.
+        """
+        if self._decompress:
+            data = [self._decompress(_data, txn) for _data in data]
+        if self._ZEROCOPY_VALUES:
+            data = [
+                _data if type(_data) is bytes else memoryview(_data).toreadonly()
+                for _data in data
+            ]
+        else:
+            data = [bytes(_data) for _data in data]
+        return self._deserialize_values(data)
+
+    def _decode_row(self, data, txn=None):
+        """
+        Decompress and deserialize a value read from the database into a row for
+        columnar export (see :meth:`to_arrow`).
+        """
+        if self._decompress:
+            data = self._decompress(data, txn)
+        if type(data) is not bytes:
+            data = (
+                memoryview(data).toreadonly() if self._ZEROCOPY_VALUES else bytes(data)
+            )
+        return self._deserialize_row(data)
+
+    def _deserialize_row(self, data):
+        """
+        Deserialize a value into a row for columnar export: a ``dict``, or an object
+        with the columns as attributes. Value types with a generic representation
+        (e.g. CBOR maps) override this to skip unmarshalling into objects.
+        """
+        return self._deserialize_value(data)
+
     def _serialize_key(self, key):
         raise Exception("must be implemented in derived class")
 
     def _deserialize_key(self, data):
         raise Exception("must be implemented in derived class")
 
+    def _serialize_keys(self, keys):
+        """
+        Serialize a batch of keys (for bulk writes and lookups). Key types with a
+        vectorized encoding override this.
+
+        :param keys: List of keys.
+        :return: List of serialized keys.
+        """
+        return [self._serialize_key(key) for key in keys]
+
+    def _deserialize_keys(self, data):
+        """
+        Deserialize a batch of keys read from the database (for columnar reads).
+        Fixed-size key types override this to return keys in a NumPy array.
+
+        :param data: List of serialized keys.
+        :return: List (or array) of keys.
+        """
+        return [self._deserialize_key(key) for key in data]
+
+    def _serialize_values(self, values):
+        """
+        Serialize a batch of values (for bulk writes). Value types with a vectorized
+        encoding override this.
+
+        :param values: List of values.
+        :return: List of serialized values.
+        """
+        return [self._serialize_value(value) for value in values]
+
+    def _deserialize_values(self, data):
+        """
+        Deserialize a batch of values read from the database (for bulk lookups).
+        Value types with a vectorized encoding override this.
+
+        :param data: List of serialized values.
+        :return: List of values.
+        """
+        return [self._deserialize_value(_data) for _data in data]
+
+    def _serialize_key_prefix(self, prefix):
+        """
+        Serialize a key prefix (for prefix counts). Key types with a compiled
+        :class:`zlmdb.KeyCodec` override this to allow partial composite keys.
+
+        :param prefix: Key prefix.
+        :return: Serialized key prefix.
+        """
+        return self._serialize_key(prefix)
+
     def _serialize_value(self, value):
         raise Exception("must be implemented in derived class")
 
     def _deserialize_value(self, data):
         raise Exception("must be implemented in derived class")
 
+    def _serialize_value_view(self, value):
+        """
+        Serialize a value, possibly into a buffer owned by the pmap (rather than a new
+        bytestring), which is only valid until the next value is serialized in the same
+        thread. Value types reusing serialization buffers override this.
+        """
+        return self._serialize_value(value)
+
+    def _serialize_value_parts(self, value) -> List[Any]:
+        """
+        Serialize a value into a list of buffers, which concatenated make up the
+        serialized value. Value types that produce large values in parts (e.g.
+        out-of-band buffers) override this, so that the parts are copied straight
+        into the database page, rather than being joined first.
+        """
+        return [self._serialize_value_view(value)]
+
     def __contains__(self, txn_key):
         """
 
@@ -295,8 +1257,8 @@ class PersistentMap(MutableMapping):
         txn, key = txn_key
         assert isinstance(txn, Transaction)
 
-        _key = struct.pack(">H", self._slot) + self._serialize_key(key)
-        _data = txn.get(_key)
+        _key = self._prefix + self._serialize_key(key)
+        _data = txn.get(_key, db=self._dbi)
 
         return _data is not None
 
@@ -310,16 +1272,57 @@ class PersistentMap(MutableMapping):
         txn, key = txn_key
         assert isinstance(txn, Transaction)
 
-        _key = struct.pack(">H", self._slot) + self._serialize_key(key)
-        _data = txn.get(_key)
+        _key = self._prefix + self._serialize_key(key)
+        _data = txn.get(_key, db=self._dbi)
 
         if _data:
-            if self._decompress:
-                _data = self._decompress(_data)
-            return self._deserialize_value(_data)
+            return self._decode_value(_data, txn)
         else:
             return None
 
+    def get_many(self, txn: Transaction, keys: Iterable[Any]) -> List[Any]:
+        """
+        Get the values for multiple keys (batched point lookups).
+
+        The serialized keys are sorted and looked up walking a single cursor,
+        which keeps B-tree traversal local. Results are returned in the order
+        of the keys given.
+
+        :param txn: The transaction in which to run.
+
+        :param keys: The keys of the records to get.
+
+        :returns: List of values (or ``None`` for keys not found), in the order
+            of ``keys``.
+        """
+        assert txn._txn
+
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            return self._getmulti(txn, cursor, list(keys))
+
+    def contains_many(self, txn: Transaction, keys: Iterable[Any]) -> List[bool]:
+        """
+        Check the existence of multiple keys (batched point lookups).
+
+        :param txn: The transaction in which to run.
+
+        :param keys: The keys of the records to check.
+
+        :returns: List of flags, in the order of ``keys``.
+        """
+        assert txn._txn
+
+        _prefix = self._prefix
+        _keys = [_prefix + _key for _key in self._serialize_keys(list(keys))]
+
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            _found = set(
+                bytes(_key)
+                for _key in cursor.getmulti(sorted(set(_keys)), values=False)
+            )
+
+        return [_key in _found for _key in _keys]
+
     def __setitem__(self, txn_key, value):
         """
 
@@ -331,54 +1334,184 @@ class PersistentMap(MutableMapping):
         txn, key = txn_key
         assert isinstance(txn, Transaction)
 
-        _key = struct.pack(">H", self._slot) + self._serialize_key(key)
-        _data = self._serialize_value(value)
+        _key = self._prefix + self._serialize_key(key)
+        _parts = self._serialize_value_parts(value)
+        _size = sum(len(_part) for _part in _parts)
 
-        if self._compress:
+        # large values are serialized directly into the database page
+        _reserve = (
+            _size >= self.RESERVE_MIN_SIZE
+            and not self._compressed
+            and not self._dupsort
+        )
+        if not _reserve:
+            _data = _parts[0] if len(_parts) == 1 else b"".join(_parts)
             _data = self._compress(_data)
 
-        # if there are indexes defined, get existing object (if any),
-        # so that we can properly maintain the indexes, should indexed
-        # columns be set to NULL, in which case we need to delete the
-        # respective index record
-        _old_value = None
+        # if there are indexes defined, get the index records of the existing object
+        # (if any), so that we can properly maintain the indexes, should indexed
+        # columns be changed or set to NULL, in which case we need to delete the
+        # respective index record. with sidecars, the existing object is not read.
+        _exists = None
         if self._indexes:
-            _old_data = txn.get(_key)
-            if _old_data:
-                if self._decompress:
-                    _old_data = self._decompress(_old_data)
-                _old_value = self._deserialize_value(_old_data)
+            _idx_new = self._index_records(key, value)
+            _idx_old, _exists, _stored = self._old_index_records(txn, key, _key)
+
+        # maintain record counter, if enabled
+        if self._counted:
+            if _exists is None:
+                _exists = txn.get(_key, db=self._dbi) is not None
+            if not _exists:
+                self._count_add(txn, 1)
 
         # insert data record
-        txn.put(_key, _data)
+        if _reserve:
+            _buf = txn.reserve(_key, _size, db=self._dbi)
+            i = 0
+            for _part in _parts:
+                _buf[i : i + len(_part)] = _part
+                i += len(_part)
+        else:
+            txn.put(_key, _data, db=self._dbi)
 
         # insert records into indexes
-        for index in self._indexes.values():
-            # extract indexed column value, which will become the index record key
-            _fkey = index.fkey(value)
+        if self._indexes:
+            self._write_index_records(txn, _idx_old, _idx_new)
+            if self._sidecar and not (_stored and _idx_old == _idx_new):
+                txn._txn.put(
+                    _sidecar_key(self._slot, _key[len(self._prefix) :]),
+                    cbor2.dumps(_idx_new),
+                )
+        elif self._sidecar:
+            # sidecars are only maintained while indexes are attached
+            txn._txn.delete(_sidecar_key(self._slot, _key[len(self._prefix) :]))
 
-            if _old_value:
-                _fkey_old = index.fkey(_old_value)
+    def put_many(
+        self,
+        txn: Transaction,
+        items: Iterable[Tuple[Any, Any]],
+        presorted: bool = False,
+    ) -> int:
+        """
+        Insert or update multiple records (bulk insert), maintaining all indexes
+        attached to this table.
 
-                if not is_null(_fkey_old) and _fkey_old != _fkey:
-                    _idx_key = struct.pack(
-                        ">H", index.pmap._slot
-                    ) + index.pmap._serialize_key(_fkey_old)
-                    txn.delete(_idx_key)
+        Records are serialized and compressed up front, sorted by their serialized
+        key and written walking a single cursor. Records with keys beyond the current
+        last key in the database are written in append mode (``MDB_APPEND``), which
+        avoids comparing keys and yields fully packed B-tree pages. Index records
+        receive the same sorted bulk treatment.
 
-            if is_null(_fkey):
-                if not index.nullable:
-                    raise _errors.NullValueConstraint(
-                        'cannot insert NULL value into non-nullable index "{}::{}"'.format(
-                            qual(self), index.name
+        :param txn: The transaction in which to run.
+
+        :param items: Iterable of ``(key, value)`` pairs to store. When a key occurs
+            more than once, the last value wins.
+
+        :param presorted: Set to ``True`` if the caller guarantees the items are
+            already ordered by serialized key, with no duplicate keys.
+
+        :returns: The number of records written (not including index records).
+        """
+        assert txn._txn
+        assert type(presorted) == bool
+
+        _prefix = self._prefix
+
+        # keys and values are serialized in batches (vectorized for some types)
+        items = list(items)
+        keys = [key for key, _ in items]
+        values = [value for _, value in items]
+        _records: List[Tuple[bytes, bytes, Any, Any]] = []
+        for _key, _data, key, value in zip(
+            self._serialize_keys(keys), self._serialize_values(values), keys, values
+        ):
+            if self._compress:
+                _data = self._compress(_data)
+            _records.append((_prefix + _key, _data, key, value))
+
+        if not presorted:
+            _records = sorted(
+                {_record[0]: _record for _record in _records}.values(),
+                key=lambda _record: _record[0],
+            )
+
+        # collect index record deletes and puts, checking constraints before writing anything
+        _idx_dels: Dict[str, List[Tuple[bytes, bytes]]] = {
+            name: [] for name in self._indexes
+        }
+        _idx_puts: Dict[str, Dict[Any, Tuple[bytes, bytes]]] = {
+            name: {} for name in self._indexes
+        }
+        _sidecars: List[Tuple[bytes, bytes]] = []
+        _exists = None
+        if self._indexes:
+            _olds = self._old_index_records_many(txn, _records)
+            for (_key, _, key, value), (_idx_old, _, _stored) in zip(_records, _olds):
+                _idx_new = self._index_records(key, value)
+                for name, index in self._indexes.items():
+                    _old = _idx_old.get(name, None) if _idx_old else None
+                    _new = _idx_new[name]
+                    if _old == _new:
+                        continue
+                    _idx_prefix = index.pmap._prefix
+                    if _old is not None and (
+                        _new is None or _old[0] != _new[0] or index.pmap._dupsort
+                    ):
+                        _idx_dels[name].append((_idx_prefix + _old[0], _old[1]))
+                    if _new is not None:
+                        _idx_key = _idx_prefix + _new[0]
+                        # dupsort (non-unique) indexes keep all primary keys per index key
+                        if index.pmap._dupsort:
+                            _idx_puts[name][(_idx_key, _new[1])] = (_idx_key, _new[1])
+                        else:
+                            _idx_puts[name][_idx_key] = (_idx_key, _new[1])
+                if self._sidecar and not (_stored and _idx_old == _idx_new):
+                    _sidecars.append(
+                        (
+                            _sidecar_key(self._slot, _key[len(_prefix) :]),
+                            cbor2.dumps(_idx_new),
                         )
                     )
-            else:
-                _key = struct.pack(">H", index.pmap._slot) + index.pmap._serialize_key(
-                    _fkey
+            _exists = [_old[1] for _old in _olds]
+        elif self._sidecar:
+            # sidecars are only maintained while indexes are attached
+            for _record in _records:
+                txn._txn.delete(_sidecar_key(self._slot, _record[0][len(_prefix) :]))
+
+        # maintain record counter, if enabled
+        if self._counted:
+            if _exists is None:
+                _exists = self.contains_many(txn, [_record[2] for _record in _records])
+            self._count_add(txn, _exists.count(False))
+
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            added = _putmulti_sorted(
+                cursor, [(_record[0], _record[1]) for _record in _records]
+            )
+
+        if _sidecars:
+            with txn._txn.cursor() as cursor:
+                _putmulti_sorted(cursor, _sidecars)
+
+        for name in sorted(self._indexes):
+            _idx_pmap = self._indexes[name].pmap
+            for _idx_key, _idx_data in _idx_dels[name]:
+                if (
+                    txn._txn.delete(_idx_key, _idx_data, db=_idx_pmap._dbi)
+                    and txn._stats
+                ):
+                    txn._stats.dels += 1
+            with txn._txn.cursor(db=_idx_pmap._dbi) as cursor:
+                added += _putmulti_sorted(
+                    cursor,
+                    sorted(_idx_puts[name].values()),
+                    dupsort=_idx_pmap._dupsort,
                 )
-                _data = index.pmap._serialize_value(key)
-                txn.put(_key, _data)
+
+        if txn._stats:
+            txn._stats.puts += added
+
+        return len(_records)
 
     def __delitem__(self, txn_key):
         """
@@ -390,20 +1523,21 @@ class PersistentMap(MutableMapping):
         txn, key = txn_key
         assert isinstance(txn, Transaction)
 
-        _key = struct.pack(">H", self._slot) + self._serialize_key(key)
+        _key = self._prefix + self._serialize_key(key)
 
         # delete records from indexes
         if self._indexes:
-            value = self.__getitem__(txn_key)
-            if value:
-                for index in self._indexes.values():
-                    _idx_key = struct.pack(
-                        ">H", index.pmap._slot
-                    ) + index.pmap._serialize_key(index.fkey(value))
-                    txn.delete(_idx_key)
+            _idx_old, _, _ = self._old_index_records(txn, key, _key)
+            if _idx_old:
+                self._write_index_records(
+                    txn, _idx_old, {name: None for name in self._indexes}
+                )
+        if self._sidecar:
+            txn._txn.delete(_sidecar_key(self._slot, _key[len(self._prefix) :]))
 
         # delete actual data record
-        txn.delete(_key)
+        if txn.delete(_key, db=self._dbi) and self._counted:
+            self._count_add(txn, -1)
 
     def __len__(self):
         raise NotImplementedError()
@@ -420,41 +1554,387 @@ class PersistentMap(MutableMapping):
         return_values: bool = True,
         reverse: bool = False,
         limit: Optional[int] = None,
-    ) -> "PersistentMapIterator":
+    ) -> "PersistentMapIterator":
+        """
+        Select all records (key-value pairs) in table, optionally within a given key range.
+
+        :param txn: The transaction in which to run.
+
+        :param from_key: Return records starting from (and including) this key.
+
+        :param to_key: Return records up to (but not including) this key.
+
+        :param return_keys: If ``True`` (default), return keys of records.
+
+        :param return_values: If ``True`` (default), return values of records.
+
+        :param reverse: If ``True``, return records in reverse order.
+
+        :param limit: Limit number of records returned.
+
+        :return:
+        """
+        assert type(return_keys) == bool
+        assert type(return_values) == bool
+        assert type(reverse) == bool
+        assert limit is None or (type(limit) == int and limit > 0 and limit < 10000000)
+
+        return PersistentMapIterator(
+            txn,
+            self,
+            from_key=from_key,
+            to_key=to_key,
+            return_keys=return_keys,
+            return_values=return_values,
+            reverse=reverse,
+            limit=limit,
+        )
+
+    def to_arrow(
+        self,
+        txn: Transaction,
+        from_key: Any = None,
+        to_key: Any = None,
+        columns: Optional[List[str]] = None,
+        key_column: Optional[str] = None,
+    ) -> Iterator["pa.RecordBatch"]:
+        """
+        Export all records in table, optionally within a given key range, as a stream
+        of Apache Arrow record batches (e.g. ``pa.Table.from_batches(tab.to_arrow(txn))``).
+        The batches are read lazily, and must be consumed within the transaction.
+
+        Records are read in batches of ``ARROW_BATCH_SIZE`` records, and each batch
+        is converted column by column into an Arrow record batch. For FlatBuffers
+        values with a schema loaded (see :meth:`load_fbs_schema`), scalar columns are
+        read vectorized from the stored values. For CBOR and JSON values, columns are
+        read from the stored maps without unmarshalling records into objects. For
+        other values, columns are read from the attributes of the deserialized values.
+
+        .. note::
+
+            Column types are inferred per batch, e.g. ``null`` for a column with no
+            values in a batch. Use ``pa.concat_tables(..., promote_options="default")``
+            to combine such batches.
+
+        :param txn: The transaction in which to run.
+
+        :param from_key: Export records starting from (and including) this key.
+
+        :param to_key: Export records up to (but not including) this key.
+
+        :param columns: Names of the columns to export. Defaults to the scalar fields
+            of the FlatBuffers schema, or the fields of the first record, which
+            requires records deserialized as ``dict``.
+
+        :param key_column: If given, include the record keys in a column of this name.
+
+        :return: Generator of Arrow record batches with the exported records.
+        """
+        if not HAS_PYARROW:
+            raise Exception("Arrow export requested, but pyarrow is not installed")
+
+        batches = self._arrow_columns(txn, columns, from_key, to_key)
+        if batches is None:
+            batches = self._arrow_rows(txn, columns, from_key, to_key)
+        return self._arrow_batches(batches, key_column)
+
+    def _arrow_batches(self, batches, key_column):
+        for keys, data in batches:
+            if key_column:
+                data = {key_column: keys, **data}
+            yield pa.RecordBatch.from_pydict(data)
+
+    def _arrow_columns(self, txn, columns, from_key, to_key):
+        """
+        Read columns for export (see :meth:`to_arrow`) vectorized from the stored
+        values. Value types that support this (e.g. FlatBuffers with a schema) override
+        this to return a generator of ``(keys, {column: values})`` batches.
+
+        :returns: Generator of batches, or ``None`` if the columns are read per record.
+        """
+        return None
+
+    def _arrow_rows(self, txn, columns, from_key, to_key):
+        keys: List[Any] = []
+        rows: List[Any] = []
+        for key, row in PersistentMapIterator(
+            txn, self, from_key=from_key, to_key=to_key, decode=self._decode_row
+        ):
+            if columns is None:
+                if not isinstance(row, dict):
+                    raise Exception(
+                        "columns required for records of type {}".format(type(row))
+                    )
+                columns = list(row.keys())
+            keys.append(key)
+            rows.append(row)
+            if len(rows) >= self.ARROW_BATCH_SIZE:
+                yield keys, self._arrow_row_columns(rows, columns)
+                keys, rows = [], []
+        if rows:
+            yield keys, self._arrow_row_columns(rows, columns)
+
+    def _arrow_row_columns(self, rows, columns):
+        return {
+            column: [
+                row.get(column, None) if isinstance(row, dict) else getattr(row, column)
+                for row in rows
+            ]
+            for column in columns
+        }
+
+    def select_by_index(
+        self,
+        txn: Transaction,
+        name: str,
+        value: Any = None,
+        from_key: Any = None,
+        to_key: Any = None,
+        return_keys: bool = True,
+        return_values: bool = True,
+        reverse: bool = False,
+        limit: Optional[int] = None,
+        covering: bool = False,
+    ):
         """
-        Select all records (key-value pairs) in table, optionally within a given key range.
+        Select records in table by an index, either all records having the given
+        value in the indexed column, or all records with indexed values within
+        a given range (in index order).
+
+        While the index is being built online (see :meth:`start_index_build`), records
+        are selected scanning the table instead. Selecting by value from a non-covering
+        index stops scanning at ``limit``, while other selections scan the whole table.
+
+        For non-unique indexes stored in a ``dupsort`` sub-database, the index key
+        maps to the primary keys of all matching records, which are streamed
+        walking the duplicates of the index key.
+
+        Records are resolved from the table in batches of primary keys, which are
+        looked up in sorted order walking a second (reused) cursor.
 
         :param txn: The transaction in which to run.
 
-        :param from_key: Return records starting from (and including) this key.
+        :param name: Name of the index to use.
 
-        :param to_key: Return records up to (but not including) this key.
+        :param value: Select records having this indexed value. If not given, select
+            records with indexed values within ``from_key`` and ``to_key``.
 
-        :param return_keys: If ``True`` (default), return keys of records.
+        :param from_key: Return records with indexed values starting from (and including)
+            this value.
+
+        :param to_key: Return records with indexed values up to (but not including)
+            this value.
+
+        :param return_keys: If ``True`` (default), return primary keys of records.
 
         :param return_values: If ``True`` (default), return values of records.
 
-        :param reverse: If ``True``, return records in reverse order.
+        :param reverse: If ``True``, return records in reverse index order.
 
         :param limit: Limit number of records returned.
 
-        :return:
+        :param covering: If ``True``, return projections stored in the (covering) index
+            as values, rather than looking up records in the table.
+
+        :return: Generator of either ``(key, value)``, ``key`` or ``value``, depending
+            on ``return_keys`` and ``return_values``.
         """
+        assert txn._txn
         assert type(return_keys) == bool
         assert type(return_values) == bool
         assert type(reverse) == bool
+        assert type(covering) == bool
         assert limit is None or (type(limit) == int and limit > 0 and limit < 10000000)
 
-        return PersistentMapIterator(
-            txn,
-            self,
-            from_key=from_key,
-            to_key=to_key,
-            return_keys=return_keys,
-            return_values=return_values,
-            reverse=reverse,
-            limit=limit,
-        )
+        if name not in self._indexes:
+            raise Exception('no index "{}" attached'.format(name))
+        index = self._indexes[name]
+
+        if self.is_index_building(txn, name):
+            # index is incomplete: fall back to scanning the table
+            _hits = self._select_index_scan(
+                txn, index, value, from_key, to_key, reverse, limit
+            )
+        elif value is not None:
+            _hits = self._select_index_value(txn, index, value, reverse, limit)
+        else:
+            _hits = self._select_index_range(
+                txn, index, from_key, to_key, reverse, limit
+            )
+
+        if covering:
+            if not index.projection:
+                raise Exception('index "{}" is not a covering index'.format(name))
+            for _idx_data in _hits:
+                key, projection = index.unpack(_idx_data)
+                if return_keys and return_values:
+                    yield key, projection
+                elif return_values:
+                    yield projection
+                elif return_keys:
+                    yield key
+            return
+
+        pks = (index.unpack(_idx_data)[0] for _idx_data in _hits)
+
+        if not return_values:
+            if return_keys:
+                yield from pks
+            return
+
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            batch = []
+            for pk in pks:
+                batch.append(pk)
+                if len(batch) >= self.SELECT_BY_INDEX_BATCH_SIZE:
+                    yield from self._resolve_batch(txn, cursor, batch, return_keys)
+                    batch = []
+            if batch:
+                yield from self._resolve_batch(txn, cursor, batch, return_keys)
+
+    def _select_index_value(self, txn, index, value, reverse, limit):
+        _idx_key = index.pmap._prefix + index.pmap._serialize_key(value)
+        with txn._txn.cursor(db=index.pmap._dbi) as cursor:
+            if not cursor.set_key(_idx_key):
+                return
+            if not index.pmap._dupsort:
+                _pks_data = iter([cursor.value()])
+            elif reverse:
+                cursor.last_dup()
+                _pks_data = cursor.iterprev_dup()
+            else:
+                _pks_data = cursor.iternext_dup()
+
+            for i, _idx_data in enumerate(_pks_data):
+                if limit and i >= limit:
+                    break
+                yield _idx_data
+
+    def _select_index_range(self, txn, index, from_key, to_key, reverse, limit):
+        _from_key = index.pmap._prefix
+        if from_key is not None:
+            _from_key += index.pmap._serialize_key(from_key)
+        if to_key is not None:
+            _to_key = index.pmap._prefix + index.pmap._serialize_key(to_key)
+        else:
+            _to_key = index.pmap._slot_end()
+
+        with txn._txn.cursor(db=index.pmap._dbi) as cursor:
+            if reverse:
+                # to_key is _not_ inclusive
+                if _to_key is not None and cursor.set_range(_to_key):
+                    found = cursor.prev()
+                else:
+                    found = cursor.last()
+            else:
+                found = cursor.set_range(_from_key)
+
+            cnt = 0
+            while found and (not limit or cnt < limit):
+                _key = bytes(cursor.key())
+                if reverse:
+                    if _key < _from_key:
+                        break
+                elif _to_key is not None and _key >= _to_key:
+                    break
+                yield cursor.value()
+                cnt += 1
+                found = cursor.prev() if reverse else cursor.next()
+
+    def _select_index_scan(self, txn, index, value, from_key, to_key, reverse, limit):
+        _idx_pmap = index.pmap
+        if value is not None:
+            _from_key = _to_key = _idx_pmap._serialize_key(value)
+        else:
+            _from_key = (
+                _idx_pmap._serialize_key(from_key) if from_key is not None else None
+            )
+            _to_key = _idx_pmap._serialize_key(to_key) if to_key is not None else None
+
+        # the table is scanned in primary key order, which is index order when selecting
+        # by value from a non-covering index (the index record values are the primary
+        # keys), so that the scan can stop at the limit. otherwise, all matching records
+        # are collected, keeping only the first ones (in index order) up to the limit.
+        ordered = value is not None and not index.projection
+
+        def _records():
+            _len = len(self._prefix)
+            key_to = self._slot_end()
+            with txn._txn.cursor(db=self._dbi) as cursor:
+                if ordered and reverse:
+                    if key_to is not None and cursor.set_range(key_to):
+                        found = cursor.prev()
+                    else:
+                        found = cursor.last()
+                else:
+                    found = cursor.set_range(self._prefix)
+                while found:
+                    _key = bytes(cursor.key())
+                    if ordered and reverse:
+                        if _key < self._prefix:
+                            break
+                    elif key_to is not None and _key >= key_to:
+                        break
+                    _data = cursor.value()
+                    found = cursor.prev() if ordered and reverse else cursor.next()
+                    if not _data:
+                        continue
+                    record = self._decode_value(_data, txn)
+                    _fkey = index.fkey(record)
+                    if is_null(_fkey):
+                        continue
+                    _idx_key = _idx_pmap._serialize_key(_fkey)
+                    if value is not None:
+                        if _idx_key != _from_key:
+                            continue
+                    elif (_from_key is not None and _idx_key < _from_key) or (
+                        _to_key is not None and _idx_key >= _to_key
+                    ):
+                        continue
+                    yield (
+                        _idx_key,
+                        index.pack(self._deserialize_key(_key[_len:]), record),
+                    )
+
+        if ordered:
+            cnt = 0
+            for _, _idx_data in _records():
+                yield _idx_data
+                cnt += 1
+                if limit and cnt >= limit:
+                    break
+            return
+
+        if limit:
+            records = (heapq.nlargest if reverse else heapq.nsmallest)(
+                limit, _records()
+            )
+        else:
+            records = sorted(_records(), reverse=reverse)
+        for _, _idx_data in records:
+            yield _idx_data
+
+    def _resolve_batch(self, txn, cursor, keys, return_keys):
+        for key, value in zip(keys, self._getmulti(txn, cursor, keys)):
+            if return_keys:
+                yield key, value
+            else:
+                yield value
+
+    def _getmulti(self, txn, cursor, keys):
+        _prefix = self._prefix
+        _keys = [_prefix + _key for _key in self._serialize_keys(keys)]
+        _found = {
+            bytes(_key): _data for _key, _data in cursor.getmulti(sorted(set(_keys)))
+        }
+
+        # values found are deserialized in one batch (vectorized for some types)
+        _datas = [_found.get(_key, None) for _key in _keys]
+        _pos = [i for i, _data in enumerate(_datas) if _data]
+        result = [None] * len(_keys)
+        for i, value in zip(_pos, self._decode_values([_datas[i] for i in _pos], txn)):
+            result[i] = value
+        return result
 
     def count(self, txn: Transaction, prefix: Any = None) -> int:
         """
@@ -471,23 +1951,26 @@ class PersistentMap(MutableMapping):
         """
         assert txn._txn
 
-        key_from = struct.pack(">H", self._slot)
-        if prefix:
-            key_from += self._serialize_key(prefix)
-        kfl = len(key_from)
+        # a sub-database of its own knows the exact number of entries
+        if not prefix and self._dbi is not None:
+            return txn._txn.stat(self._dbi)["entries"]
 
-        cnt = 0
-        cursor = txn._txn.cursor()
-        has_more = cursor.set_range(key_from)
-        while has_more:
-            _key = cursor.key()
-            _prefix = _key[:kfl]
-            if _prefix != key_from:
-                break
-            cnt += 1
-            has_more = cursor.next()
+        # use the stored record counter, when maintained (see enable_counter())
+        if not prefix and self._counted:
+            _data = txn._txn.get(_counter_key(self._slot))
+            if _data is not None:
+                return struct.unpack(">Q", _data)[0]
 
-        return cnt
+        return self._count_scan(txn, prefix)
+
+    def _count_scan(self, txn: Transaction, prefix: Any = None) -> int:
+        key_from = self._prefix
+        if prefix:
+            key_from += self._serialize_key_prefix(prefix)
+
+        # counted walking the cursor in C
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            return cursor.count_prefix(key_from)
 
     def count_range(self, txn: Transaction, from_key: Any, to_key: Any) -> int:
         """
@@ -504,19 +1987,12 @@ class PersistentMap(MutableMapping):
         """
         assert txn._txn
 
-        key_from = struct.pack(">H", self._slot) + self._serialize_key(from_key)
-        to_key = struct.pack(">H", self._slot) + self._serialize_key(to_key)
+        key_from = self._prefix + self._serialize_key(from_key)
+        to_key = self._prefix + self._serialize_key(to_key)
 
-        cnt = 0
-        cursor = txn._txn.cursor()
-        has_more = cursor.set_range(key_from)
-        while has_more:
-            if cursor.key() >= to_key:
-                break
-            cnt += 1
-            has_more = cursor.next()
-
-        return cnt
+        # counted walking the cursor in C
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            return cursor.count_range(key_from, to_key)
 
     def truncate(self, txn: Transaction, rebuild_indexes: bool = True) -> int:
         """
@@ -528,18 +2004,32 @@ class PersistentMap(MutableMapping):
         assert txn._txn
         assert self._slot
 
-        key_from = struct.pack(">H", self._slot)
-        key_to = struct.pack(">H", self._slot + 1)
-        cursor = txn._txn.cursor()
-        cnt = 0
-        if cursor.set_range(key_from):
-            key = cursor.key()
-            while key < key_to:
-                if not cursor.delete(dupdata=True):
-                    break
-                cnt += 1
-                if txn._stats:
-                    txn._stats.dels += 1
+        if self._dbi is not None:
+            # empty the sub-database in one go
+            cnt = txn._txn.stat(self._dbi)["entries"]
+            txn._txn.drop(self._dbi, delete=False)
+            if txn._stats:
+                txn._stats.dels += cnt
+        else:
+            key_from = self._prefix
+            key_to = struct.pack(">H", self._slot + 1)
+            cursor = txn._txn.cursor()
+            cnt = 0
+            if cursor.set_range(key_from):
+                key = bytes(cursor.key())
+                while key < key_to:
+                    if not cursor.delete(dupdata=True):
+                        break
+                    cnt += 1
+                    if txn._stats:
+                        txn._stats.dels += 1
+                    key = bytes(cursor.key())
+        if self._counted:
+            txn._txn.put(_counter_key(self._slot), struct.pack(">Q", 0))
+        else:
+            # a counter left behind by pmaps with counter enabled is stale now
+            txn._txn.delete(_counter_key(self._slot))
+        _delete_slot_meta(txn._txn, self._slot, [_SLOT_META_SIDECAR])
         if rebuild_indexes:
             deleted, _ = self.rebuild_indexes(txn)
             cnt += deleted
@@ -547,64 +2037,253 @@ class PersistentMap(MutableMapping):
 
     def rebuild_indexes(self, txn: Transaction) -> Tuple[int, int]:
         """
+        Rebuild all indexes attached to this (table-)pmap, in a single scan
+        over the table (see :meth:`rebuild_index`).
 
         :param txn:
         :return:
         """
         assert txn._txn
 
-        total_deleted = 0
-        total_inserted = 0
-        for name in sorted(self._indexes.keys()):
-            deleted, inserted = self.rebuild_index(txn, name)
-            total_deleted += deleted
-            total_inserted += inserted
-        return total_deleted, total_inserted
+        return self._rebuild_indexes(txn, sorted(self._indexes.keys()))
 
     def rebuild_index(self, txn: Transaction, name: str) -> Tuple[int, int]:
         """
+        Rebuild an index attached to this (table-)pmap.
+
+        The index is rebuilt in two phases: first, index records are computed
+        scanning the table and sorted in bounded memory (see ``REBUILD_INDEX_SORT_SIZE``),
+        spilling sorted runs to temporary files as needed. Then, the index is
+        truncated and the sorted index records are written sequentially in append mode.
 
         :param txn:
         :param name:
         :return:
         """
         assert txn._txn
-        assert self._slot
 
         if name in self._indexes:
-            index = self._indexes[name]
+            return self._rebuild_indexes(txn, [name])
+        else:
+            raise Exception('no index "{}" attached'.format(name))
+
+    def _rebuild_indexes(self, txn: Transaction, names: List[str]) -> Tuple[int, int]:
+        assert self._slot
 
-            deleted = index.pmap.truncate(txn)
+        if not names:
+            return 0, 0
 
-            key_from = struct.pack(">H", self._slot)
-            key_to = struct.pack(">H", self._slot + 1)
-            cursor = txn._txn.cursor()
-            inserted = 0
-            if cursor.set_range(key_from):
-                while cursor.key() < key_to:
-                    data = cursor.value()
-                    if data:
-                        value = self._deserialize_value(data)
-
-                        _key = struct.pack(
-                            ">H", index.pmap._slot
-                        ) + index.pmap._serialize_key(index.fkey(value))
-                        _data = index.pmap._serialize_value(value.oid)
-
-                        txn.put(_key, _data)
-                        inserted += 1
-                    if not cursor.next():
+        _sorts = {name: _ExternalSort(self.REBUILD_INDEX_SORT_SIZE) for name in names}
+        _sidecars = (
+            _ExternalSort(self.REBUILD_INDEX_SORT_SIZE) if self._sidecar else None
+        )
+        try:
+            # phase 1: compute index records from all table records
+            _len = len(self._prefix)
+            key_to = self._slot_end()
+            with txn._txn.cursor(db=self._dbi) as cursor:
+                found = cursor.set_range(self._prefix)
+                while found:
+                    _key = bytes(cursor.key())
+                    if key_to is not None and _key >= key_to:
                         break
-            return deleted, inserted
-        else:
+                    _data = cursor.value()
+                    if _data:
+                        key = self._deserialize_key(_key[_len:])
+                        _idx_records = self._index_records(
+                            key, self._decode_value(_data, txn), check=False
+                        )
+                        for name in names:
+                            _record = _idx_records[name]
+                            if _record is not None:
+                                _sorts[name].add(
+                                    self._indexes[name].pmap._prefix + _record[0],
+                                    _record[1],
+                                )
+                        if _sidecars is not None:
+                            _sidecars.add(
+                                _sidecar_key(self._slot, _key[_len:]),
+                                cbor2.dumps(_idx_records),
+                            )
+                    found = cursor.next()
+
+            # phase 2: write sorted index records
+            total_deleted = 0
+            total_inserted = 0
+            for name in names:
+                _idx_pmap = self._indexes[name].pmap
+                total_deleted += _idx_pmap.truncate(txn)
+                txn._txn.delete(_index_build_key(_idx_pmap._slot))
+                total_inserted += self._write_sorted(
+                    txn, _idx_pmap._dbi, _sorts[name], _idx_pmap._dupsort
+                )
+            if txn._stats:
+                txn._stats.puts += total_inserted
+
+            if _sidecars is not None:
+                self._write_sorted(txn, None, _sidecars)
+        finally:
+            for _sort in _sorts.values():
+                _sort.close()
+            if _sidecars is not None:
+                _sidecars.close()
+
+        return total_deleted, total_inserted
+
+    def _write_sorted(self, txn: Transaction, db, items, dupsort=False) -> int:
+        """
+        Write sorted ``(key, data)`` pairs in batches. Of pairs with equal keys
+        (or equal key and data for ``dupsort`` databases), the last one is written.
+        """
+        written = 0
+        batch: List[Tuple[bytes, bytes]] = []
+        with txn._txn.cursor(db=db) as cursor:
+            for item in items:
+                if batch and (
+                    batch[-1] == item if dupsort else batch[-1][0] == item[0]
+                ):
+                    batch[-1] = item
+                    continue
+                if len(batch) >= self.REBUILD_INDEX_BATCH_SIZE:
+                    # keep the last pair for detecting duplicates
+                    written += _putmulti_sorted(cursor, batch[:-1], dupsort=dupsort)
+                    batch = batch[-1:]
+                batch.append(item)
+            written += _putmulti_sorted(cursor, batch, dupsort=dupsort)
+        return written
+
+    def is_index_building(self, txn: Transaction, name: str) -> bool:
+        """
+        Flag indicating whether an index attached to this (table-)pmap is being
+        built online, and hence is still incomplete.
+
+        :param txn: The transaction in which to run.
+        :param name: Name of the index.
+        :return:
+        """
+        assert txn._txn
+
+        if name not in self._indexes:
+            raise Exception('no index "{}" attached'.format(name))
+
+        return (
+            txn._txn.get(_index_build_key(self._indexes[name].pmap._slot)) is not None
+        )
+
+    def start_index_build(self, txn: Transaction, name: str) -> int:
+        """
+        Start building an index attached to this (table-)pmap online: rather than
+        in one (large) write transaction (see :meth:`rebuild_index`), the index is
+        backfilled in chunks of table records, each in a short write transaction
+        of its own, calling :meth:`build_index_chunk` until complete.
+
+        The index is truncated, and a build watermark (the key of the last table record
+        indexed) is persisted in the database metadata area. Writes to the table
+        maintain the index as usual, and :meth:`select_by_index` falls back to scanning
+        the table until the build is complete.
+
+        :param txn: The (write) transaction in which to run.
+        :param name: Name of the index to build.
+        :return: Number of index records deleted.
+        """
+        assert txn._txn
+
+        if name not in self._indexes:
+            raise Exception('no index "{}" attached'.format(name))
+        _idx_pmap = self._indexes[name].pmap
+
+        txn._txn.put(_index_build_key(_idx_pmap._slot), b"")
+        return _idx_pmap.truncate(txn)
+
+    def build_index_chunk(
+        self, txn: Transaction, name: str, limit: Optional[int] = None
+    ) -> Tuple[int, bool]:
+        """
+        Backfill the next chunk of table records into an index being built online
+        (see :meth:`start_index_build`), advancing the build watermark.
+
+        :param txn: The (write) transaction in which to run.
+        :param name: Name of the index being built.
+        :param limit: Maximum number of table records to index (default:
+            ``BUILD_INDEX_CHUNK_SIZE``).
+        :return: Number of table records indexed, and whether the index is complete.
+        """
+        assert txn._txn
+        assert limit is None or (type(limit) == int and limit > 0)
+
+        if name not in self._indexes:
             raise Exception('no index "{}" attached'.format(name))
+        index = self._indexes[name]
+        _idx_pmap = index.pmap
+
+        _watermark_key = _index_build_key(_idx_pmap._slot)
+        _watermark = txn._txn.get(_watermark_key)
+        if _watermark is None:
+            return 0, True
+        _watermark = self._prefix + bytes(_watermark)
+
+        limit = limit or self.BUILD_INDEX_CHUNK_SIZE
+        _len = len(self._prefix)
+        key_to = self._slot_end()
+        cnt = 0
+        done = True
+        _last_key = _watermark
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            found = cursor.set_range(_watermark)
+            if (
+                found
+                and _watermark != self._prefix
+                and bytes(cursor.key()) == _watermark
+            ):
+                found = cursor.next()
+            while found:
+                _key = bytes(cursor.key())
+                if key_to is not None and _key >= key_to:
+                    break
+                if cnt >= limit:
+                    done = False
+                    break
+                _data = cursor.value()
+                found = cursor.next()
+                cnt += 1
+                _last_key = _key
+                if not _data:
+                    continue
+                _idx_records = self._index_records(
+                    self._deserialize_key(_key[_len:]),
+                    self._decode_value(_data, txn),
+                    check=False,
+                )
+                _record = _idx_records[name]
+                if _record is not None:
+                    txn.put(
+                        _idx_pmap._prefix + _record[0], _record[1], db=_idx_pmap._dbi
+                    )
+                if self._sidecar:
+                    txn._txn.put(
+                        _sidecar_key(self._slot, _key[_len:]), cbor2.dumps(_idx_records)
+                    )
+
+        if done:
+            txn._txn.delete(_watermark_key)
+        else:
+            txn._txn.put(_watermark_key, _last_key[_len:])
+        return cnt, done
 
 
 class PersistentMapIterator(object):
     """
     Iterator that walks over zLMDB database records.
+
+    Records are read from the database in batches, which are filled walking the
+    cursor within the key range in C (see ``Cursor.getbatch``). Batches start small
+    and grow up to ``BATCH_SIZE`` records.
     """
 
+    # initial and maximum number of records read from the database in one go
+    BATCH_SIZE_INITIAL = 16
+    BATCH_SIZE = 1024
+
     def __init__(
         self,
         txn: Transaction,
@@ -615,6 +2294,7 @@ class PersistentMapIterator(object):
         return_values: bool = True,
         reverse: bool = False,
         limit: Optional[int] = None,
+        decode: Optional[Callable] = None,
     ):
         """
 
@@ -626,22 +2306,24 @@ class PersistentMapIterator(object):
         :param return_values:
         :param reverse:
         :param limit:
+        :param decode: Function decoding values read from the database (called with
+            the value and the transaction), defaults to decompressing and deserializing
+            values (``PersistentMap._decode_value``).
         """
         self._txn = txn
         self._pmap = pmap
+        self._decode = decode or pmap._decode_value
         assert pmap._slot
 
         if from_key:
-            self._from_key = struct.pack(">H", pmap._slot) + pmap._serialize_key(
-                from_key
-            )
+            self._from_key = pmap._prefix + pmap._serialize_key(from_key)
         else:
-            self._from_key = struct.pack(">H", pmap._slot)
+            self._from_key = pmap._prefix
 
         if to_key:
-            self._to_key = struct.pack(">H", pmap._slot) + pmap._serialize_key(to_key)
+            self._to_key = pmap._prefix + pmap._serialize_key(to_key)
         else:
-            self._to_key = struct.pack(">H", pmap._slot + 1)
+            self._to_key = pmap._slot_end()
 
         self._reverse = reverse
 
@@ -653,16 +2335,22 @@ class PersistentMapIterator(object):
 
         self._cursor = None
         self._found = None
+        self._batch: List[Any] = []
+        self._batch_pos = 0
+        self._batch_size = self.BATCH_SIZE_INITIAL
 
     def __iter__(self) -> "PersistentMapIterator":
         assert self._txn._txn
-        self._cursor = self._txn._txn.cursor()
+        self._cursor = self._txn._txn.cursor(db=self._pmap._dbi)
         assert self._cursor
 
         # https://lmdb.readthedocs.io/en/release/#lmdb.Cursor.set_range
         if self._reverse:
             # seek to the first record starting from to_key (and going reverse)
-            self._found = self._cursor.set_range(self._to_key)
+            if self._to_key is not None:
+                self._found = self._cursor.set_range(self._to_key)
+            else:
+                self._found = False
 
             if self._found:
                 # to_key is _not_ inclusive, so we move on one record
@@ -681,37 +2369,45 @@ class PersistentMapIterator(object):
         :return: Return either ``(key, value)``, ``key`` or ``value``, depending on ``return_keys``
             and ``return_values``.
         """
-        # stop criteria: no more records or limit reached
-        if not self._found or (self._limit and self._read >= self._limit):
+        # stop criteria: limit reached
+        if self._limit and self._read >= self._limit:
             raise StopIteration
-        self._read += 1
 
-        # stop criteria: end of key-range reached
-        _key = self._cursor.key()
-        if self._reverse:
-            if _key < self._from_key:
+        if self._batch_pos >= len(self._batch):
+            # stop criteria: no more records (or end of key-range reached)
+            if not self._found:
                 raise StopIteration
-        else:
-            if _key >= self._to_key:
+
+            n = self._batch_size
+            if self._limit:
+                n = min(n, self._limit - self._read)
+            self._batch_size = min(self._batch_size * 2, self.BATCH_SIZE)
+
+            # read the next batch of records within the key-range, moving the cursor
+            if self._reverse:
+                _bound = self._from_key or None
+            else:
+                _bound = self._to_key
+            self._batch = self._cursor.getbatch(
+                n, bound=_bound, reverse=self._reverse, values=self._return_values
+            )
+            self._batch_pos = 0
+            self._found = len(self._batch) == n
+            if not self._batch:
                 raise StopIteration
 
-        # read actual app key-value (before moving cursor)
-        _key = self._pmap._deserialize_key(_key[2:])
+        _item = self._batch[self._batch_pos]
+        self._batch_pos += 1
+        self._read += 1
 
+        # read actual app key-value
         if self._return_values:
-            _data = self._cursor.value()
+            _key, _data = _item
             if _data:
-                if self._pmap._decompress:
-                    _data = self._pmap._decompress(_data)
-                _data = self._pmap._deserialize_value(_data)
-        else:
-            _data = None
-
-        # move the cursor
-        if self._reverse:
-            self._found = self._cursor.prev()
+                _data = self._decode(_data, self._txn)
         else:
-            self._found = self._cursor.next()
+            _key, _data = _item, None
+        _key = self._pmap._decode_key(_key)
 
         # return app key-value
         if self._return_keys and self._return_values:
@@ -929,6 +2625,37 @@ class MapUuidPickle(_types._UuidKeysMixin, _types._PickleValuesMixin, Persistent
         PersistentMap.__init__(self, slot=slot, compress=compress)
 
 
+class MapUuidPickle5(_types._UuidKeysMixin, _types._Pickle5ValuesMixin, PersistentMap):
+    """
+    Persistent map with UUID (16 bytes) keys and Python pickle (protocol 5) values.
+
+    Out-of-band buffers of values (e.g. of NumPy arrays) are stored next to the
+    pickle data, and in zero-copy mode (see :meth:`zlmdb.Database.begin`) are
+    loaded as views into the LMDB memory map.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapUuidNdarray(_types._UuidKeysMixin, _types._NdarrayValuesMixin, PersistentMap):
+    """
+    Persistent map with UUID (16 bytes) keys and NumPy array values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapUuidArrow(_types._UuidKeysMixin, _types._ArrowValuesMixin, PersistentMap):
+    """
+    Persistent map with UUID (16 bytes) keys and Apache Arrow table values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapUuidFlatBuffers(
     _types._UuidKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -941,6 +2668,17 @@ class MapUuidFlatBuffers(
         _types._FlatBuffersValuesMixin.__init__(self, build=build, cast=cast)
 
 
+class MapUuidFlexBuffers(
+    _types._UuidKeysMixin, _types._FlexBuffersValuesMixin, PersistentMap
+):
+    """
+    Persistent map with UUID (16 bytes) keys and FlexBuffers values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapUuidTimestampFlatBuffers(
     _types._UuidTimestampKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -965,6 +2703,39 @@ class MapTimestampFlatBuffers(
         _types._FlatBuffersValuesMixin.__init__(self, build=build, cast=cast)
 
 
+class MapTimestampFlexBuffers(
+    _types._TimestampKeysMixin, _types._FlexBuffersValuesMixin, PersistentMap
+):
+    """
+    Persistent map with Timestamp keys and FlexBuffers values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapTimestampNdarray(
+    _types._TimestampKeysMixin, _types._NdarrayValuesMixin, PersistentMap
+):
+    """
+    Persistent map with Timestamp keys and NumPy array values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapTimestampArrow(
+    _types._TimestampKeysMixin, _types._ArrowValuesMixin, PersistentMap
+):
+    """
+    Persistent map with Timestamp keys and Apache Arrow table values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapTimestampUuidFlatBuffers(
     _types._TimestampUuidKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -1221,6 +2992,41 @@ class MapStringPickle(
         PersistentMap.__init__(self, slot=slot, compress=compress)
 
 
+class MapStringPickle5(
+    _types._StringKeysMixin, _types._Pickle5ValuesMixin, PersistentMap
+):
+    """
+    Persistent map with string (utf8) keys and Python pickle (protocol 5) values.
+
+    Out-of-band buffers of values (e.g. of NumPy arrays) are stored next to the
+    pickle data, and in zero-copy mode (see :meth:`zlmdb.Database.begin`) are
+    loaded as views into the LMDB memory map.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapStringNdarray(
+    _types._StringKeysMixin, _types._NdarrayValuesMixin, PersistentMap
+):
+    """
+    Persistent map with string (utf8) keys and NumPy array values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapStringArrow(_types._StringKeysMixin, _types._ArrowValuesMixin, PersistentMap):
+    """
+    Persistent map with string (utf8) keys and Apache Arrow table values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapStringFlatBuffers(
     _types._StringKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -1233,6 +3039,17 @@ class MapStringFlatBuffers(
         _types._FlatBuffersValuesMixin.__init__(self, build=build, cast=cast)
 
 
+class MapStringFlexBuffers(
+    _types._StringKeysMixin, _types._FlexBuffersValuesMixin, PersistentMap
+):
+    """
+    Persistent map with string (utf8) keys and FlexBuffers values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 #
 # Key: OID -> Value: String, OID, UUID, JSON, CBOR, Pickle, FlatBuffers
 #
@@ -1294,6 +3111,37 @@ class MapOidPickle(_types._OidKeysMixin, _types._PickleValuesMixin, PersistentMa
         PersistentMap.__init__(self, slot=slot, compress=compress)
 
 
+class MapOidPickle5(_types._OidKeysMixin, _types._Pickle5ValuesMixin, PersistentMap):
+    """
+    Persistent map with OID (uint64) keys and Python pickle (protocol 5) values.
+
+    Out-of-band buffers of values (e.g. of NumPy arrays) are stored next to the
+    pickle data, and in zero-copy mode (see :meth:`zlmdb.Database.begin`) are
+    loaded as views into the LMDB memory map.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapOidNdarray(_types._OidKeysMixin, _types._NdarrayValuesMixin, PersistentMap):
+    """
+    Persistent map with OID (uint64) keys and NumPy array values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
+class MapOidArrow(_types._OidKeysMixin, _types._ArrowValuesMixin, PersistentMap):
+    """
+    Persistent map with OID (uint64) keys and Apache Arrow table values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapOidFlatBuffers(
     _types._OidKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -1306,6 +3154,17 @@ class MapOidFlatBuffers(
         _types._FlatBuffersValuesMixin.__init__(self, build=build, cast=cast)
 
 
+class MapOidFlexBuffers(
+    _types._OidKeysMixin, _types._FlexBuffersValuesMixin, PersistentMap
+):
+    """
+    Persistent map with OID (uint64) keys and FlexBuffers values.
+    """
+
+    def __init__(self, slot=None, compress=None):
+        PersistentMap.__init__(self, slot=slot, compress=compress)
+
+
 class MapOidOidFlatBuffers(
     _types._OidOidKeysMixin, _types._FlatBuffersValuesMixin, PersistentMap
 ):
@@ -88,6 +88,9 @@ class Transaction(object):
         :param write:
         :type write: bool
 
+        :param buffers: Zero-copy read mode (see :meth:`zlmdb.Database.begin`).
+        :type buffers: bool
+
         :param stats:
         :type stats: TransactionStats
         """
@@ -134,29 +137,31 @@ class Transaction(object):
 
         return self._txn.id()
 
-    def get(self, key):
+    def get(self, key, db=None):
         """
 
         :param key:
+        :param db: LMDB sub-database (named DBI) to use, or ``None`` for the main database.
         :return:
         """
         assert self._txn is not None
 
-        return self._txn.get(key)
+        return self._txn.get(key, db=db)
 
-    def put(self, key, data, overwrite=True):
+    def put(self, key, data, overwrite=True, db=None):
         """
 
         :param key:
         :param data:
         :param overwrite:
+        :param db: LMDB sub-database (named DBI) to use, or ``None`` for the main database.
         :return:
         """
         assert self._txn is not None
 
         # store the record, returning True if it was written, or False to indicate the key
         # was already present and overwrite=False.
-        was_written = self._txn.put(key, data, overwrite=overwrite)
+        was_written = self._txn.put(key, data, overwrite=overwrite, db=db)
         if was_written:
             if self._stats:
                 self._stats.puts += 1
@@ -164,15 +169,38 @@ class Transaction(object):
                 self._log.append((Transaction.PUT, key))
         return was_written
 
-    def delete(self, key):
+    def reserve(self, key, size, db=None):
+        """
+        Store a record with a value of ``size`` bytes, returning a writable buffer
+        of the space reserved for the value in the database page (``MDB_RESERVE``).
+        The buffer must be filled in before the next write in this transaction.
+
+        :param key:
+        :param size:
+        :param db: LMDB sub-database (named DBI) to use, or ``None`` for the main database.
+        :return:
+        """
+        assert self._txn is not None
+
+        data = self._txn.reserve(key, size, db=db)
+        if self._stats:
+            self._stats.puts += 1
+        if self._log:
+            self._log.append((Transaction.PUT, key))
+        return data
+
+    def delete(self, key, value=b"", db=None):
         """
 
         :param key:
+        :param value: For sub-databases opened with ``dupsort=True``, delete only
+            this value (duplicate) of the key. Ignored otherwise.
+        :param db: LMDB sub-database (named DBI) to use, or ``None`` for the main database.
         :return:
         """
         assert self._txn is not None
 
-        was_deleted = self._txn.delete(key)
+        was_deleted = self._txn.delete(key, value, db=db)
         if was_deleted:
             if self._stats:
                 self._stats.dels += 1
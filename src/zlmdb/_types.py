@@ -24,6 +24,7 @@
 #
 ###############################################################################
 
+import sys
 import struct
 import random
 import binascii
@@ -31,11 +32,17 @@ import pickle
 import os
 import uuid
 import json
+import threading
 
 import cbor2
 import flatbuffers
 from time import time_ns
 
+from zlmdb._fbs import FlatBuffersCodec
+from zlmdb._keys import KeyCodec, _dt_ns
+from zlmdb.flatbuffers import flexbuffers
+from zlmdb.flatbuffers.reflection.BaseType import BaseType as _FbsBaseType
+
 try:
     import numpy as np
 except ImportError:
@@ -43,6 +50,13 @@ except ImportError:
 else:
     HAS_NUMPY = True
 
+try:
+    import pyarrow as pa
+except ImportError:
+    HAS_PYARROW = False
+else:
+    HAS_PYARROW = True
+
 CHARSET = "345679ACEFGHJKLMNPQRSTUVWXY"
 """
 Charset from which to generate random key IDs.
@@ -74,19 +88,22 @@ def _random_string():
         return token_value
 
 
+_BIG_ENDIAN_INT64 = struct.Struct(">q")
+
+
 def dt_to_bytes(dt):
     """
-    Serialize a timestamp in big-endian byte order.
+    Serialize a timestamp in big-endian byte order, in nanoseconds (timestamps of
+    other units are converted).
 
     :param dt: Timestamp to serialize.
     :return: Serialized bytes.
     """
     assert isinstance(dt, np.datetime64)
 
-    data = bytearray(dt.tobytes())
-    # FIXME: this must depend on host CPU arch
-    data.reverse()
-    return bytes(data)
+    if sys.byteorder == "little":
+        return _dt_ns(dt).tobytes()[::-1]
+    return _dt_ns(dt).tobytes()
 
 
 def bytes_to_dt(data):
@@ -98,11 +115,32 @@ def bytes_to_dt(data):
     """
     assert type(data) == bytes
 
-    data = bytearray(data)
-    # FIXME: this must depend on host CPU arch
-    data.reverse()
-    dt = np.frombuffer(bytes(data), dtype="datetime64[ns]")[0]
-    return dt
+    return np.datetime64(_BIG_ENDIAN_INT64.unpack(data)[0], "ns")
+
+
+def dts_to_bytes(dts):
+    """
+    Serialize a batch of timestamps in big-endian byte order (vectorized), in
+    nanoseconds like :func:`dt_to_bytes`.
+
+    :param dts: Timestamps to serialize (a sequence of ``np.datetime64`` or a
+        ``datetime64`` array).
+    :return: List of serialized bytes, one per timestamp.
+    """
+    return np.asarray(dts, dtype="datetime64[ns]").astype(">i8").view("V8").tolist()
+
+
+def bytes_to_dts(data):
+    """
+    Deserialize a batch of timestamps from big-endian byte order data (vectorized).
+
+    :param data: List of serialized timestamps, or the serialized timestamps
+        concatenated into one buffer.
+    :return: Deserialized timestamps in an array of dtype ``datetime64[ns]``.
+    """
+    if type(data) == list:
+        data = b"".join(data)
+    return np.frombuffer(data, dtype=">i8").astype("datetime64[ns]")
 
 
 #
@@ -111,6 +149,8 @@ def bytes_to_dt(data):
 
 
 class _OidKeysMixin(object):
+    _ZEROCOPY_KEYS = True
+
     MAX_OID = 9007199254740992
     """
     Valid OID are from the integer range [0, MAX_OID].
@@ -133,38 +173,33 @@ class _OidKeysMixin(object):
         else:
             random.randint(0, _OidKeysMixin.MAX_OID)
 
-    def _serialize_key(self, key):
-        assert type(key) == int
-        assert key >= 0 and key <= _OidKeysMixin.MAX_OID
-        return struct.pack(">Q", key)
+    _key_codec = KeyCodec(("oid",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
-    def _deserialize_key(self, data):
-        return struct.unpack(">Q", data)[0]
+    def _deserialize_keys(self, data):
+        return np.frombuffer(b"".join(data), dtype=">u8").astype(np.uint64)
 
 
 class _OidOidKeysMixin(object):
+    _ZEROCOPY_KEYS = True
+
     @staticmethod
     def new_key(secure=False):
         return _OidKeysMixin.new_key(secure=secure), _OidKeysMixin.new_key(
             secure=secure
         )
 
-    def _serialize_key(self, keys):
-        assert type(keys) == tuple
-        assert len(keys) == 2
-        key1, key2 = keys
-        assert type(key1) == int
-        assert key1 >= 0 and key1 <= _OidKeysMixin.MAX_OID
-        assert type(key2) == int
-        assert key2 >= 0 and key2 <= _OidKeysMixin.MAX_OID
-        return struct.pack(">QQ", key1, key2)
-
-    def _deserialize_key(self, data):
-        assert len(data) == 16
-        return struct.unpack(">QQ", data)
+    _key_codec = KeyCodec(("oid", "oid"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Oid3KeysMixin(object):
+    _ZEROCOPY_KEYS = True
+
     @staticmethod
     def new_key(secure=False):
         return (
@@ -173,21 +208,10 @@ class _Oid3KeysMixin(object):
             _OidKeysMixin.new_key(secure=secure),
         )
 
-    def _serialize_key(self, keys):
-        assert type(keys) == tuple
-        assert len(keys) == 3
-        key1, key2, key3 = keys
-        assert type(key1) == int
-        assert key1 >= 0 and key1 <= _OidKeysMixin.MAX_OID
-        assert type(key2) == int
-        assert key2 >= 0 and key2 <= _OidKeysMixin.MAX_OID
-        assert type(key3) == int
-        assert key3 >= 0 and key3 <= _OidKeysMixin.MAX_OID
-        return struct.pack(">QQQ", key1, key2, key3)
-
-    def _deserialize_key(self, data):
-        assert len(data) == 24
-        return struct.unpack(">QQQ", data)
+    _key_codec = KeyCodec(("oid", "oid", "oid"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _OidTimestampKeysMixin(object):
@@ -287,15 +311,10 @@ class _StringKeysMixin(object):
     def new_key():
         return _random_string()
 
-    def _serialize_key(self, key):
-        assert type(key) == str
-
-        return key.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-
-        return data.decode("utf8")
+    _key_codec = KeyCodec(("string",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _StringStringKeysMixin(object):
@@ -356,102 +375,31 @@ class _UuidKeysMixin(object):
         # return uuid.UUID(bytes=os.urandom(16))
         return uuid.uuid4()
 
-    def _serialize_key(self, key):
-        assert isinstance(key, uuid.UUID), 'key must be an UUID, but was "{}"'.format(
-            key
-        )
-
-        # The UUID as a 16-byte string (containing the six integer fields in big-endian byte order).
-        # https://docs.python.org/3/library/uuid.html#uuid.UUID.bytes
-        return key.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-
-        return uuid.UUID(bytes=data)
+    _key_codec = KeyCodec(("uuid",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidUuidKeysMixin(object):
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = uuid.UUID(bytes=b"\x00" * 16)
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, uuid.UUID)
-
-        return key1.bytes + key2.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 32
-
-        data1, data2 = data[0:16], data[16:32]
-        return uuid.UUID(bytes=data1), uuid.UUID(bytes=data2)
+    _key_codec = KeyCodec(("uuid", "uuid"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidUuidUuidKeysMixin(object):
-    def _serialize_key(self, key1_key2_key3):
-        assert type(key1_key2_key3) == tuple and len(key1_key2_key3) == 3
-        key1, key2, key3 = key1_key2_key3
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = uuid.UUID(bytes=b"\x00" * 16)
-        if key3 is None:
-            key3 = uuid.UUID(bytes=b"\x00" * 16)
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, uuid.UUID)
-        assert isinstance(key3, uuid.UUID)
-
-        return key1.bytes + key2.bytes + key3.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 48
-
-        data1, data2, data3 = data[0:16], data[16:32], data[32:48]
-        return uuid.UUID(bytes=data1), uuid.UUID(bytes=data2), uuid.UUID(bytes=data3)
+    _key_codec = KeyCodec(("uuid", "uuid", "uuid"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidUuidUuidUuidKeysMixin(object):
-    def _serialize_key(self, key1_key2_key3_key4):
-        assert type(key1_key2_key3_key4) == tuple and len(key1_key2_key3_key4) == 4
-        key1, key2, key3, key4 = key1_key2_key3_key4
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = uuid.UUID(bytes=b"\x00" * 16)
-        if key3 is None:
-            key3 = uuid.UUID(bytes=b"\x00" * 16)
-        if key4 is None:
-            key4 = uuid.UUID(bytes=b"\x00" * 16)
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, uuid.UUID)
-        assert isinstance(key3, uuid.UUID)
-        assert isinstance(key4, uuid.UUID)
-
-        return key1.bytes + key2.bytes + key3.bytes + key4.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 64
-
-        data1, data2, data3, data4 = data[0:16], data[16:32], data[32:48], data[48:64]
-        return (
-            uuid.UUID(bytes=data1),
-            uuid.UUID(bytes=data2),
-            uuid.UUID(bytes=data3),
-            uuid.UUID(bytes=data4),
-        )
+    _key_codec = KeyCodec(("uuid", "uuid", "uuid", "uuid"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Uint16UuidTimestampKeysMixin(object):
@@ -622,16 +570,18 @@ class _TimestampKeysMixin(object):
     def new_key():
         return np.datetime64(time_ns(), "ns")
 
-    def _serialize_key(self, key1):
-        assert isinstance(key1, np.datetime64)
+    _key_codec = KeyCodec(("timestamp",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
-        return dt_to_bytes(key1)
+    def _serialize_keys(self, keys):
+        assert all(isinstance(key, np.datetime64) for key in keys)
 
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 8
+        return dts_to_bytes(keys)
 
-        return bytes_to_dt(data[0:8])
+    def _deserialize_keys(self, data):
+        return bytes_to_dts(data)
 
 
 class _TimestampUuidKeysMixin(object):
@@ -639,29 +589,10 @@ class _TimestampUuidKeysMixin(object):
     def new_key():
         return np.datetime64(time_ns(), "ns"), uuid.uuid4()
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = np.datetime64(0, "ns")
-        if key2 is None:
-            key2 = uuid.UUID(bytes=b"\x00" * 16)
-
-        assert isinstance(key1, np.datetime64)
-        assert isinstance(key2, uuid.UUID)
-
-        return dt_to_bytes(key1) + key2.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 24
-
-        data1, data2 = data[0:8], data[8:24]
-
-        key1 = bytes_to_dt(data1)
-        key2 = uuid.UUID(bytes=data2)
-        return key1, key2
+    _key_codec = KeyCodec(("timestamp", "uuid"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidTimestampUuidKeysMixin(object):
@@ -669,33 +600,10 @@ class _UuidTimestampUuidKeysMixin(object):
     def new_key():
         return uuid.uuid4(), np.datetime64(time_ns(), "ns"), uuid.uuid4()
 
-    def _serialize_key(self, key1_key2_key3):
-        assert type(key1_key2_key3) == tuple and len(key1_key2_key3) == 3
-        key1, key2, key3 = key1_key2_key3
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = np.datetime64(0, "ns")
-        if key3 is None:
-            key3 = uuid.UUID(bytes=b"\x00" * 16)
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, np.datetime64)
-        assert isinstance(key3, uuid.UUID)
-
-        return key1.bytes + dt_to_bytes(key2) + key3.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 32
-
-        data1, data2, data3 = data[0:16], data[16:24], data[24:32]
-
-        key1 = uuid.UUID(bytes=data1)
-        key2 = bytes_to_dt(data2)
-        key3 = uuid.UUID(bytes=data3)
-        return key1, key2, key3
+    _key_codec = KeyCodec(("uuid", "timestamp", "uuid"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _TimestampUuidStringKeysMixin(object):
@@ -703,33 +611,10 @@ class _TimestampUuidStringKeysMixin(object):
     def new_key():
         return np.datetime64(time_ns(), "ns"), uuid.uuid4(), ""
 
-    def _serialize_key(self, key1_key2_key3):
-        assert type(key1_key2_key3) == tuple and len(key1_key2_key3) == 3
-        key1, key2, key3 = key1_key2_key3
-
-        if key1 is None:
-            key1 = np.datetime64(0, "ns")
-        if key2 is None:
-            key2 = uuid.UUID(bytes=b"\x00" * 16)
-        if key3 is None:
-            key3 = ""
-
-        assert isinstance(key1, np.datetime64)
-        assert isinstance(key2, uuid.UUID)
-        assert type(key3) == str
-
-        return dt_to_bytes(key1) + key2.bytes + key3.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) >= 24
-
-        data1, data2, data3 = data[0:8], data[8:24], data[24:]
-
-        key1 = bytes_to_dt(data1)
-        key2 = uuid.UUID(bytes=data2)
-        key3 = data3.decode("utf8") if data3 else ""
-        return key1, key2, key3
+    _key_codec = KeyCodec(("timestamp", "uuid", "string"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _TimestampBytes32KeysMixin(object):
@@ -737,30 +622,10 @@ class _TimestampBytes32KeysMixin(object):
     def new_key():
         return np.datetime64(time_ns(), "ns"), os.urandom(32)
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = np.datetime64(0, "ns")
-        if key2 is None:
-            key2 = b"\x00" * 32
-
-        assert isinstance(key1, np.datetime64)
-        assert isinstance(key2, bytes)
-        assert isinstance(key2, bytes) and len(key2) == 32
-
-        return dt_to_bytes(key1) + key2
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes, "data must be binary, but got {}".format(type(data))
-        assert len(data) == 40, "data must have len 40, but got {}".format(len(data))
-
-        data1, data2 = data[0:8], data[8:40]
-
-        key1 = bytes_to_dt(data1)
-        key2 = data2
-        return key1, key2
+    _key_codec = KeyCodec(("timestamp", "bytes32"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _TimestampStringKeysMixin(object):
@@ -768,28 +633,10 @@ class _TimestampStringKeysMixin(object):
     def new_key():
         return np.datetime64(time_ns(), "ns"), _StringKeysMixin.new_key()
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = np.datetime64(0, "ns")
-        if key2 is None:
-            key2 = ""
-
-        assert isinstance(key1, np.datetime64)
-        assert type(key2) == str
-
-        return dt_to_bytes(key1) + key2.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) > 8
-
-        data1, data2 = data[0:8], data[8:]
-        key1 = bytes_to_dt(data1)
-        key2 = data2.decode("utf8")
-        return key1, key2
+    _key_codec = KeyCodec(("timestamp", "string"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _StringTimestampKeysMixin(object):
@@ -797,29 +644,10 @@ class _StringTimestampKeysMixin(object):
     def new_key():
         return _StringKeysMixin.new_key(), np.datetime64(time_ns(), "ns")
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = ""
-        if key2 is None:
-            key2 = np.datetime64(0, "ns")
-
-        assert type(key1) == str
-        assert isinstance(key2, np.datetime64)
-
-        return key1.encode("utf8") + dt_to_bytes(key2)
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) > 8
-
-        slen = len(data) - 8
-        data1, data2 = data[0:slen], data[slen:]
-        key1 = data1.decode("utf8")
-        key2 = bytes_to_dt(data2)
-        return key1, key2
+    _key_codec = KeyCodec(("string", "timestamp"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidTimestampKeysMixin(object):
@@ -827,28 +655,10 @@ class _UuidTimestampKeysMixin(object):
     def new_key():
         return uuid.uuid4(), np.datetime64(time_ns(), "ns")
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = np.datetime64(0, "ns")
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, np.datetime64)
-
-        return key1.bytes + dt_to_bytes(key2)
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 24
-
-        data1, data2 = data[0:16], data[16:24]
-        key1 = uuid.UUID(bytes=data1)
-        key2 = bytes_to_dt(data2)
-        return key1, key2
+    _key_codec = KeyCodec(("uuid", "timestamp"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Uint64TimestampKeysMixin(object):
@@ -856,81 +666,24 @@ class _Uint64TimestampKeysMixin(object):
     def new_key():
         return random.randint(1, 2**64 - 1), np.datetime64(time_ns(), "ns")
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = 0
-        if key2 is None:
-            key2 = np.datetime64(0, "ns")
-
-        assert type(key1) == int, "key1 must be int, but was {}".format(type(key1))
-        assert isinstance(key2, np.datetime64), (
-            "key2 must be np.datetime64, but was {}".format(type(key2))
-        )
-
-        return struct.pack(">Q", key1) + dt_to_bytes(key2)
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 16
-
-        data1, data2 = data[0:8], data[8:16]
-        key1 = struct.unpack(">Q", data1)[0]
-        key2 = bytes_to_dt(data2)
-        return key1, key2
+    _key_codec = KeyCodec(("uint64", "timestamp"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidStringKeysMixin(object):
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        if key1 is None:
-            key1 = uuid.UUID(bytes=b"\x00" * 16)
-        if key2 is None:
-            key2 = ""
-
-        assert isinstance(key1, uuid.UUID), (
-            "key1 must be of type UUID, but was {}".format(type(key1))
-        )
-        assert type(key2) == str, "key2 must be of type string, but was {}".format(
-            type(key2)
-        )
-
-        # The UUID as a 16-byte string (containing the six integer fields in big-endian byte order).
-        # https://docs.python.org/3/library/uuid.html#uuid.UUID.bytes
-        return key1.bytes + key2.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) >= 16
-        data1 = data[:16]
-        if len(data) > 16:
-            data2 = data[16:]
-        else:
-            data2 = b""
-        return uuid.UUID(bytes=data1), data2.decode("utf8")
+    _key_codec = KeyCodec(("uuid", "string"), nullable=True)
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _SlotUuidKeysMixin(object):
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        assert type(key1) == int
-        assert key1 >= 0 and key1 < 2**16
-        assert isinstance(key2, uuid.UUID)
-
-        return struct.pack(">H", key1) + key2.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == (2 + 16)
-        data1, data2 = data[:2], data[2:]
-
-        return struct.unpack(">H", data1)[0], uuid.UUID(bytes=data2)
+    _key_codec = KeyCodec(("uint16", "uuid"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes32KeysMixin(object):
@@ -938,58 +691,24 @@ class _Bytes32KeysMixin(object):
     def new_key():
         return os.urandom(32)
 
-    def _serialize_key(self, key):
-        assert type(key) == bytes, 'key must be bytes[32], was "{}"'.format(key)
-        assert len(key) == 32
-
-        return key
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes, 'data must be bytes[32], was "{}"'.format(data)
-        assert len(data) == 32
-
-        return data
+    _key_codec = KeyCodec(("bytes32",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes32Bytes32KeysMixin(object):
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        assert type(key1) == bytes
-        assert len(key1) == 32
-
-        assert type(key2) == bytes
-        assert len(key2) == 32
-
-        return key1 + key2
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 64
-
-        data1, data2 = data[0:32], data[32:64]
-        return data1, data2
+    _key_codec = KeyCodec(("bytes32", "bytes32"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes32UuidKeysMixin(object):
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        assert type(key1) == bytes
-        assert len(key1) == 32
-
-        assert isinstance(key2, uuid.UUID)
-
-        return key1 + key2.bytes
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 48
-
-        data1, data2 = data[0:32], data[32:48]
-        return data1, uuid.UUID(bytes=data2)
+    _key_codec = KeyCodec(("bytes32", "uuid"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidBytes32KeysMixin(object):
@@ -1034,55 +753,17 @@ class _Bytes32StringKeysMixin(object):
 
 
 class _UuidUuidStringKeysMixin(object):
-    def _serialize_key(self, key1_key2_key3):
-        assert type(key1_key2_key3) == tuple and len(key1_key2_key3) == 3
-        key1, key2, key3 = key1_key2_key3
-
-        assert isinstance(key1, uuid.UUID)
-        assert isinstance(key2, uuid.UUID)
-        assert type(key3) == str
-
-        return key1.bytes + key2.bytes + key3.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) > 32
-
-        data1, data2, data3 = data[:16], data[16:32], data[32:]
-        return uuid.UUID(bytes=data1), uuid.UUID(bytes=data2), data3.decode("utf8")
+    _key_codec = KeyCodec(("uuid", "uuid", "string"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _UuidUuidUuidStringKeysMixin(object):
-    def _serialize_key(self, key1_key2_key3_key4):
-        assert type(key1_key2_key3_key4) == tuple and len(key1_key2_key3_key4) == 4
-        key1, key2, key3, key4 = key1_key2_key3_key4
-
-        assert isinstance(key1, uuid.UUID), "key1 must be a UUID, was {}: {}".format(
-            type(key1), key1
-        )
-        assert isinstance(key2, uuid.UUID), "key2 must be a UUID, was {}: {}".format(
-            type(key2), key2
-        )
-        assert isinstance(key3, uuid.UUID), "key3 must be a UUID, was {}: {}".format(
-            type(key3), key3
-        )
-        assert type(key4) == str, "key4 must be a str, was {}: {}".format(
-            type(key4), key4
-        )
-
-        return key1.bytes + key2.bytes + key3.bytes + key4.encode("utf8")
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) >= 48
-
-        data1, data2, data3, data4 = data[:16], data[16:32], data[32:48], data[48:]
-        return (
-            uuid.UUID(bytes=data1),
-            uuid.UUID(bytes=data2),
-            uuid.UUID(bytes=data3),
-            data4.decode("utf8"),
-        )
+    _key_codec = KeyCodec(("uuid", "uuid", "uuid", "string"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes20KeysMixin(object):
@@ -1090,19 +771,10 @@ class _Bytes20KeysMixin(object):
     def new_key():
         return os.urandom(20)
 
-    def _serialize_key(self, key):
-        assert type(key) == bytes and len(key) == 20, (
-            'key must be bytes[20], was "{}"'.format(key)
-        )
-
-        return key
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes and len(data) == 20, (
-            'data must be bytes[20], was "{}"'.format(data)
-        )
-
-        return data
+    _key_codec = KeyCodec(("bytes20",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes16KeysMixin(object):
@@ -1110,19 +782,10 @@ class _Bytes16KeysMixin(object):
     def new_key():
         return os.urandom(16)
 
-    def _serialize_key(self, key):
-        assert type(key) == bytes and len(key) == 16, (
-            'key must be bytes[16], was "{}"'.format(key)
-        )
-
-        return key
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes and len(data) == 16, (
-            'data must be bytes[16], was "{}"'.format(data)
-        )
-
-        return data
+    _key_codec = KeyCodec(("bytes16",))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes20Bytes20KeysMixin(object):
@@ -1130,24 +793,10 @@ class _Bytes20Bytes20KeysMixin(object):
     def new_key():
         return os.urandom(20), os.urandom(20)
 
-    def _serialize_key(self, key1_key2):
-        assert type(key1_key2) == tuple and len(key1_key2) == 2
-        key1, key2 = key1_key2
-
-        assert type(key1) == bytes
-        assert len(key1) == 20
-
-        assert type(key2) == bytes
-        assert len(key2) == 20
-
-        return key1 + key2
-
-    def _deserialize_key(self, data):
-        assert type(data) == bytes
-        assert len(data) == 40
-
-        data1, data2 = data[0:20], data[20:40]
-        return data1, data2
+    _key_codec = KeyCodec(("bytes20", "bytes20"))
+    _serialize_key = staticmethod(_key_codec.encode)
+    _deserialize_key = staticmethod(_key_codec.decode)
+    _serialize_key_prefix = staticmethod(_key_codec.encode_prefix)
 
 
 class _Bytes20StringKeysMixin(object):
@@ -1385,6 +1034,16 @@ class _TimestampValuesMixin(object):
         else:
             return None
 
+    def _serialize_values(self, values):
+        if not all(isinstance(value, np.datetime64) for value in values):
+            return [self._serialize_value(value) for value in values]
+        return dts_to_bytes(values)
+
+    def _deserialize_values(self, data):
+        if not all(_data and len(_data) == 8 for _data in data):
+            return [self._deserialize_value(_data) for _data in data]
+        return list(bytes_to_dts(data))
+
 
 class _Bytes32ValuesMixin(object):
     def _serialize_value(self, value):
@@ -1502,6 +1161,9 @@ class _JsonValuesMixin(object):
     def _deserialize_value(self, data):
         return self._unmarshal(json.loads(data.decode("utf8")))
 
+    def _deserialize_row(self, data):
+        return json.loads(data.decode("utf8"))
+
 
 class _CborValuesMixin(object):
     def __init__(self, marshal=None, unmarshal=None):
@@ -1527,6 +1189,9 @@ class _CborValuesMixin(object):
     def _deserialize_value(self, data):
         return self._unmarshal(cbor2.loads(data))
 
+    def _deserialize_row(self, data):
+        return cbor2.loads(data)
+
 
 class _PickleValuesMixin(object):
     # PROTOCOL = _NATIVE_PICKLE_PROTOCOL
@@ -1539,21 +1204,297 @@ class _PickleValuesMixin(object):
         return pickle.loads(data)
 
 
+_FBS_SCALAR_DTYPES = {
+    _FbsBaseType.UType: "<u1",
+    _FbsBaseType.Bool: "?",
+    _FbsBaseType.Byte: "<i1",
+    _FbsBaseType.UByte: "<u1",
+    _FbsBaseType.Short: "<i2",
+    _FbsBaseType.UShort: "<u2",
+    _FbsBaseType.Int: "<i4",
+    _FbsBaseType.UInt: "<u4",
+    _FbsBaseType.Long: "<i8",
+    _FbsBaseType.ULong: "<u8",
+    _FbsBaseType.Float: "<f4",
+    _FbsBaseType.Double: "<f8",
+}
+"""
+NumPy types of FlatBuffers scalars (which are stored little-endian) by reflection base type.
+"""
+
+
+def _key_array(keys):
+    # keys deserialized one by one are returned in an array of objects (e.g. tuples)
+    if isinstance(keys, np.ndarray):
+        return keys
+    array = np.empty(len(keys), dtype=object)
+    for i, key in enumerate(keys):
+        array[i] = key
+    return array
+
+
+def _fbs_gather(buf, pos, dtype):
+    # read (unaligned) scalars of the given type at the given positions
+    return buf[pos[:, None] + np.arange(dtype.itemsize)].view(dtype).reshape(-1)
+
+
+def _fbs_columns(values, layout):
+    """
+    Read scalar fields from a batch of FlatBuffers into arrays (one array per field),
+    vectorized over all records in the batch.
+
+    :param values: FlatBuffers (finished, with the root table offset at the start).
+    :param layout: List of ``(vtable_offset, dtype, default)`` of the fields to read.
+    :return: List of arrays of field values.
+    """
+    buf = np.frombuffer(b"".join(values), dtype=np.uint8)
+    start = np.zeros(len(values), dtype=np.int64)
+    np.cumsum([len(data) for data in values[:-1]], out=start[1:])
+
+    # root table, and vtable (at a signed offset from the table) of each record
+    table = start + _fbs_gather(buf, start, np.dtype("<u4"))
+    vtable = table - _fbs_gather(buf, table, np.dtype("<i4"))
+    vtable_size = _fbs_gather(buf, vtable, np.dtype("<u2"))
+
+    columns = []
+    for offset, dtype, default in layout:
+        column = np.full(len(values), default, dtype=dtype)
+
+        # fields not present in a record (older schema, or default value) keep the default
+        field = np.zeros(len(values), dtype=np.int64)
+        has_slot = vtable_size > offset
+        field[has_slot] = _fbs_gather(buf, vtable[has_slot] + offset, np.dtype("<u2"))
+        present = field != 0
+        column[present] = _fbs_gather(buf, table[present] + field[present], dtype)
+        columns.append(column)
+    return columns
+
+
 class _FlatBuffersValuesMixin(object):
+    # in zero-copy mode, the cast function is handed a memoryview into the memory map
+    _ZEROCOPY_VALUES = True
+
+    BUILDER_SIZE_MIN = 1024
+    """
+    Minimum initial size of FlatBuffers builders (in bytes).
+    """
+
+    BUILDER_SIZE_MAX = 2**20
+    """
+    Builders grown beyond this size (in bytes) are not kept for reuse.
+    """
+
+    COLUMNS_BATCH_SIZE = 65536
+    """
+    Number of records read into column arrays in one go (see :meth:`select_columns`).
+    """
+
     def __init__(self, build, cast):
         self._build = build or self._zlmdb_build
         self._cast = cast or self._zlmdb_cast
 
-    def _serialize_value(self, value):
-        builder = flatbuffers.Builder(0)
+        # table layout for reading fields into columns (see load_fbs_schema)
+        self._fbs_fields = None
+
+        # one builder per thread, reused across records
+        self._builders = threading.local()
+
+        # running average of serialized record sizes
+        self._builder_size = self.BUILDER_SIZE_MIN
+
+    def _builder(self):
+        builder = getattr(self._builders, "builder", None)
+        if builder is None:
+            # initial size: next power of two with headroom over the average record size
+            size = self.BUILDER_SIZE_MIN
+            while size < 2 * self._builder_size:
+                size *= 2
+            builder = flatbuffers.Builder(size)
+            self._builders.builder = builder
+        else:
+            builder.Clear()
+        return builder
+
+    def _serialize_value_view(self, value):
+        builder = self._builder()
         obj = self._build(value, builder)
         builder.Finish(obj)
-        buf = builder.Output()
-        return bytes(buf)
+
+        head = builder.Head()
+        self._builder_size += (len(builder.Bytes) - head - self._builder_size) // 8
+        if len(builder.Bytes) > self.BUILDER_SIZE_MAX:
+            self._builders.builder = None
+
+        return memoryview(builder.Bytes)[head:]
+
+    def _serialize_value(self, value):
+        return bytes(self._serialize_value_view(value))
 
     def _deserialize_value(self, data):
         return self._cast(data)
 
+    def load_fbs_schema(self, schema, name=None):
+        """
+        Load the layout of the FlatBuffers table stored in values of this map from a
+        FlatBuffers binary schema, for reading fields with :meth:`select_columns`.
+
+        :param schema: FlatBuffers binary schema (as generated by ``flatc --binary --schema``),
+            either a ``.bfbs`` file name, the schema data, a reflection ``Schema`` or
+            a codec for the table.
+        :type schema: str or bytes or zlmdb.flatbuffers.reflection.Schema.Schema or
+            zlmdb.FlatBuffersCodec
+
+        :param name: Fully qualified name of the FlatBuffers table, defaults to the
+            root type of the schema.
+        :type name: str
+        """
+        if not isinstance(schema, FlatBuffersCodec):
+            schema = FlatBuffersCodec(schema, name)
+
+        fields = {}
+        for field in schema.fields.values():
+            dtype = None
+            if field.base_type in _FBS_SCALAR_DTYPES:
+                dtype = np.dtype(_FBS_SCALAR_DTYPES[field.base_type])
+            default = 0 if field.default is None else field.default
+            fields[field.name] = (field.slot, dtype, default)
+        self._fbs_fields = fields
+
+    def select_columns(self, txn, fields, from_key=None, to_key=None):
+        """
+        Select scalar fields of all records in table, optionally within a given key range,
+        into NumPy arrays. Fields are read directly from the stored FlatBuffers (without
+        casting records into objects), in batches of ``COLUMNS_BATCH_SIZE`` records.
+
+        The table layout must have been loaded before using :meth:`load_fbs_schema`.
+
+        :param txn: The transaction in which to run.
+        :type txn: :class:`zlmdb.Transaction`
+
+        :param fields: Names of the (scalar) fields to select.
+        :type fields: list[str]
+
+        :param from_key: Select records starting from (and including) this key.
+
+        :param to_key: Select records up to (but not including) this key.
+
+        :return: Tuple ``(keys, columns)`` with an array of record keys (e.g. ``datetime64[ns]``
+            for timestamp keys), and a map of field names to arrays of field values.
+        :rtype: tuple[numpy.ndarray, dict[str, numpy.ndarray]]
+        """
+        if self._fbs_fields is None:
+            raise Exception("no FlatBuffers schema loaded for table")
+        layout = []
+        for field in fields:
+            if field not in self._fbs_fields:
+                raise Exception('no field "{}" in FlatBuffers table'.format(field))
+            offset, dtype, default = self._fbs_fields[field]
+            if dtype is None:
+                raise Exception('field "{}" is not a scalar'.format(field))
+            layout.append((offset, dtype, default))
+
+        keys = []
+        columns = [[] for _ in fields]
+        for _keys, _columns in self._select_columns_batches(
+            txn, layout, from_key, to_key, self.COLUMNS_BATCH_SIZE
+        ):
+            keys.append(_keys)
+            for i, column in enumerate(_columns):
+                columns[i].append(column)
+
+        if keys:
+            _keys = np.concatenate(keys)
+        else:
+            _keys = _key_array(self._deserialize_keys([]))
+        return _keys, {
+            field: np.concatenate(column) if column else np.empty(0, dtype=dtype)
+            for field, column, (_, dtype, _) in zip(fields, columns, layout)
+        }
+
+    def _select_columns_batches(self, txn, layout, from_key, to_key, batch_size):
+        """
+        Read scalar fields of all records in table, optionally within a given key range,
+        in batches of ``batch_size`` records.
+
+        :return: Generator of ``(keys, columns)`` with an array of record keys, and a
+            list of arrays of field values (in the order of ``layout``) per batch.
+        """
+        if from_key:
+            _from_key = self._prefix + self._serialize_key(from_key)
+        else:
+            _from_key = self._prefix
+        if to_key:
+            _to_key = self._prefix + self._serialize_key(to_key)
+        else:
+            _to_key = self._slot_end()
+
+        prefix_len = len(self._prefix)
+
+        with txn._txn.cursor(db=self._dbi) as cursor:
+            found = cursor.set_range(_from_key)
+            while found:
+                batch = cursor.getbatch(batch_size, bound=_to_key, values=True)
+                found = len(batch) == batch_size
+                if not batch:
+                    break
+
+                keys = _key_array(
+                    self._deserialize_keys(
+                        [bytes(key[prefix_len:]) for key, _ in batch]
+                    )
+                )
+
+                values = [data for _, data in batch]
+                if self._decompress:
+                    values = [self._decompress(data, txn) for data in values]
+                yield keys, _fbs_columns(values, layout)
+
+    def _arrow_columns(self, txn, columns, from_key, to_key):
+        # scalar fields are read vectorized, records with other fields are cast
+        if self._fbs_fields is None:
+            return None
+        if columns is None:
+            columns = [
+                field
+                for field, (_, dtype, _) in self._fbs_fields.items()
+                if dtype is not None
+            ]
+        layout = [
+            self._fbs_fields.get(column, (None, None, None)) for column in columns
+        ]
+        if any(dtype is None for _, dtype, _ in layout):
+            return None
+        return (
+            (keys, dict(zip(columns, _columns)))
+            for keys, _columns in self._select_columns_batches(
+                txn, layout, from_key, to_key, self.ARROW_BATCH_SIZE
+            )
+        )
+
+
+class _FlexBuffersValuesMixin(object):
+    """
+    Schemaless values (``None``, bool, int, float, str, bytes and lists and dicts of
+    these) serialized using FlexBuffers.
+
+    Values are read as lazy FlexBuffers references (``flexbuffers.Ref``) over the stored
+    buffer, in zero-copy mode (see :meth:`zlmdb.Database.begin`) backed by the LMDB
+    memory map. Only the parts of a value actually accessed are decoded, e.g. for
+    ``ref.AsMap["name"].AsString``, and ``ref.Value`` decodes the whole value.
+    """
+
+    # zero-copy mode returns references into the memory map
+    _ZEROCOPY_VALUES = True
+
+    def _serialize_value(self, value):
+        return bytes(flexbuffers.Dumps(value))
+
+    def _deserialize_value(self, data):
+        return flexbuffers.GetRoot(data)
+
+    def _deserialize_row(self, data):
+        return flexbuffers.Loads(data)
+
 
 class _Pickle5ValuesMixin(object):
     """
@@ -1569,7 +1510,10 @@ class _Pickle5ValuesMixin(object):
 
     PROTOCOL = 5
 
-    def _serialize_value(self, value):
+    # in zero-copy mode, out-of-band buffers are memoryviews into the memory map
+    _ZEROCOPY_VALUES = True
+
+    def _serialize_value_parts(self, value):
         obj_buffers = []
         obj_data = pickle.dumps(
             value, protocol=self.PROTOCOL, buffer_callback=obj_buffers.append
@@ -1578,9 +1522,13 @@ class _Pickle5ValuesMixin(object):
         data.append(struct.pack(">I", len(obj_data)))
         data.append(obj_data)
         for d in obj_buffers:
-            data.append(struct.pack(">I", len(d.raw())))
+            d = d.raw()
+            data.append(struct.pack(">I", len(d)))
             data.append(d)
-        return b"".join(data)
+        return data
+
+    def _serialize_value(self, value):
+        return b"".join(self._serialize_value_parts(value))
 
     def _deserialize_value(self, data):
         data = memoryview(data)
@@ -1594,3 +1542,87 @@ class _Pickle5ValuesMixin(object):
             obj_buffers.append(buffer_data)
             i += 4 + buffer_len
         return pickle.loads(obj_data, buffers=obj_buffers)
+
+
+class _NdarrayValuesMixin(object):
+    """
+    NumPy array values, stored as a fixed header followed by the raw array data.
+
+    The header holds the dtype, memory order and shape of the array, and is padded
+    to a multiple of ``ALIGNMENT`` bytes, so that array data is aligned whenever the
+    value itself is (e.g. for large values stored on LMDB overflow pages). Arrays are
+    read with ``np.frombuffer()`` without copying, and are read-only. In zero-copy mode
+    (see :meth:`zlmdb.Database.begin`), arrays are backed by the LMDB memory map.
+
+    Only arrays of plain (non-object, non-structured) dtypes are supported.
+    """
+
+    # zero-copy mode returns arrays backed by the memory map
+    _ZEROCOPY_VALUES = True
+
+    ALIGNMENT = 16
+
+    def _serialize_value_parts(self, value):
+        assert isinstance(value, np.ndarray)
+        assert not value.dtype.hasobject and value.dtype.fields is None
+
+        order = (
+            "F" if value.flags.f_contiguous and not value.flags.c_contiguous else "C"
+        )
+
+        # header: total header size, order, dtype and shape
+        dtype = value.dtype.str.encode("ascii")
+        header = (
+            struct.pack(">HcB", 0, order.encode("ascii"), len(dtype))
+            + dtype
+            + struct.pack(">B{}Q".format(value.ndim), value.ndim, *value.shape)
+        )
+        header += b"\0" * (-len(header) % self.ALIGNMENT)
+        header = struct.pack(">H", len(header)) + header[2:]
+
+        # a view on the array data for contiguous arrays, a copy otherwise
+        data = np.ascontiguousarray(value.reshape(-1, order=order)).view(np.uint8)
+        return [header, memoryview(data)]
+
+    def _serialize_value(self, value):
+        return b"".join(self._serialize_value_parts(value))
+
+    def _deserialize_value(self, data):
+        header_len, order, dtype_len = struct.unpack(">HcB", data[0:4])
+        i = 4 + dtype_len
+        dtype = np.dtype(bytes(data[4:i]).decode("ascii"))
+        ndim = data[i]
+        shape = struct.unpack(">{}Q".format(ndim), data[i + 1 : i + 1 + 8 * ndim])
+
+        count = 1
+        for n in shape:
+            count *= n
+        value = np.frombuffer(data, dtype=dtype, count=count, offset=header_len)
+        return value.reshape(shape, order=order.decode("ascii"))
+
+
+class _ArrowValuesMixin(object):
+    """
+    Apache Arrow table values, stored as Arrow IPC streams. Record batches and pandas
+    data frames are stored (and read back) as tables.
+
+    Tables are read with ``pa.ipc.open_stream()`` without copying, and in zero-copy mode
+    (see :meth:`zlmdb.Database.begin`), are backed by the LMDB memory map.
+    """
+
+    # zero-copy mode returns tables backed by the memory map
+    _ZEROCOPY_VALUES = True
+
+    def _serialize_value_parts(self, value):
+        if not isinstance(value, (pa.Table, pa.RecordBatch)):
+            value = pa.Table.from_pandas(value)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, value.schema) as writer:
+            writer.write(value)
+        return [memoryview(sink.getvalue()).cast("B")]
+
+    def _serialize_value(self, value):
+        return self._serialize_value_parts(value)[0].tobytes()
+
+    def _deserialize_value(self, data):
+        return pa.ipc.open_stream(pa.py_buffer(data)).read_all()
@@ -288,7 +288,12 @@ class Buf:
 
   def __getitem__(self, key):
     if isinstance(key, slice):
-      return self._buf[_ShiftSlice(key, self._offset, self._length)]
+      # zlmdb adaptation: slices of memoryview buffers (e.g. into the LMDB memory
+      # map) are returned as bytes, which can be compared, decoded and searched.
+      data = self._buf[_ShiftSlice(key, self._offset, self._length)]
+      if isinstance(data, memoryview):
+        return data.tobytes()
+      return data
     elif isinstance(key, int):
       return self._buf[self._offset + key]
     else:
@@ -307,6 +312,14 @@ class Buf:
 
   def Find(self, sub):
     """Returns the lowest index where the sub subsequence is found."""
+    # zlmdb adaptation: memoryview buffers have no find(), and are searched for
+    # single bytes (the only use, finding the end of keys) in place.
+    if isinstance(self._buf, memoryview):
+      buf = self._buf
+      for i in range(self._offset, len(buf)):
+        if buf[i] == sub:
+          return i - self._offset
+      return -1
     return self._buf[self._offset :].find(sub)
 
   def Slice(self, offset):
@@ -258,6 +258,63 @@ class PutmultiTest(CursorTestBase):
             assert c.put(B('b'), B('value1'), append=True)
             assert c.put(B('b'), B('value2'), append=True)
 
+class GetbatchTest(CursorTestBase):
+    def setUp(self):
+        super().setUp()
+        testlib.putData(self.txn)
+
+    def test_unpositioned(self):
+        self.assertEqual([], self.c.getbatch(10))
+
+    def test_batches(self):
+        self.assertTrue(self.c.first())
+        self.assertEqual(testlib.ITEMS[:2], self.c.getbatch(2))
+        self.assertEqual(B('baa'), self.c.key())
+        self.assertEqual(testlib.ITEMS[2:], self.c.getbatch(10))
+        self.assertEqual(B(''), self.c.key())
+        self.assertEqual([], self.c.getbatch(10))
+
+    def test_bound(self):
+        self.assertTrue(self.c.set_range(B('b')))
+        self.assertEqual(testlib.KEYS[1:3],
+                         self.c.getbatch(10, bound=B('c'), values=False))
+        self.assertTrue(self.c.last())
+        self.assertEqual(testlib.REV_ITEMS[:3],
+                         self.c.getbatch(10, bound=B('b'), reverse=True))
+
+    def test_mutation(self):
+        self.assertTrue(self.c.first())
+        self.assertEqual(testlib.ITEMS[:1], self.c.getbatch(1))
+        self.txn.put(B('ba'), B('x'))
+        self.assertEqual([BT('b', ''), BT('ba', 'x')], self.c.getbatch(2))
+
+
+class CountTest(CursorTestBase):
+    def test_count_range(self):
+        self.assertEqual(0, self.c.count_range(B('')))
+        testlib.putData(self.txn)
+        self.assertEqual(4, self.c.count_range(B('')))
+        self.assertEqual(2, self.c.count_range(B('b'), B('c')))
+        self.assertEqual(1, self.c.count_range(B('ba'), B('c')))
+        self.assertEqual(0, self.c.count_range(B('c'), B('b')))
+        self.assertEqual(3, self.c.count_range(B('b')))
+        self.assertEqual(B(''), self.c.key())
+
+    def test_count_prefix(self):
+        testlib.putData(self.txn)
+        self.assertEqual(4, self.c.count_prefix(B('')))
+        self.assertEqual(2, self.c.count_prefix(B('b')))
+        self.assertEqual(1, self.c.count_prefix(B('ba')))
+        self.assertEqual(0, self.c.count_prefix(B('c')))
+
+    def test_count_dupsort(self):
+        db1 = self.env.open_db(B('db1'), dupsort=True, txn=self.txn)
+        with self.txn.cursor(db=db1) as c:
+            c.putmulti([BT('a', '1'), BT('b', '1'), BT('b', '2'), BT('c', '1')])
+            self.assertEqual(3, c.count_range(B('b')))
+            self.assertEqual(2, c.count_prefix(B('b')))
+
+
 class ReplaceTest(CursorTestBase):
     def test_replace(self):
         assert None is self.c.replace(B('a'), B(''))
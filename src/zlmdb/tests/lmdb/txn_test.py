@@ -555,6 +555,41 @@ class PutTest(unittest.TestCase):
         assert txn.put(B('a'), B('b'), dupdata=True)
         txn.get(B('a'))
 
+    def test_buffer_value(self):
+        _, env = testlib.temp_env()
+        txn = env.begin(write=True)
+        assert txn.put(B('a'), memoryview(bytearray(B('xabc')))[1:])
+        assert txn.put(B('b'), bytearray(B('def')))
+        self.assertEqual(B('abc'), txn.get(B('a')))
+        self.assertEqual(B('def'), txn.get(B('b')))
+
+
+class ReserveTest(unittest.TestCase):
+    def tearDown(self):
+        testlib.cleanup()
+
+    def test_reserve(self):
+        _, env = testlib.temp_env()
+        txn = env.begin(write=True)
+        buf = txn.reserve(B('a'), 3)
+        self.assertEqual(3, len(buf))
+        buf[:] = B('abc')
+        self.assertEqual(B('abc'), txn.get(B('a')))
+
+    def test_reserve_no_overwrite(self):
+        _, env = testlib.temp_env()
+        txn = env.begin(write=True)
+        assert txn.put(B('a'), B('a'))
+        self.assertEqual(None, txn.reserve(B('a'), 3, overwrite=False))
+        self.assertEqual(B('a'), txn.get(B('a')))
+
+    def test_reserve_dupsort(self):
+        _, env = testlib.temp_env()
+        txn = env.begin(write=True)
+        db = env.open_db(B('db1'), txn=txn, dupsort=True)
+        self.assertRaises(lmdb.InvalidParameterError,
+            lambda: txn.reserve(B('a'), 3, db=db))
+
 
 class ReplaceTest(unittest.TestCase):
     def tearDown(self):
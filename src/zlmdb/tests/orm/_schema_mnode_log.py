@@ -973,8 +973,8 @@ class MNodeLog(object):
 
     @staticmethod
     def cast(buf):
-        assert type(buf) in [bytes, bytearray], "bytes expected, got {}".format(
-            type(buf)
+        assert type(buf) in [bytes, bytearray, memoryview], (
+            "bytes expected, got {}".format(type(buf))
         )
         return MNodeLog(_MNodeLogGen.GetRootAsMNodeLog(buf, 0))
 
@@ -0,0 +1,421 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) typedef int GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+import os
+import sys
+import pytest
+import logging
+
+import txaio
+
+txaio.use_twisted()
+
+import zlmdb  # noqa
+
+try:
+    from tempfile import TemporaryDirectory
+except ImportError:
+    from backports.tempfile import TemporaryDirectory  # type:ignore
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from _schema_py3 import User  # noqa
+
+
+@zlmdb.table("8f9c3a36-3d0c-4b55-a3e1-2b40f1c4a0d1")
+class DbiUsers(zlmdb.MapOidPickle):
+    """
+    Users table.
+    """
+
+
+@zlmdb.table("5a1e4b8e-97a4-4c7c-b5f0-6f0d5d2b6c93")
+class DbiIndexUsersByAuthid(zlmdb.MapStringOid):
+    """
+    Index on users table by authid.
+    """
+
+
+@zlmdb.table("c6f3d9a2-1b7e-4f0a-8d5c-3e9b7a214f60", dupsort=True, dupfixed=True)
+class DbiIndexUsersByRealm(zlmdb.MapOidOid):
+    """
+    Non-unique index on users table by realm.
+    """
+
+
+@zlmdb.table("e2b7c1d4-5f3a-4e8b-9c6d-0a1f2b3c4d5e", dupsort=True)
+class DbiIndexUsersByRealmCovering(zlmdb.MapOidOid):
+    """
+    Non-unique covering index on users table by realm.
+    """
+
+
+class DbiSchema(object):
+    users = None
+    idx_users_by_authid = None
+
+    @staticmethod
+    def attach(db):
+        schema = DbiSchema()
+        schema.users = db.attach_table(DbiUsers)
+        schema.idx_users_by_authid = db.attach_table(DbiIndexUsersByAuthid)
+        schema.users.attach_index(
+            "idx1", schema.idx_users_by_authid, lambda user: user.authid
+        )
+        return schema
+
+
+class DbiSchema2(object):
+    users = None
+    idx_users_by_realm = None
+
+    @staticmethod
+    def attach(db):
+        schema = DbiSchema2()
+        schema.users = db.attach_table(DbiUsers)
+        schema.idx_users_by_realm = db.attach_table(DbiIndexUsersByRealm)
+        schema.users.attach_index(
+            "idx2",
+            schema.idx_users_by_realm,
+            lambda user: user.realm_oid,
+            nullable=True,
+            unique=False,
+        )
+        return schema
+
+
+@pytest.fixture(scope="module")
+def testset1():
+    users = []
+    for j in range(10):
+        for i in range(100):
+            user = User.create_test_user(oid=j * 100 + i, realm_oid=j)
+            users.append(user)
+    return users
+
+
+def test_dbi_storage(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            schema = DbiSchema.attach(db)
+            assert schema.users.is_dbi()
+            assert schema.idx_users_by_authid.is_dbi()
+
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    schema.users[txn, user.oid] = user
+                schema.users.put_many(
+                    txn, [(user.oid, user) for user in testset1[500:]]
+                )
+
+            with db.begin() as txn:
+                assert schema.users.count(txn) == len(testset1)
+                assert schema.idx_users_by_authid.count(txn) == len(testset1)
+                assert schema.idx_users_by_authid.count(txn, "test-1") == 111
+                assert schema.users.count_range(txn, 100, 200) == 100
+
+                oids = [oid for oid in schema.users.select(txn, return_values=False)]
+                assert oids == [user.oid for user in testset1]
+
+                oids = [
+                    oid
+                    for oid in schema.users.select(
+                        txn, return_values=False, reverse=True, limit=10
+                    )
+                ]
+                assert oids == [user.oid for user in reversed(testset1)][:10]
+
+                for user in testset1:
+                    assert schema.users[txn, user.oid] == user
+                    assert schema.idx_users_by_authid[txn, user.authid] == user.oid
+
+                # nothing stored in the main database outside the metadata area
+                cursor = txn._txn.cursor()
+                assert cursor.set_range(b"\0\1")
+                assert cursor.key().startswith(b"zlmdb-slot-")
+
+            with db.begin(write=True) as txn:
+                del schema.users[txn, testset1[0].oid]
+                assert schema.users.count(txn) == len(testset1) - 1
+                assert schema.idx_users_by_authid[txn, testset1[0].authid] is None
+
+                schema.users.truncate(txn)
+                assert schema.users.count(txn) == 0
+                assert schema.idx_users_by_authid.count(txn) == 0
+
+            slots = db.stats(include_slots=True)["slots"]
+            assert len(slots) == 2
+            for slot in slots:
+                assert slot["storage"] == "dbi"
+                assert slot["records"] == 0
+
+
+def test_dbi_migrate(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath) as db:
+            schema = DbiSchema.attach(db)
+            assert not schema.users.is_dbi()
+            with db.begin(write=True) as txn:
+                for user in testset1:
+                    schema.users[txn, user.oid] = user
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            # prefix mode tables require an explicit migration
+            with pytest.raises(RuntimeError):
+                DbiSchema.attach(db)
+
+            moved = db.migrate_to_dbi()
+            assert moved == {
+                DbiUsers._zlmdb_oid: len(testset1),
+                DbiIndexUsersByAuthid._zlmdb_oid: len(testset1),
+            }
+
+            schema = DbiSchema.attach(db)
+            with db.begin() as txn:
+                assert schema.users.count(txn) == len(testset1)
+                for user in testset1:
+                    assert schema.users[txn, user.oid] == user
+                    assert schema.idx_users_by_authid[txn, user.authid] == user.oid
+
+        # .. and the other way round
+        with zlmdb.Database(dbpath) as db:
+            with pytest.raises(RuntimeError):
+                DbiSchema.attach(db)
+
+
+def test_dbi_dupsort_index(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            schema = DbiSchema2.attach(db)
+            assert schema.idx_users_by_realm.is_dupsort()
+
+            with pytest.raises(Exception):
+                schema.users.attach_index(
+                    "idx3", schema.idx_users_by_realm, lambda user: user.realm_oid
+                )
+
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    schema.users[txn, user.oid] = user
+                schema.users.put_many(
+                    txn, [(user.oid, user) for user in testset1[500:]]
+                )
+
+            with db.begin() as txn:
+                assert schema.idx_users_by_realm.count(txn) == len(testset1)
+                for realm_oid in range(10):
+                    users = list(schema.users.select_by_index(txn, "idx2", realm_oid))
+                    assert len(users) == 100
+                    assert [oid for oid, _ in users] == [
+                        realm_oid * 100 + i for i in range(100)
+                    ]
+                    for oid, user in users:
+                        assert user.oid == oid
+                        assert user.realm_oid == realm_oid
+
+                oids = list(
+                    schema.users.select_by_index(txn, "idx2", 5, return_values=False)
+                )
+                assert oids == list(range(500, 600))
+                assert list(schema.users.select_by_index(txn, "idx2", 23)) == []
+
+                oids = list(
+                    schema.users.select_by_index(
+                        txn, "idx2", 5, return_values=False, reverse=True, limit=10
+                    )
+                )
+                assert oids == list(range(599, 589, -1))
+
+                # index range scans walk all duplicates of index keys
+                res = list(
+                    schema.users.select_by_index(txn, "idx2", from_key=3, to_key=5)
+                )
+                assert [oid for oid, _ in res] == list(range(300, 500))
+                assert [user.oid for _, user in res] == list(range(300, 500))
+                oids = list(
+                    schema.users.select_by_index(
+                        txn,
+                        "idx2",
+                        from_key=3,
+                        to_key=5,
+                        return_values=False,
+                        reverse=True,
+                    )
+                )
+                assert oids == list(range(499, 299, -1))
+
+            # move users between realms, and delete some
+            with db.begin(write=True) as txn:
+                for user in testset1[:50]:
+                    user = User.create_test_user(oid=user.oid, realm_oid=9)
+                    schema.users[txn, user.oid] = user
+                items = []
+                for user in testset1[50:100]:
+                    user = User.create_test_user(oid=user.oid, realm_oid=8)
+                    items.append((user.oid, user))
+                schema.users.put_many(txn, items)
+                for user in testset1[900:910]:
+                    del schema.users[txn, user.oid]
+
+            with db.begin() as txn:
+                assert schema.idx_users_by_realm.count(txn) == len(testset1) - 10
+                pks = schema.users.select_by_index
+                assert list(pks(txn, "idx2", 0, return_values=False)) == []
+                assert list(pks(txn, "idx2", 8, return_values=False)) == list(
+                    range(50, 100)
+                ) + list(range(800, 900))
+                assert list(pks(txn, "idx2", 9, return_values=False)) == list(
+                    range(0, 50)
+                ) + list(range(910, 1000))
+
+            with db.begin(write=True) as txn:
+                schema.users.truncate(txn)
+                assert schema.idx_users_by_realm.count(txn) == 0
+
+        # dupsort tables require storage mode "dbi"
+        with TemporaryDirectory() as dbpath2:
+            with zlmdb.Database(dbpath2) as db:
+                with pytest.raises(RuntimeError):
+                    db.attach_table(DbiIndexUsersByRealm)
+
+
+def test_dbi_dupsort_covering_index(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            users = db.attach_table(DbiUsers)
+            idx_users_by_realm = db.attach_table(DbiIndexUsersByRealmCovering)
+            users.attach_index(
+                "idx3",
+                idx_users_by_realm,
+                lambda user: user.realm_oid,
+                unique=False,
+                projection=lambda user: user.name,
+            )
+
+            with db.begin(write=True) as txn:
+                users.put_many(txn, [(user.oid, user) for user in testset1])
+
+            with db.begin() as txn:
+                res = list(users.select_by_index(txn, "idx3", 4, covering=True))
+                assert res == [(user.oid, user.name) for user in testset1[400:500]]
+
+            # changing only the projected payload must replace the index duplicate
+            with db.begin(write=True) as txn:
+                for user in testset1[400:410]:
+                    user = User.create_test_user(oid=user.oid, realm_oid=4)
+                    user.name = "Renamed {}".format(user.oid)
+                    users[txn, user.oid] = user
+
+            with db.begin() as txn:
+                assert idx_users_by_realm.count(txn) == len(testset1)
+                res = list(users.select_by_index(txn, "idx3", 4, covering=True))
+                assert len(res) == 100
+                assert res[:10] == [
+                    (oid, "Renamed {}".format(oid)) for oid in range(400, 410)
+                ]
+
+
+def test_dbi_dupfixed_covering_index():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            users = db.attach_table(DbiUsers)
+            idx_users_by_realm = db.attach_table(DbiIndexUsersByRealm)
+
+            # index record values with projections vary in size
+            with pytest.raises(Exception, match="dupfixed"):
+                users.attach_index(
+                    "idx3",
+                    idx_users_by_realm,
+                    lambda user: user.realm_oid,
+                    unique=False,
+                    projection=lambda user: user.name,
+                )
+            assert "idx3" not in users.indexes()
+
+
+def test_dbi_flags_mismatch():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            idx_users_by_realm = db.attach_table(DbiIndexUsersByRealm)
+            slot = idx_users_by_realm._slot
+
+            # the sub-database handle is reused only with matching flags
+            with db.begin(write=True) as txn:
+                assert db._open_dbi(slot, txn) is idx_users_by_realm._dbi
+                assert db._open_dbi(slot, txn, dupsort=True, dupfixed=True) is (
+                    idx_users_by_realm._dbi
+                )
+                with pytest.raises(RuntimeError):
+                    db._open_dbi(slot, txn, dupsort=True, dupfixed=False)
+
+        # sub-databases keep the flags they were created with
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            assert db.stats(include_slots=True)["slots"][0]["records"] == 0
+            with db.begin(write=True) as txn:
+                with pytest.raises(RuntimeError):
+                    db._open_dbi(slot, txn, dupsort=False, dupfixed=False)
+            idx_users_by_realm = db.attach_table(DbiIndexUsersByRealm)
+            with db.begin() as txn:
+                assert idx_users_by_realm._dbi is db._open_dbi(slot, txn)
+
+            with db.begin(write=True) as txn:
+                idx_users_by_realm[txn, 1] = 2
+
+            # deleting the slot drops its sub-database, which can then be reused
+            # with other flags
+            db._set_slot(slot, None)
+            assert slot not in db._dbis
+            with db.begin(write=True) as txn:
+                dbi = db._open_dbi(slot, txn, dupsort=False, dupfixed=False)
+                assert txn._txn.stat(dbi)["entries"] == 0
+
+
+def test_dbi_short_meta_keys():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            users = db.attach_table(DbiUsers)
+            with db.begin(write=True) as txn:
+                txn._txn.put(b"\0\0", b"")
+                txn._txn.put(b"\0\0\0", b"")
+
+        # keys in the metadata area too short for slot records are skipped
+        with zlmdb.Database(dbpath, storage="dbi") as db:
+            db._cache_slots()
+            assert db._slots_by_index == {DbiUsers._zlmdb_oid: users._slot}
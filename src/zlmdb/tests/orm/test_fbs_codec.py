@@ -0,0 +1,264 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) typedef int GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+import os
+import logging
+
+import numpy as np
+import pytest
+
+import txaio
+
+txaio.use_twisted()
+
+import zlmdb  # noqa
+from zlmdb.flatbuffers.reflection.BaseType import BaseType
+from zlmdb.flatbuffers.reflection.Schema import Schema as ReflectionSchema
+
+try:
+    from tempfile import TemporaryDirectory
+except ImportError:
+    from backports.tempfile import TemporaryDirectory  # type:ignore
+
+REFLECTION_BFBS = os.path.join(
+    os.path.dirname(zlmdb.flatbuffers.__file__), "reflection.bfbs"
+)
+
+
+def _field(name, field_id, base_type, **kwargs):
+    field_type = {"base_type": base_type}
+    for attr in ["element", "index"]:
+        if attr in kwargs:
+            field_type[attr] = kwargs.pop(attr)
+    field = {
+        "name": name,
+        "id": field_id,
+        "offset": 4 + 2 * field_id,
+        "type": field_type,
+    }
+    field.update(kwargs)
+    return field
+
+
+def _test_bfbs():
+    """
+    Build the FlatBuffers binary schema for this schema (using the codec for
+    the reflection schema itself):
+
+    .. code-block::
+
+        namespace test;
+
+        struct Point { x: float; y: float; z: short; }
+
+        table Sample {
+            timestamp: ulong; name: string; pos: Point; tags: [string];
+            values: [double]; raw: [ubyte]; child: Sample; points: [Point];
+            flag: bool = true; level: byte = -1; ratio: float = 0.5;
+            removed: int (deprecated); children: [Sample];
+        }
+
+        root_type Sample;
+    """
+    point = {
+        "name": "test.Point",
+        "is_struct": True,
+        "minalign": 4,
+        "bytesize": 12,
+        "fields": [
+            {"name": "x", "id": 0, "offset": 0, "type": {"base_type": BaseType.Float}},
+            {"name": "y", "id": 1, "offset": 4, "type": {"base_type": BaseType.Float}},
+            {
+                "name": "z",
+                "id": 2,
+                "offset": 8,
+                "padding": 2,
+                "type": {"base_type": BaseType.Short},
+            },
+        ],
+    }
+    sample = {
+        "name": "test.Sample",
+        "fields": sorted(
+            [
+                _field("timestamp", 0, BaseType.ULong),
+                _field("name", 1, BaseType.String),
+                _field("pos", 2, BaseType.Obj, index=0),
+                _field("tags", 3, BaseType.Vector, element=BaseType.String),
+                _field("values", 4, BaseType.Vector, element=BaseType.Double),
+                _field("raw", 5, BaseType.Vector, element=BaseType.UByte),
+                _field("child", 6, BaseType.Obj, index=1),
+                _field("points", 7, BaseType.Vector, element=BaseType.Obj, index=0),
+                _field("flag", 8, BaseType.Bool, default_integer=1),
+                _field("level", 9, BaseType.Byte, default_integer=-1),
+                _field("ratio", 10, BaseType.Float, default_real=0.5),
+                _field("removed", 11, BaseType.Int, deprecated=True),
+                _field("children", 12, BaseType.Vector, element=BaseType.Obj, index=1),
+            ],
+            key=lambda field: field["name"],
+        ),
+    }
+
+    codec = zlmdb.FlatBuffersCodec(REFLECTION_BFBS)
+    builder = zlmdb.flatbuffers.Builder(0)
+    builder.Finish(
+        codec.build({"objects": [point, sample], "root_table": sample}, builder)
+    )
+    return bytes(builder.Output())
+
+
+@pytest.fixture(scope="module")
+def codec():
+    return zlmdb.FlatBuffersCodec(_test_bfbs())
+
+
+def _sample(i):
+    return {
+        "timestamp": 1000 + i,
+        "name": "sample-{}".format(i),
+        "pos": {"x": 1.5, "y": -2.0, "z": i},
+        "tags": ["a", "b{}".format(i)],
+        "values": [0.25 * i, 1.0],
+        "raw": os.urandom(16),
+        "child": {"name": "child-{}".format(i), "flag": False},
+        "points": [{"x": 0.0, "y": 1.0, "z": -1}, {"x": 2.0, "y": 3.0, "z": 7}],
+        "level": 3,
+    }
+
+
+def _build(codec, value):
+    builder = zlmdb.flatbuffers.Builder(0)
+    builder.Finish(codec.build(value, builder))
+    return bytes(builder.Output())
+
+
+def test_codec_roundtrip(codec):
+    assert codec.name == "test.Sample"
+    assert "removed" not in codec.fields
+
+    value = _sample(1)
+    record = codec.cast(_build(codec, value))
+    for name in value:
+        if name != "child":
+            assert getattr(record, name) == value[name]
+            assert record[name] == value[name]
+    assert isinstance(record.child, zlmdb.FlatBuffersRecord)
+    assert record.child.name == "child-1"
+    assert record.child.flag is False
+
+    # fields not set read as defaults
+    assert record.flag is True
+    assert record.ratio == 0.5
+    assert record.children is None
+    assert record.child.level == -1
+    assert record.child.timestamp == 0
+    assert record.child.child is None
+
+    with pytest.raises(AttributeError):
+        record.removed
+    with pytest.raises(KeyError):
+        record["removed"]
+
+    # fields are read only once
+    assert record.tags is record.tags
+
+    data = record.to_dict()
+    assert data["child"]["name"] == "child-1"
+    assert data["children"] is None
+
+    # records can be built from records (and other objects)
+    value = _sample(2)
+    value["children"] = [record, _sample(3)]
+    record = codec.cast(_build(codec, value))
+    assert [child.name for child in record.children] == ["sample-1", "sample-3"]
+    assert record.children[0].child.name == "child-1"
+    assert record.to_dict()["children"][0] == data
+
+
+def test_codec_reflection():
+    # the codec reads the reflection schema (as generated classes for it do)
+    with open(REFLECTION_BFBS, "rb") as f:
+        data = f.read()
+    schema = ReflectionSchema.GetRootAs(data, 0)
+    codec = zlmdb.FlatBuffersCodec(REFLECTION_BFBS)
+    record = codec.cast(data)
+
+    assert codec.name == "reflection.Schema"
+    assert record.file_ident == schema.FileIdent().decode("utf8")
+    assert record.root_table.name == schema.RootTable().Name().decode("utf8")
+    assert len(record.objects) == schema.ObjectsLength()
+    for i, obj in enumerate(record.objects):
+        _obj = schema.Objects(i)
+        assert obj.name == _obj.Name().decode("utf8")
+        assert obj.is_struct == _obj.IsStruct()
+        for j, field in enumerate(obj.fields):
+            _field = _obj.Fields(j)
+            assert field.name == _field.Name().decode("utf8")
+            assert field.offset == _field.Offset()
+            assert field.type.base_type == _field.Type().BaseType()
+            assert field.type.index == _field.Type().Index()
+            assert field.default_integer == _field.DefaultInteger()
+
+    # and builds it
+    assert codec.cast(_build(codec, record)).to_dict() == record.to_dict()
+
+    with pytest.raises(Exception):
+        zlmdb.FlatBuffersCodec(REFLECTION_BFBS, "reflection.Unknown")
+
+
+def test_codec_pmap(codec, N=100):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        samples = zlmdb.MapTimestampFlatBuffers(1, build=codec.build, cast=codec.cast)
+        samples.load_fbs_schema(codec)
+
+        with zlmdb.Database(dbpath) as db:
+            data = {}
+            with db.begin(write=True) as txn:
+                for i in range(N):
+                    key = np.datetime64(i, "ns")
+                    data[key] = _sample(i)
+                    samples[txn, key] = data[key]
+
+            for buffers in [False, True]:
+                with db.begin(buffers=buffers) as txn:
+                    for key, record in samples.select(txn):
+                        assert isinstance(record, zlmdb.FlatBuffersRecord)
+                        assert record.name == data[key]["name"]
+                        assert record.pos == data[key]["pos"]
+                        assert record.raw == data[key]["raw"]
+
+                    keys, columns = samples.select_columns(
+                        txn, ["timestamp", "level", "flag", "ratio"]
+                    )
+                    assert list(keys) == sorted(data)
+                    assert list(columns["timestamp"]) == [1000 + i for i in range(N)]
+                    assert (columns["level"] == 3).all()
+                    assert columns["flag"].all()
+                    assert (columns["ratio"] == 0.5).all()
+                    with pytest.raises(Exception):
+                        samples.select_columns(txn, ["pos"])
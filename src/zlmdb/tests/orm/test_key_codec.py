@@ -0,0 +1,243 @@
+###############################################################################
+#
+# The MIT License (MIT)
+#
+# Copyright (c) typedef int GmbH
+#
+# Permission is hereby granted, free of charge, to any person obtaining a copy
+# of this software and associated documentation files (the "Software"), to deal
+# in the Software without restriction, including without limitation the rights
+# to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+# copies of the Software, and to permit persons to whom the Software is
+# furnished to do so, subject to the following conditions:
+#
+# The above copyright notice and this permission notice shall be included in
+# all copies or substantial portions of the Software.
+#
+# THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+# IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+# FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+# AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+# LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+# OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN
+# THE SOFTWARE.
+#
+###############################################################################
+
+
+import struct
+import uuid
+import logging
+
+import numpy as np
+import pytest
+
+try:
+    from tempfile import TemporaryDirectory
+except ImportError:
+    from backports.tempfile import TemporaryDirectory  # type:ignore
+
+import txaio
+
+txaio.use_twisted()
+
+import zlmdb  # noqa
+from zlmdb._types import dt_to_bytes
+
+
+def test_key_codec_formats():
+    u1, u2 = uuid.uuid4(), uuid.uuid4()
+    ts = np.datetime64(1700000000123456789, "ns")
+    b32 = bytes(range(32))
+
+    # keys, and their serialization in the formats of the original key mixins
+    cases = [
+        (("oid",), 23, struct.pack(">Q", 23)),
+        (("oid", "oid", "oid"), (1, 2, 3), struct.pack(">QQQ", 1, 2, 3)),
+        (("string",), "hello", b"hello"),
+        (("uuid",), u1, u1.bytes),
+        (("timestamp",), ts, dt_to_bytes(ts)),
+        (("bytes32",), b32, b32),
+        (("uint16", "uuid"), (7, u1), struct.pack(">H", 7) + u1.bytes),
+        (("bytes32", "uuid"), (b32, u2), b32 + u2.bytes),
+        (
+            ("uuid", "timestamp", "uuid"),
+            (u1, ts, u2),
+            u1.bytes + dt_to_bytes(ts) + u2.bytes,
+        ),
+        (
+            ("timestamp", "uuid", "string"),
+            (ts, u1, "abc"),
+            dt_to_bytes(ts) + u1.bytes + b"abc",
+        ),
+        (("string", "timestamp"), ("sensor", ts), b"sensor" + dt_to_bytes(ts)),
+        (
+            ("uint64", "timestamp"),
+            (2**64 - 1, ts),
+            struct.pack(">Q", 2**64 - 1) + dt_to_bytes(ts),
+        ),
+        (
+            ("uuid", "uuid", "uuid", "string"),
+            (u1, u2, u1, ""),
+            u1.bytes + u2.bytes + u1.bytes,
+        ),
+    ]
+    for spec, key, data in cases:
+        codec = zlmdb.KeyCodec(spec)
+        assert codec.encode(key) == data
+        assert codec.decode(data) == key
+        assert codec.decode(memoryview(data)) == key
+        assert codec.size == (None if "string" in spec else len(data))
+
+
+def test_key_codec_checks():
+    with pytest.raises(Exception):
+        zlmdb.KeyCodec(("uuid", "float"))
+    with pytest.raises(Exception):
+        zlmdb.KeyCodec(("string", "string"))
+
+    codec = zlmdb.KeyCodec(("oid", "uuid"))
+    for key in [
+        (1,),
+        (1, 2),
+        (-1, uuid.uuid4()),
+        (zlmdb._keys.MAX_OID + 1, uuid.uuid4()),
+    ]:
+        with pytest.raises(AssertionError):
+            codec.encode(key)
+    with pytest.raises(AssertionError):
+        codec.encode((None, uuid.uuid4()))
+
+    # nullable keys serialize None as zero values
+    codec = zlmdb.KeyCodec(("uuid", "timestamp", "string"), nullable=True)
+    assert codec.encode((None, None, None)) == b"\x00" * 24
+    assert codec.decode(b"\x00" * 24) == (
+        uuid.UUID(int=0),
+        np.datetime64(0, "ns"),
+        "",
+    )
+
+
+def test_key_codec_prefix():
+    u1 = uuid.uuid4()
+    codec = zlmdb.KeyCodec(("uuid", "timestamp", "string"), nullable=True)
+
+    assert codec.encode_prefix((u1,)) == u1.bytes
+    assert codec.encode_prefix(u1) == u1.bytes
+    assert codec.encode_prefix((u1, None, None)) == u1.bytes
+    assert codec.encode_prefix((None, np.datetime64(1, "ns"))) == (
+        b"\x00" * 16 + dt_to_bytes(np.datetime64(1, "ns"))
+    )
+
+    lo, hi = zlmdb.KeyCodec(("uint16", "uuid")).prefix_bounds(0x12FF)
+    assert lo == b"\x12\xff"
+    assert hi == b"\x13"
+    assert zlmdb.KeyCodec(("uint16", "uuid")).prefix_bounds(0xFFFF) == (
+        b"\xff\xff",
+        None,
+    )
+
+
+def test_pmap_count_key_prefix():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tab = zlmdb.MapUuidTimestampUuid(1)
+        owners = [uuid.uuid4() for _ in range(3)]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for n, owner in enumerate(owners):
+                    for i in range(10 * (n + 1)):
+                        tab[txn, (owner, np.datetime64(i, "ns"))] = uuid.UUID(int=i)
+
+            with db.begin() as txn:
+                assert tab.count(txn) == 60
+                for n, owner in enumerate(owners):
+                    assert tab.count(txn, prefix=(owner,)) == 10 * (n + 1)
+                    assert tab.count(txn, prefix=owner) == 10 * (n + 1)
+                    key = (owner, np.datetime64(3, "ns"))
+                    assert tab.count(txn, prefix=key) == 1
+                    assert tab[txn, key] == uuid.UUID(int=3)
+
+
+def test_timestamp_batch_encoding():
+    from zlmdb._types import bytes_to_dt, bytes_to_dts, dts_to_bytes
+
+    # includes timestamps with leading and trailing zero bytes
+    dts = [np.datetime64(v, "ns") for v in [0, 1, 256, 2**56, 1700000000123456789]]
+
+    data = dts_to_bytes(dts)
+    assert data == [dt_to_bytes(dt) for dt in dts]
+    assert data == dts_to_bytes(np.array(dts, dtype="datetime64[ns]"))
+    assert [bytes_to_dt(d) for d in data] == dts
+    assert list(bytes_to_dts(data)) == dts
+    assert list(bytes_to_dts(b"".join(data))) == dts
+    assert bytes_to_dts([]).dtype == np.dtype("datetime64[ns]")
+
+
+def test_pmap_timestamp_bulk():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tab_keys = zlmdb.MapTimestampFlexBuffers(1)
+        tab_values = zlmdb.MapBytes32Timestamp(2)
+
+        dts = [np.datetime64(1700000000000000000 + i * 256, "ns") for i in range(100)]
+        oids = [bytes([i]) * 32 for i in range(100)]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                assert (
+                    tab_keys.put_many(txn, [(dt, {"i": i}) for i, dt in enumerate(dts)])
+                    == 100
+                )
+                assert tab_values.put_many(txn, list(zip(oids, dts))) == 100
+                tab_values[txn, b"\xff" * 32] = None
+
+            with db.begin() as txn:
+                assert [key for key, _ in tab_keys.select(txn)] == dts
+                found = tab_keys.contains_many(txn, [dts[5], np.datetime64(1, "ns")])
+                assert found == [True, False]
+                assert tab_keys.get_many(txn, dts[10:12])[1].Value == {"i": 11}
+
+                assert tab_values.get_many(txn, oids) == dts
+                # None values are stored as zero timestamps
+                values = tab_values.get_many(txn, [oids[3], b"\xfe" * 32, b"\xff" * 32])
+                assert values == [dts[3], None, np.datetime64(0, "ns")]
+                for oid, dt in zip(oids, dts):
+                    assert tab_values[txn, oid] == dt
+
+
+def test_pmap_timestamp_units():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tab = zlmdb.MapTimestampNdarray(1)
+        tab_values = zlmdb.MapBytes32Timestamp(2)
+
+        # timestamps of other units are stored in nanoseconds by all APIs
+        dts = [
+            np.datetime64("2020-01-01T00:00:00", "s"),
+            np.datetime64("2020-01-01T00:00:01.000001", "us"),
+        ]
+        dts_ns = [dt.astype("datetime64[ns]") for dt in dts]
+        value = np.arange(4)
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                tab.put_many(txn, [(dts[0], value)])
+                tab[txn, dts[1]] = value
+                tab_values.put_many(txn, [(b"\x01" * 32, dts[0])])
+                tab_values[txn, b"\x02" * 32] = dts[1]
+
+            with db.begin() as txn:
+                assert [key for key, _ in tab.select(txn)] == dts_ns
+                for dt in dts:
+                    assert (tab[txn, dt] == value).all()
+                    assert tab.contains_many(txn, [dt]) == [True]
+                assert all((v == value).all() for v in tab.get_many(txn, dts))
+
+                values = tab_values.get_many(txn, [b"\x01" * 32, b"\x02" * 32])
+                assert values == dts_ns
+                assert tab_values[txn, b"\x01" * 32] == dts_ns[0]
@@ -51,6 +51,27 @@ else:
     from _schema_py2 import User, Schema4
 
 
+@zlmdb.table("7b0a6c58-3f1e-4d2a-9b6e-5c8d4e2f1a90", sidecar=True)
+class SidecarUsers(zlmdb.MapOidPickle):
+    """
+    Users table, storing index keys of records in sidecars.
+    """
+
+
+@zlmdb.table("2d4e6f80-91a2-4b3c-8d5e-6f7a8b9c0d1e")
+class SidecarIndexUsersByAuthid(zlmdb.MapStringOid):
+    """
+    Index on users table by authid.
+    """
+
+
+@zlmdb.table("a1b2c3d4-e5f6-4a7b-8c9d-0e1f2a3b4c5d")
+class SidecarIndexUsersByEmail(zlmdb.MapStringOid):
+    """
+    Index on users table by email.
+    """
+
+
 @pytest.fixture(scope="function")
 def testset1(N=10, M=100):
     users = []
@@ -464,3 +485,395 @@ def test_truncate_table_with_index(testset1):
 
         assert stats.dels == records
         assert stats.puts == 0
+
+
+def test_select_by_index(testset1):
+    """
+    Select records from a table via an index, joining index records back to the table.
+    """
+    with TemporaryDirectory() as dbpath:
+        schema = Schema4()
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for user in testset1:
+                    schema.users[txn, user.oid] = user
+
+            users_by_authid = sorted(testset1, key=lambda user: user.authid)
+
+            # small batches to exercise resolving records in multiple batches
+            schema.users.SELECT_BY_INDEX_BATCH_SIZE = 7
+
+            with db.begin() as txn:
+                # exact match on unique index
+                user = testset1[123]
+                assert list(schema.users.select_by_index(txn, "idx1", user.authid)) == [
+                    (user.oid, user)
+                ]
+                assert list(schema.users.select_by_index(txn, "idx1", "nobody")) == []
+
+                # full index scan, in index order
+                res = list(schema.users.select_by_index(txn, "idx1"))
+                assert res == [(user.oid, user) for user in users_by_authid]
+
+                # index range scan
+                res = list(
+                    schema.users.select_by_index(
+                        txn, "idx1", from_key="test-2", to_key="test-3"
+                    )
+                )
+                expected = [
+                    user
+                    for user in users_by_authid
+                    if "test-2" <= user.authid < "test-3"
+                ]
+                assert len(res) == 111
+                assert res == [(user.oid, user) for user in expected]
+
+                # reverse and limit
+                res = list(
+                    schema.users.select_by_index(
+                        txn,
+                        "idx1",
+                        from_key="test-2",
+                        to_key="test-3",
+                        reverse=True,
+                        limit=20,
+                    )
+                )
+                assert res == [(user.oid, user) for user in reversed(expected)][:20]
+
+                # keys or values only
+                res = list(
+                    schema.users.select_by_index(
+                        txn,
+                        "idx1",
+                        from_key="test-2",
+                        to_key="test-3",
+                        return_values=False,
+                    )
+                )
+                assert res == [user.oid for user in expected]
+                res = list(
+                    schema.users.select_by_index(
+                        txn,
+                        "idx1",
+                        from_key="test-2",
+                        to_key="test-3",
+                        return_keys=False,
+                    )
+                )
+                assert res == expected
+
+            with pytest.raises(Exception):
+                with db.begin() as txn:
+                    list(schema.users.select_by_index(txn, "idx99"))
+
+
+def test_covering_index(testset1):
+    """
+    Select projections of records straight from a covering index.
+    """
+    with TemporaryDirectory() as dbpath:
+        users = zlmdb.MapOidPickle(1)
+        idx_users_by_authid = zlmdb.MapStringOid(2)
+        users.attach_index(
+            "idx1",
+            idx_users_by_authid,
+            lambda user: user.authid,
+            projection=lambda user: [user.name, user.email],
+        )
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+                users.put_many(txn, [(user.oid, user) for user in testset1[500:]])
+
+            users_by_authid = sorted(testset1, key=lambda user: user.authid)
+
+            with db.begin() as txn:
+                user = testset1[123]
+                assert list(
+                    users.select_by_index(txn, "idx1", user.authid, covering=True)
+                ) == [(user.oid, [user.name, user.email])]
+
+                res = list(users.select_by_index(txn, "idx1", covering=True))
+                assert res == [
+                    (user.oid, [user.name, user.email]) for user in users_by_authid
+                ]
+
+                res = list(
+                    users.select_by_index(
+                        txn,
+                        "idx1",
+                        from_key="test-5",
+                        reverse=True,
+                        limit=3,
+                        return_keys=False,
+                        covering=True,
+                    )
+                )
+                assert (
+                    res
+                    == [[user.name, user.email] for user in reversed(users_by_authid)][
+                        :3
+                    ]
+                )
+
+                # primary keys stored in covering index records are still joined
+                res = list(users.select_by_index(txn, "idx1", from_key="test-5"))
+                assert res == [
+                    (user.oid, user)
+                    for user in users_by_authid
+                    if user.authid >= "test-5"
+                ]
+
+            # projections follow record updates, and index records follow deletes
+            with db.begin(write=True) as txn:
+                for user in testset1[:10]:
+                    user.name = "Renamed {}".format(user.oid)
+                    users[txn, user.oid] = user
+                for user in testset1[10:20]:
+                    del users[txn, user.oid]
+
+            with db.begin() as txn:
+                assert idx_users_by_authid.count(txn) == len(testset1) - 10
+                for user in testset1[:10]:
+                    assert list(
+                        users.select_by_index(txn, "idx1", user.authid, covering=True)
+                    ) == [(user.oid, ["Renamed {}".format(user.oid), user.email])]
+                for user in testset1[10:20]:
+                    assert (
+                        list(
+                            users.select_by_index(
+                                txn, "idx1", user.authid, covering=True
+                            )
+                        )
+                        == []
+                    )
+
+            with pytest.raises(Exception):
+                with db.begin() as txn:
+                    users.detach_index("idx1")
+                    users.attach_index(
+                        "idx1", idx_users_by_authid, lambda user: user.authid
+                    )
+                    list(users.select_by_index(txn, "idx1", covering=True))
+
+
+def test_sidecar_indexes(testset1):
+    """
+    Maintain indexes from index key sidecars, without deserializing previous records.
+    """
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(SidecarUsers)
+            idx_users_by_authid = db.attach_table(SidecarIndexUsersByAuthid)
+            idx_users_by_email = db.attach_table(SidecarIndexUsersByEmail)
+            users.attach_index("idx1", idx_users_by_authid, lambda user: user.authid)
+            users.attach_index(
+                "idx2", idx_users_by_email, lambda user: user.email, nullable=True
+            )
+            assert users.has_sidecar()
+
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+                users.put_many(txn, [(user.oid, user) for user in testset1[500:]])
+
+            # spy on deserialization of records
+            deserialized = []
+            _deserialize_value = users._deserialize_value
+
+            def deserialize_value(data):
+                deserialized.append(data)
+                return _deserialize_value(data)
+
+            users._deserialize_value = deserialize_value
+
+            # updating non-indexed columns does not touch indexes
+            stats = zlmdb.TransactionStats()
+            with db.begin(write=True, stats=stats) as txn:
+                for user in testset1[:100]:
+                    user.name = "Renamed {}".format(user.oid)
+                    users[txn, user.oid] = user
+            assert stats.puts == 100
+            assert stats.dels == 0
+
+            # change indexed columns, set to NULL, and delete records
+            with db.begin(write=True) as txn:
+                for user in testset1[100:200]:
+                    user.authid = "changed-{}".format(user.oid)
+                    users[txn, user.oid] = user
+                items = []
+                for user in testset1[200:300]:
+                    user.email = None
+                    items.append((user.oid, user))
+                users.put_many(txn, items)
+                for user in testset1[300:400]:
+                    del users[txn, user.oid]
+            assert deserialized == []
+
+            with db.begin() as txn:
+                assert idx_users_by_authid.count(txn) == len(testset1) - 100
+                assert idx_users_by_email.count(txn) == len(testset1) - 200
+                for user in testset1[:300] + testset1[400:]:
+                    assert idx_users_by_authid[txn, user.authid] == user.oid
+                    if user.email is not None:
+                        assert idx_users_by_email[txn, user.email] == user.oid
+                for user in testset1[100:200]:
+                    assert idx_users_by_authid[txn, "test-{}".format(user.oid)] is None
+                for user in testset1[300:400]:
+                    assert idx_users_by_authid[txn, user.authid] is None
+                    assert idx_users_by_email[txn, user.email] is None
+
+            # sidecars are removed with the records
+            with db.begin(write=True) as txn:
+                users.truncate(txn)
+                assert idx_users_by_authid.count(txn) == 0
+                assert idx_users_by_email.count(txn) == 0
+                users.put_many(txn, [(user.oid, user) for user in testset1[:10]])
+                assert idx_users_by_authid.count(txn) == 10
+
+
+def test_sidecar_slots(testset1):
+    """
+    Slots are read on open seeking past the per-slot metadata (e.g. sidecars).
+    """
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(SidecarUsers)
+            idx_users_by_authid = db.attach_table(SidecarIndexUsersByAuthid)
+            users.attach_index("idx1", idx_users_by_authid, lambda user: user.authid)
+            with db.begin(write=True) as txn:
+                users.put_many(txn, [(user.oid, user) for user in testset1])
+            idx_users_by_email = db.attach_table(SidecarIndexUsersByEmail)
+            slots = dict(db._slots_by_index)
+            assert len(slots) == 3
+
+        with zlmdb.Database(dbpath) as db:
+            db._cache_slots()
+            assert db._slots_by_index == slots
+            assert (
+                db.attach_table(SidecarIndexUsersByEmail)._slot
+                == idx_users_by_email._slot
+            )
+
+
+def test_build_index_online(testset1):
+    """
+    Build an index online in chunks, with writes to the table in between chunks.
+    """
+    with TemporaryDirectory() as dbpath:
+        users = zlmdb.MapOidPickle(1)
+        idx_users_by_authid = zlmdb.MapStringOid(2)
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                users.put_many(txn, [(user.oid, user) for user in testset1])
+
+            users.attach_index("idx1", idx_users_by_authid, lambda user: user.authid)
+
+            with db.begin(write=True) as txn:
+                assert not users.is_index_building(txn, "idx1")
+                users.start_index_build(txn, "idx1")
+                assert users.is_index_building(txn, "idx1")
+                assert users.build_index_chunk(txn, "idx1", limit=100) == (100, False)
+
+            # writes behind and ahead of the build watermark
+            with db.begin(write=True) as txn:
+                for user in testset1[50:60] + testset1[500:510]:
+                    user.authid = "changed-{}".format(user.oid)
+                    users[txn, user.oid] = user
+                for user in testset1[60:70] + testset1[510:520]:
+                    del users[txn, user.oid]
+
+            expected = sorted(
+                (user.authid, user.oid)
+                for user in testset1
+                if not (60 <= user.oid < 70 or 510 <= user.oid < 520)
+            )
+
+            # queries fall back to scanning the table while building
+            with db.begin() as txn:
+                assert users.is_index_building(txn, "idx1")
+                assert list(
+                    users.select_by_index(txn, "idx1", return_values=False)
+                ) == [oid for _, oid in expected]
+                assert list(
+                    users.select_by_index(
+                        txn, "idx1", "changed-55", return_values=False
+                    )
+                ) == [55]
+                res = list(
+                    users.select_by_index(
+                        txn, "idx1", from_key="test-8", reverse=True, limit=5
+                    )
+                )
+                assert [(user.authid, oid) for oid, user in res] == list(
+                    reversed(expected)
+                )[:5]
+
+            with db.begin(write=True) as txn:
+                done = False
+                while not done:
+                    _, done = users.build_index_chunk(txn, "idx1", limit=300)
+                assert not users.is_index_building(txn, "idx1")
+                assert list(idx_users_by_authid.select(txn)) == expected
+                assert list(
+                    users.select_by_index(txn, "idx1", return_values=False)
+                ) == [oid for _, oid in expected]
+
+            # drive a complete build in chunks of write transactions
+            assert db.build_index(users, "idx1", chunk_size=77) == len(expected)
+            with db.begin() as txn:
+                assert not users.is_index_building(txn, "idx1")
+                assert list(idx_users_by_authid.select(txn)) == expected
+
+
+def test_build_index_online_empty_values():
+    """
+    Build an index online over a chunk of records with empty (NULL) values only, and
+    select from the index while building, stopping the table scan at the limit.
+    """
+    with TemporaryDirectory() as dbpath:
+        names = zlmdb.MapOidString(1)
+        idx_names = zlmdb.MapStringOid(2)
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for oid in range(20):
+                    names[txn, oid] = None
+                for oid in range(20, 30):
+                    names[txn, oid] = "name-{}".format(oid % 2)
+
+            names.attach_index("idx1", idx_names, lambda name: name, nullable=True)
+
+            with db.begin(write=True) as txn:
+                names.start_index_build(txn, "idx1")
+                assert names.build_index_chunk(txn, "idx1", limit=10) == (10, False)
+                assert names.build_index_chunk(txn, "idx1", limit=10) == (10, False)
+
+                assert list(
+                    names.select_by_index(
+                        txn, "idx1", "name-1", return_values=False, limit=2
+                    )
+                ) == [21, 23]
+                assert list(
+                    names.select_by_index(
+                        txn,
+                        "idx1",
+                        "name-1",
+                        return_values=False,
+                        limit=2,
+                        reverse=True,
+                    )
+                ) == [29, 27]
+                assert list(
+                    names.select_by_index(txn, "idx1", return_values=False, limit=3)
+                ) == [20, 22, 24]
+
+                assert names.build_index_chunk(txn, "idx1", limit=10) == (10, True)
+                assert not names.is_index_building(txn, "idx1")
+                assert idx_names.count(txn) == 2
@@ -25,9 +25,14 @@
 ###############################################################################
 
 import os
+import uuid
+import pickle
 import sys
 import logging
 
+import numpy as np
+import pytest
+
 try:
     from tempfile import TemporaryDirectory
 except ImportError:
@@ -88,3 +93,321 @@ def test_pmap_value_types():
                     assert cnt == n
 
         logging.info("database closed")
+
+
+def test_pmap_large_values():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tab_pickle = zlmdb.MapOidPickle(1)
+        tab_pickle_zlib = zlmdb.MapOidPickle(
+            2, compress=zlmdb.PersistentMap.COMPRESS_ZLIB
+        )
+        tab_pickle5 = zlmdb.MapOidPickle5(3)
+
+        values = [
+            "x" * 10,
+            "y" * (2 * zlmdb.PersistentMap.RESERVE_MIN_SIZE),
+            [bytearray(b"z" * 100000), {"a": bytearray(b"a" * 5000)}],
+        ]
+
+        stats = zlmdb.TransactionStats()
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True, stats=stats) as txn:
+                for tab in [tab_pickle, tab_pickle_zlib, tab_pickle5]:
+                    for i, value in enumerate(values):
+                        tab[txn, i] = value
+                        assert tab[txn, i] == value
+            assert stats.puts == 9
+
+            with db.begin() as txn:
+                for tab in [tab_pickle, tab_pickle_zlib, tab_pickle5]:
+                    assert list(tab.select(txn)) == list(enumerate(values))
+
+
+class _TaggedMapOidPickle(zlmdb.MapOidPickle):
+    _zlmdb_compress_min_size = 100
+
+
+def test_pmap_tagged_compression():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        codecs = [
+            zlmdb.PersistentMap.COMPRESS_LZ4,
+            zlmdb.PersistentMap.COMPRESS_ZLIB,
+            zlmdb.PersistentMap.COMPRESS_ZSTD,
+            None,
+        ]
+        values = {}
+
+        with zlmdb.Database(dbpath) as db:
+            # switch codecs of a table, without rewriting existing values
+            for i, codec in enumerate(codecs):
+                tab = _TaggedMapOidPickle(1, compress=codec)
+                with db.begin(write=True) as txn:
+                    for j in range(10):
+                        oid = i * 100 + j
+                        values[oid] = "x" * 10 if j % 2 else "{}".format(oid) * 100
+                        tab[txn, oid] = values[oid]
+
+                        _data = txn._txn.get(tab._prefix + tab._serialize_key(oid))
+                        if j % 2 or not codec:
+                            # small values are stored uncompressed
+                            assert _data[0] == 0
+                        else:
+                            assert _data[0] == codec
+                            assert len(_data) < len(pickle.dumps(values[oid]))
+
+            for codec in codecs:
+                tab = _TaggedMapOidPickle(1, compress=codec)
+                with db.begin() as txn:
+                    assert dict(tab.select(txn)) == values
+
+            # lz4 always uses tagged values
+            tab = zlmdb.MapOidPickle(2, compress=zlmdb.PersistentMap.COMPRESS_LZ4)
+            assert tab._compress_min_size == zlmdb.PersistentMap.COMPRESS_MIN_SIZE
+            with db.begin(write=True) as txn:
+                tab[txn, 1] = "x"
+                tab[txn, 2] = "y" * 1000
+            with db.begin() as txn:
+                assert tab[txn, 1] == "x"
+                assert tab[txn, 2] == "y" * 1000
+
+
+def test_pmap_pickle5_zerocopy():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tabs = [
+            (zlmdb.MapOidPickle5(1), 1),
+            (zlmdb.MapStringPickle5(2), "vec-1"),
+            (zlmdb.MapUuidPickle5(3), uuid.uuid4()),
+        ]
+        vec = np.arange(10000, dtype=np.float64)
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for tab, key in tabs:
+                    tab[txn, key] = {"name": "vec", "vec": vec}
+
+            with db.begin() as txn:
+                for tab, key in tabs:
+                    value = tab[txn, key]
+                    assert value["name"] == "vec"
+                    assert np.array_equal(value["vec"], vec)
+
+            # out-of-band buffers are loaded as (read-only) views into the memory map
+            with db.begin(buffers=True) as txn:
+                for tab, key in tabs:
+                    value = tab[txn, key]
+                    assert np.array_equal(value["vec"], vec)
+                    assert not value["vec"].flags.owndata
+                    assert not value["vec"].flags.writeable
+                    base = value["vec"]
+                    while isinstance(base, np.ndarray):
+                        base = base.base
+                    assert isinstance(base, memoryview)
+                    assert not isinstance(base.obj, bytes)
+
+
+def test_pmap_ndarray_values():
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tabs = [
+            (zlmdb.MapOidNdarray(1), lambda i: i),
+            (zlmdb.MapStringNdarray(2), lambda i: "vec-{}".format(i)),
+            (zlmdb.MapUuidNdarray(3), lambda i: uuid.UUID(int=i)),
+            (zlmdb.MapTimestampNdarray(4), lambda i: np.datetime64(i, "ns")),
+        ]
+        values = [
+            np.arange(12.0).reshape(3, 4),
+            np.asfortranarray(np.arange(12, dtype=np.int32).reshape(3, 4)),
+            np.arange(20, dtype=">u2")[::2],
+            np.array(5, dtype=np.int8),
+            np.zeros((0, 3)),
+            np.random.random(100000),
+        ]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for tab, key in tabs:
+                    for i, value in enumerate(values):
+                        tab[txn, key(i)] = value
+
+            for buffers in [False, True]:
+                with db.begin(buffers=buffers) as txn:
+                    for tab, key in tabs:
+                        for i, value in enumerate(values):
+                            _value = tab[txn, key(i)]
+                            assert _value.dtype == value.dtype
+                            assert _value.shape == value.shape
+                            assert np.array_equal(_value, value)
+                            assert not _value.flags.writeable
+
+                        # large arrays are read aligned, from the memory map
+                        _value = tab[txn, key(len(values) - 1)]
+                        base = _value
+                        while isinstance(base, np.ndarray):
+                            base = base.base
+                        if buffers:
+                            assert _value.ctypes.data % 16 == 0
+                            assert not isinstance(base.obj, bytes)
+                        else:
+                            assert isinstance(base, bytes)
+
+                        assert np.array_equal(dict(tab.select(txn))[key(1)], values[1])
+
+
+@pytest.mark.skipif(not zlmdb._types.HAS_PYARROW, reason="pyarrow not installed")
+def test_pmap_arrow_values():
+    import pyarrow as pa
+
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tabs = [
+            (zlmdb.MapOidArrow(1), lambda i: i),
+            (zlmdb.MapStringArrow(2), lambda i: "table-{}".format(i)),
+            (zlmdb.MapUuidArrow(3), lambda i: uuid.UUID(int=i)),
+            (zlmdb.MapTimestampArrow(4), lambda i: np.datetime64(i, "ns")),
+        ]
+        values = [
+            pa.table({"a": [1, 2, 3], "b": ["x", None, "z"]}),
+            pa.table({"vec": np.random.random(100000)}),
+            pa.record_batch({"c": [True, False]}),
+        ]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for tab, key in tabs:
+                    for i, value in enumerate(values):
+                        tab[txn, key(i)] = value
+
+                    # pandas data frames are stored as Arrow tables
+                    df = values[0].to_pandas()
+                    tab[txn, key(len(values))] = df
+
+            for buffers in [False, True]:
+                with db.begin(buffers=buffers) as txn:
+                    for tab, key in tabs:
+                        for i, value in enumerate(values):
+                            _value = tab[txn, key(i)]
+                            assert isinstance(_value, pa.Table)
+                            assert _value.equals(
+                                pa.Table.from_batches([value])
+                                if isinstance(value, pa.RecordBatch)
+                                else value
+                            )
+                        _value = tab[txn, key(len(values))]
+                        assert _value.to_pandas().equals(df)
+
+
+@pytest.mark.skipif(not zlmdb._types.HAS_PYARROW, reason="pyarrow not installed")
+def test_pmap_to_arrow():
+    import pyarrow as pa
+
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tab_cbor = zlmdb.MapOidCbor(1, marshal=dict, unmarshal=dict)
+        tab_pickle = zlmdb.MapOidPickle(2)
+
+        n = 200
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for i in range(n):
+                    row = {"oid": i, "name": "user-{}".format(i), "score": i / 2}
+                    if i % 3:
+                        row["email"] = "user-{}@example.com".format(i)
+                    tab_cbor[txn, i] = row
+                    tab_pickle[txn, i] = row
+
+            with db.begin() as txn:
+                for tab in [tab_cbor, tab_pickle]:
+                    # columns default to the fields of the first record
+                    table = pa.Table.from_batches(tab.to_arrow(txn))
+                    assert table.column_names == ["oid", "name", "score"]
+                    assert table.num_rows == n
+                    assert table.column("oid").to_pylist() == list(range(n))
+
+                    table = pa.Table.from_batches(
+                        tab.to_arrow(
+                            txn,
+                            from_key=10,
+                            to_key=20,
+                            columns=["name", "email"],
+                            key_column="key",
+                        )
+                    )
+                    assert table.column_names == ["key", "name", "email"]
+                    assert table.column("key").to_pylist() == list(range(10, 20))
+                    assert table.column("email").null_count == 3
+
+                # records are exported in batches
+                tab_cbor.ARROW_BATCH_SIZE = 7
+                batches = list(tab_cbor.to_arrow(txn, columns=["oid", "email"]))
+                assert [batch.num_rows for batch in batches] == [7] * 28 + [4]
+                table = pa.Table.from_batches(batches)
+                assert table.num_rows == n
+                assert table.column("email").to_pylist() == [
+                    "user-{}@example.com".format(i) if i % 3 else None for i in range(n)
+                ]
+
+                assert list(tab_cbor.to_arrow(txn, from_key=n, columns=["oid"])) == []
+
+
+def test_pmap_flexbuffers_values():
+    from zlmdb.flatbuffers import flexbuffers
+
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        tabs = [
+            (zlmdb.MapOidFlexBuffers(1), lambda i: i),
+            (zlmdb.MapStringFlexBuffers(2), lambda i: "doc-{}".format(i)),
+            (zlmdb.MapUuidFlexBuffers(3), lambda i: uuid.UUID(int=i)),
+            (zlmdb.MapTimestampFlexBuffers(4), lambda i: np.datetime64(i, "ns")),
+        ]
+
+        def doc(i):
+            value = {"field{}".format(j): j * i for j in range(40)}
+            value["name"] = "doc-{}".format(i)
+            value["tags"] = ["a", "b", None, True, 1.5]
+            value["nested"] = {"data": os.urandom(32), "empty": {}}
+            return value
+
+        docs = [doc(i) for i in range(10)]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for tab, key in tabs:
+                    for i, value in enumerate(docs):
+                        tab[txn, key(i)] = value
+
+            for buffers in [False, True]:
+                with db.begin(buffers=buffers) as txn:
+                    for tab, key in tabs:
+                        for i, value in enumerate(docs):
+                            ref = tab[txn, key(i)]
+                            assert isinstance(ref, flexbuffers.Ref)
+                            assert ref.AsMap["name"].AsString == value["name"]
+                            assert ref.AsMap["field39"].AsInt == 39 * i
+                            nested = ref.AsMap["nested"].AsMap
+                            assert nested["data"].AsBlob == value["nested"]["data"]
+                            assert ref.Value == value
+
+                        # values are read from the memory map
+                        ref = tab[txn, key(0)]
+                        assert isinstance(ref._buf._buf, memoryview) == buffers
+
+                    if zlmdb._types.HAS_PYARROW:
+                        import pyarrow as pa
+
+                        table = pa.Table.from_batches(
+                            tab.to_arrow(txn, columns=["name", "field1"])
+                        )
+                        assert table.column("field1").to_pylist() == [
+                            value["field1"] for value in docs
+                        ]
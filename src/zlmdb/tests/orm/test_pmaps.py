@@ -26,6 +26,7 @@
 
 import os
 import sys
+import multiprocessing
 import pytest
 import logging
 
@@ -48,6 +49,15 @@ else:
     from _schema_py2 import User, Schema1, Schema3, Schema4
 
 
+@zlmdb.table(
+    "b9a1e6f4-2c3d-4a7e-8f51-6d0c9e3b7a24", compress=zlmdb.PersistentMap.COMPRESS_ZSTD
+)
+class ZstdUsers(zlmdb.MapOidPickle):
+    """
+    Users table with zstd compressed values.
+    """
+
+
 @pytest.fixture(scope="module")
 def testset1():
     users = []
@@ -293,3 +303,392 @@ def test_rebuild_all_indexes(testset1):
                         records
                     )
                 )
+
+
+def test_rebuild_index_sorted(testset1):
+    """
+    Rebuild indexes spilling sorted runs to temporary files, from a compressed table
+    with primary keys that differ from the oid stored in records.
+    """
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        users = zlmdb.MapOidPickle(1, compress=zlmdb.PersistentMap.COMPRESS_ZLIB)
+        idx_users_by_authid = zlmdb.MapStringOid(2)
+        users.attach_index("idx1", idx_users_by_authid, lambda user: user.authid)
+        idx_users_by_email = zlmdb.MapStringOid(3)
+        users.attach_index(
+            "idx2", idx_users_by_email, lambda user: user.email, nullable=True
+        )
+        users.REBUILD_INDEX_SORT_SIZE = 64
+        users.REBUILD_INDEX_BATCH_SIZE = 100
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for user in testset1:
+                    if user.oid % 10 == 0:
+                        user = User.create_test_user(oid=user.oid)
+                        user.email = None
+                    users[txn, user.oid + 100000] = user
+
+            with db.begin(write=True) as txn:
+                expected1 = list(idx_users_by_authid.select(txn))
+                expected2 = list(idx_users_by_email.select(txn))
+                assert len(expected1) == len(testset1)
+                assert len(expected2) == len(testset1) - len(testset1) // 10
+
+                assert users.rebuild_index(txn, "idx1") == (
+                    len(testset1),
+                    len(testset1),
+                )
+                assert list(idx_users_by_authid.select(txn)) == expected1
+
+                assert users.rebuild_indexes(txn) == (
+                    len(expected1) + len(expected2),
+                    len(expected1) + len(expected2),
+                )
+                assert list(idx_users_by_authid.select(txn)) == expected1
+                assert list(idx_users_by_email.select(txn)) == expected2
+
+
+def test_get_many(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        schema = Schema4()
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    schema.users[txn, user.oid] = user
+
+        # mix of existing and non-existing keys, unordered and with duplicates
+        oids = [user.oid for user in reversed(testset1)] + [17, 4242, 17]
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin() as txn:
+                users = schema.users.get_many(txn, oids)
+                assert len(users) == len(oids)
+                for oid, user in zip(oids, users):
+                    if oid < 500:
+                        assert user
+                        assert user.oid == oid
+                        assert user == schema.users[txn, oid]
+                    else:
+                        assert user is None
+
+                flags = schema.users.contains_many(txn, oids)
+                assert flags == [oid < 500 for oid in oids]
+
+                assert schema.users.get_many(txn, []) == []
+                assert schema.users.contains_many(txn, []) == []
+
+
+def test_put_many(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        schema = Schema4()
+
+        with zlmdb.Database(dbpath) as db:
+            stats = zlmdb.TransactionStats()
+
+            # first half inserted unordered, second half appended
+            with db.begin(write=True, stats=stats) as txn:
+                cnt = schema.users.put_many(
+                    txn, [(user.oid, user) for user in reversed(testset1[:500])]
+                )
+                assert cnt == 500
+                cnt = schema.users.put_many(
+                    txn, [(user.oid, user) for user in testset1[500:]], presorted=True
+                )
+                assert cnt == 500
+
+            num_indexes = len(schema.users.indexes())
+            assert stats.puts == len(testset1) * (1 + num_indexes)
+
+            with db.begin() as txn:
+                assert schema.users.count(txn) == len(testset1)
+                for user in testset1:
+                    assert schema.users[txn, user.oid] == user
+                    assert schema.idx_users_by_authid[txn, user.authid] == user.oid
+                    assert schema.idx_users_by_email[txn, user.email] == user.oid
+
+            # update records, changing indexed columns, with the last value for a key winning
+            with db.begin(write=True) as txn:
+                items = []
+                for user in testset1[:100]:
+                    user = User.create_test_user(oid=user.oid, realm_oid=user.realm_oid)
+                    user.authid = "changed-{}".format(user.oid)
+                    user.email = None
+                    items.append((user.oid, None))
+                    items.append((user.oid, user))
+                assert schema.users.put_many(txn, items) == 100
+
+            with db.begin() as txn:
+                assert schema.users.count(txn) == len(testset1)
+                assert schema.idx_users_by_authid.count(txn) == len(testset1)
+                assert schema.idx_users_by_email.count(txn) == len(testset1) - 100
+                for user in testset1[:100]:
+                    assert schema.users[txn, user.oid].authid == "changed-{}".format(
+                        user.oid
+                    )
+                    assert schema.idx_users_by_authid[txn, user.authid] is None
+                    assert (
+                        schema.idx_users_by_authid[txn, "changed-{}".format(user.oid)]
+                        == user.oid
+                    )
+                    assert schema.idx_users_by_email[txn, user.email] is None
+
+            # NULL values for non-nullable indexes are rejected
+            with pytest.raises(zlmdb.NullValueConstraint):
+                with db.begin(write=True) as txn:
+                    user = User.create_test_user(oid=100000)
+                    user.authid = None
+                    schema.users.put_many(txn, [(user.oid, user)])
+
+            with db.begin() as txn:
+                assert schema.users[txn, 100000] is None
+
+
+@zlmdb.table("0d3c3a1e-5ae4-4c2c-9f36-53c9b0a6d2f1", counted=True)
+class CountedUsers(zlmdb.MapOidPickle):
+    """
+    Users table with record counter.
+    """
+
+
+def test_count_counted(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(CountedUsers)
+            assert users.is_counted()
+
+            with db.begin(write=True) as txn:
+                assert users.count(txn) == 0
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+                assert users.count(txn) == 500
+
+                # overwriting does not change the count
+                for user in testset1[:100]:
+                    users[txn, user.oid] = user
+                assert users.count(txn) == 500
+
+                # bulk insert with some overwrites
+                users.put_many(txn, [(user.oid, user) for user in testset1[400:]])
+                assert users.count(txn) == len(testset1)
+
+                # deleting existing and non-existing records
+                for user in testset1[:100]:
+                    del users[txn, user.oid]
+                    del users[txn, user.oid]
+                assert users.count(txn) == len(testset1) - 100
+                assert users._count_scan(txn) == len(testset1) - 100
+
+            # aborted transaction rolls back the counter too
+            with pytest.raises(RuntimeError):
+                with db.begin(write=True) as txn:
+                    del users[txn, testset1[200].oid]
+                    assert users.count(txn) == len(testset1) - 101
+                    raise RuntimeError("abort")
+
+            with db.begin() as txn:
+                assert users.count(txn) == len(testset1) - 100
+
+            slots = db.stats(include_slots=True)["slots"]
+            assert len(slots) == 1
+            assert slots[0]["records"] == len(testset1) - 100
+
+        # counter is persistent, and picked up again when attaching the table
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(CountedUsers)
+            with db.begin(write=True) as txn:
+                assert users.count(txn) == len(testset1) - 100
+                users.truncate(txn)
+                assert users.count(txn) == 0
+                assert users._count_scan(txn) == 0
+
+
+def test_enable_counter(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        schema = Schema3()
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                for user in testset1:
+                    schema.users[txn, user.authid] = user
+
+            assert not schema.users.is_counted()
+            with db.begin(write=True) as txn:
+                assert schema.users.enable_counter(txn) == len(testset1)
+            assert schema.users.is_counted()
+
+            with db.begin(write=True) as txn:
+                del schema.users[txn, testset1[0].authid]
+                assert schema.users.count(txn) == len(testset1) - 1
+                assert schema.users.count(txn, "test-1") == 111
+
+                schema.users.disable_counter(txn)
+                assert not schema.users.is_counted()
+                assert schema.users.count(txn) == len(testset1) - 1
+
+
+def test_counter_stale(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(CountedUsers)
+            with db.begin(write=True) as txn:
+                for user in testset1[:10]:
+                    users[txn, user.oid] = user
+
+            # a pmap without counter enabled on the same slot does not use the counter
+            uncounted = zlmdb.MapOidPickle(users._slot)
+            with db.begin(write=True) as txn:
+                for user in testset1[:10]:
+                    del uncounted[txn, user.oid]
+                for user in testset1[10:30]:
+                    uncounted[txn, user.oid] = user
+                assert uncounted.count(txn) == 20
+                assert users.count(txn) == 10
+
+            # drift of the (stale) counter is exposed, not hidden
+            with pytest.raises(AssertionError):
+                with db.begin(write=True) as txn:
+                    for user in testset1[10:30]:
+                        del users[txn, user.oid]
+
+            # truncating from a pmap without counter enabled deletes the stale counter
+            with db.begin(write=True) as txn:
+                uncounted.truncate(txn)
+                assert txn._txn.get(zlmdb._pmap._counter_key(users._slot)) is None
+
+            # deleting the slot deletes its metadata
+            with db.begin(write=True) as txn:
+                assert users.enable_counter(txn) == 0
+            db._set_slot(users._slot, None)
+            with db.begin() as txn:
+                assert txn._txn.get(zlmdb._pmap._counter_key(users._slot)) is None
+
+
+def test_zerocopy_read(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        schema = Schema4()
+
+        with zlmdb.Database(dbpath) as db:
+            with db.begin(write=True) as txn:
+                schema.users.put_many(txn, [(user.oid, user) for user in testset1])
+
+            with db.begin(buffers=True) as txn:
+                for user in testset1[:100]:
+                    assert schema.users[txn, user.oid] == user
+                    assert schema.idx_users_by_authid[txn, user.authid] == user.oid
+
+                assert list(schema.users.select(txn, limit=10)) == [
+                    (user.oid, user) for user in testset1[:10]
+                ]
+                assert (
+                    list(
+                        schema.users.select(
+                            txn, return_values=False, reverse=True, limit=5
+                        )
+                    )
+                    == [user.oid for user in reversed(testset1)][:5]
+                )
+                assert list(
+                    schema.users.select_by_index(txn, "idx1", testset1[7].authid)
+                ) == [(testset1[7].oid, testset1[7])]
+                assert [
+                    oid
+                    for oid, _ in schema.users.select_by_index(
+                        txn, "idx3", from_key=(3, 0), to_key=(4, 0)
+                    )
+                ] == list(range(300, 400))
+
+
+@pytest.mark.skipif(not zlmdb._pmap.HAS_ZSTD, reason="zstandard not installed")
+def test_zstd_dict(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(ZstdUsers)
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+                size1 = sum(
+                    len(txn._txn.get(users._prefix + users._serialize_key(user.oid)))
+                    for user in testset1[:500]
+                )
+
+            with db.begin(write=True) as txn:
+                assert users.train_zstd_dict(txn, dict_size=4096) == 1
+
+                # values compressed before and after training are read back
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+                for user in testset1[500:]:
+                    users[txn, user.oid] = user
+                size2 = sum(
+                    len(txn._txn.get(users._prefix + users._serialize_key(user.oid)))
+                    for user in testset1[:500]
+                )
+            assert size2 < size1
+
+            with db.begin(write=True) as txn:
+                assert users.train_zstd_dict(txn, dict_size=4096) == 2
+                for user in testset1[900:]:
+                    users[txn, user.oid] = user
+
+        # dictionaries are loaded when attaching the table
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(ZstdUsers)
+            assert users._zstd_dict_id == 2
+            with db.begin() as txn:
+                assert list(users.select(txn)) == [
+                    (user.oid, user) for user in testset1
+                ]
+
+
+def _train_zstd_dict(dbpath, users):
+    with zlmdb.Database(dbpath) as db:
+        _users = db.attach_table(ZstdUsers)
+        with db.begin(write=True) as txn:
+            assert _users.train_zstd_dict(txn, dict_size=4096) == 1
+            for user in users:
+                _users[txn, user.oid] = user
+
+
+@pytest.mark.skipif(not zlmdb._pmap.HAS_ZSTD, reason="zstandard not installed")
+def test_zstd_dict_other_process(testset1):
+    with TemporaryDirectory() as dbpath:
+        logging.info("Using temporary directory {} for database".format(dbpath))
+
+        with zlmdb.Database(dbpath) as db:
+            users = db.attach_table(ZstdUsers)
+            with db.begin(write=True) as txn:
+                for user in testset1[:500]:
+                    users[txn, user.oid] = user
+            assert users._zstd_dict_id == 0
+
+            # another process trains a dictionary and writes values compressed with it
+            ctx = multiprocessing.get_context("spawn")
+            proc = ctx.Process(target=_train_zstd_dict, args=(dbpath, testset1))
+            proc.start()
+            proc.join()
+            assert proc.exitcode == 0
+
+            # the dictionary is loaded from the database when first needed
+            with db.begin() as txn:
+                assert list(users.select(txn)) == [
+                    (user.oid, user) for user in testset1
+                ]
+            assert 1 in users._zstd_dicts
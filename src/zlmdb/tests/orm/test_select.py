@@ -520,6 +520,279 @@ def test_mnodelog_queries(N=1000):
                 assert _skeys == list(reversed(keys2))
 
 
+def test_mnodelog_zerocopy(N=100):
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            schema = Schema.attach(db)
+
+            data = {}
+            with db.begin(write=True) as txn:
+                for i in range(N):
+                    rec = MNodeLog()
+                    fill_mnodelog(rec)
+                    key = (rec.timestamp, rec.node_id)
+                    schema.mnode_logs[txn, key] = rec
+                    data[key] = rec
+
+            casts = []
+            _cast = schema.mnode_logs._cast
+
+            def cast(buf):
+                casts.append(type(buf))
+                return _cast(buf)
+
+            schema.mnode_logs._cast = cast
+
+            # in zero-copy mode, records are cast directly from the memory map
+            with db.begin(buffers=True) as txn:
+                cnt = 0
+                for key, mnodelog in schema.mnode_logs.select(txn):
+                    assert key == (mnodelog.timestamp, mnodelog.node_id)
+                    assert mnodelog.run_id == data[key].run_id
+                    assert mnodelog.session == data[key].session
+                    cnt += 1
+                assert cnt == N
+                key = next(iter(data))
+                assert schema.mnode_logs[txn, key].run_id == data[key].run_id
+            assert casts == [memoryview] * (N + 1)
+
+            del casts[:]
+            with db.begin() as txn:
+                assert schema.mnode_logs[txn, key].run_id == data[key].run_id
+            assert casts == [bytes]
+
+
+def test_mnodelog_builder_pool(N=100):
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            schema = Schema.attach(db)
+
+            data = {}
+            with db.begin(write=True) as txn:
+                for i in range(N):
+                    rec = MNodeLog()
+                    fill_mnodelog(rec)
+                    key = (rec.timestamp, rec.node_id)
+                    schema.mnode_logs[txn, key] = rec
+                    data[key] = rec
+
+                    # the builder of this thread is reused for all records
+                    if i == 0:
+                        builder = schema.mnode_logs._builders.builder
+                    assert schema.mnode_logs._builders.builder is builder
+
+                items = []
+                for i in range(N):
+                    rec = MNodeLog()
+                    fill_mnodelog(rec)
+                    items.append(((rec.timestamp, rec.node_id), rec))
+                    data[(rec.timestamp, rec.node_id)] = rec
+                schema.mnode_logs.put_many(txn, items)
+            assert schema.mnode_logs._builder_size > 0
+
+            with db.begin() as txn:
+                assert schema.mnode_logs.count(txn) == 2 * N
+                for key, mnodelog in schema.mnode_logs.select(txn):
+                    assert mnodelog.run_id == data[key].run_id
+                    assert mnodelog.session == data[key].session
+                    assert mnodelog.cpu_user == data[key].cpu_user
+
+
+@pytest.mark.skipif(not zlmdb._types.HAS_PYARROW, reason="pyarrow not installed")
+def test_mnodelog_to_arrow(N=100):
+    import pyarrow as pa
+
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            schema = Schema.attach(db)
+
+            data = {}
+            with db.begin(write=True) as txn:
+                for i in range(N):
+                    rec = MNodeLog()
+                    fill_mnodelog(rec)
+                    key = (rec.timestamp, rec.node_id)
+                    schema.mnode_logs[txn, key] = rec
+                    data[key] = rec
+
+            # columns are read from the FlatBuffers records in the memory map
+            with db.begin(buffers=True) as txn:
+                with pytest.raises(Exception):
+                    list(schema.mnode_logs.to_arrow(txn))
+                table = pa.Table.from_batches(
+                    schema.mnode_logs.to_arrow(
+                        txn, columns=["run_id", "cpu_user", "session"]
+                    )
+                )
+            assert table.num_rows == N
+            assert table.column_names == ["run_id", "cpu_user", "session"]
+            keys = sorted(data)
+            assert table.column("cpu_user").to_pylist() == [
+                data[key].cpu_user for key in keys
+            ]
+            assert table.column("session").to_pylist() == [
+                data[key].session for key in keys
+            ]
+
+            # with a schema loaded, scalar columns are read vectorized (in batches)
+            schema.mnode_logs.load_fbs_schema(_mnodelog_bfbs())
+            schema.mnode_logs.ARROW_BATCH_SIZE = 7
+            with db.begin() as txn:
+                batches = list(
+                    schema.mnode_logs.to_arrow(txn, columns=["cpu_user", "session"])
+                )
+                assert len(batches) == (N + 6) // 7
+                table = pa.Table.from_batches(batches)
+                assert table.schema.field("cpu_user").type == pa.float32()
+                assert table.schema.field("session").type == pa.uint64()
+                assert table.column("cpu_user").to_pylist() == [
+                    data[key].cpu_user for key in keys
+                ]
+                assert table.column("session").to_pylist() == [
+                    data[key].session for key in keys
+                ]
+
+                # columns default to the scalar fields of the schema
+                table = pa.Table.from_batches(schema.mnode_logs.to_arrow(txn))
+                assert sorted(table.column_names) == [
+                    "cpu_freq",
+                    "cpu_user",
+                    "session",
+                    "state",
+                    "timestamp",
+                ]
+
+                # records with other fields are read from the records cast into objects
+                table = pa.Table.from_batches(
+                    schema.mnode_logs.to_arrow(txn, columns=["run_id", "cpu_user"])
+                )
+                assert table.column("cpu_user").to_pylist() == [
+                    data[key].cpu_user for key in keys
+                ]
+
+
+def _mnodelog_bfbs():
+    """
+    Build the FlatBuffers binary schema (as ``flatc --binary --schema`` would) for
+    some of the fields of table ``MNodeLog``.
+    """
+    from zlmdb.flatbuffers.reflection import Field, Object, Schema, Type
+    from zlmdb.flatbuffers.reflection.BaseType import BaseType
+
+    builder = flatbuffers.Builder(0)
+    fields = []
+    for name, field_id, base_type in sorted(
+        [
+            ("timestamp", 0, BaseType.ULong),
+            ("run_id", 2, BaseType.Vector),
+            ("state", 3, BaseType.UByte),
+            ("session", 5, BaseType.ULong),
+            ("cpu_freq", 14, BaseType.Float),
+            ("cpu_user", 26, BaseType.Float),
+        ]
+    ):
+        _name = builder.CreateString(name)
+        Type.Start(builder)
+        Type.AddBaseType(builder, base_type)
+        _type = Type.End(builder)
+        Field.Start(builder)
+        Field.AddName(builder, _name)
+        Field.AddType(builder, _type)
+        Field.AddId(builder, field_id)
+        Field.AddOffset(builder, 4 + 2 * field_id)
+        fields.append(Field.End(builder))
+
+    Object.StartFieldsVector(builder, len(fields))
+    for field in reversed(fields):
+        builder.PrependUOffsetTRelative(field)
+    _fields = builder.EndVector()
+    _name = builder.CreateString("MNodeLog")
+    Object.Start(builder)
+    Object.AddName(builder, _name)
+    Object.AddFields(builder, _fields)
+    obj = Object.End(builder)
+
+    Schema.StartObjectsVector(builder, 1)
+    builder.PrependUOffsetTRelative(obj)
+    _objects = builder.EndVector()
+    Schema.Start(builder)
+    Schema.AddObjects(builder, _objects)
+    Schema.AddRootTable(builder, obj)
+    builder.Finish(Schema.End(builder))
+    return bytes(builder.Output())
+
+
+def test_mnodelog_select_columns(N=1000):
+    with TemporaryDirectory() as dbpath:
+        with zlmdb.Database(dbpath) as db:
+            schema = Schema.attach(db)
+            schema.mnode_logs.load_fbs_schema(_mnodelog_bfbs())
+
+            # same records, under timestamp keys
+            mnode_logs = zlmdb.MapTimestampFlatBuffers(
+                2, build=MNodeLog.build, cast=MNodeLog.cast
+            )
+            mnode_logs.load_fbs_schema(_mnodelog_bfbs(), "MNodeLog")
+
+            data = {}
+            with db.begin(write=True) as txn:
+                for i in range(N):
+                    rec = MNodeLog()
+                    fill_mnodelog(rec)
+                    rec.timestamp += np.timedelta64(i, "ns")
+                    if i % 10 == 0:
+                        # default values are not stored
+                        rec.session = 0
+                    schema.mnode_logs[txn, (rec.timestamp, rec.node_id)] = rec
+                    mnode_logs[txn, rec.timestamp] = rec
+                    data[rec.timestamp] = rec
+
+            timestamps = sorted(data)
+            fields = ["state", "session", "cpu_freq", "cpu_user"]
+            for buffers in [False, True]:
+                with db.begin(buffers=buffers) as txn:
+                    mnode_logs.COLUMNS_BATCH_SIZE = 64
+                    keys, columns = mnode_logs.select_columns(txn, fields)
+                    assert keys.dtype == np.dtype("datetime64[ns]")
+                    assert list(keys) == timestamps
+                    assert columns["state"].dtype == np.uint8
+                    assert columns["session"].dtype == np.uint64
+                    assert columns["cpu_user"].dtype == np.float32
+                    for field in fields:
+                        assert list(columns[field]) == [
+                            getattr(data[ts], field) for ts in timestamps
+                        ]
+
+                    keys, columns = mnode_logs.select_columns(
+                        txn,
+                        ["timestamp"],
+                        from_key=timestamps[10],
+                        to_key=timestamps[20],
+                    )
+                    assert list(keys) == timestamps[10:20]
+                    assert list(columns["timestamp"].astype("datetime64[ns]")) == list(
+                        keys
+                    )
+
+                    keys, columns = mnode_logs.select_columns(
+                        txn, fields, from_key=timestamps[-1] + np.timedelta64(1, "ns")
+                    )
+                    assert len(keys) == 0 and keys.dtype == np.dtype("datetime64[ns]")
+                    assert columns["cpu_freq"].dtype == np.float32
+
+                    # composite keys are returned as objects
+                    keys, columns = schema.mnode_logs.select_columns(txn, ["session"])
+                    assert keys.dtype == object and type(keys[0]) == tuple
+                    assert list(columns["session"]) == [
+                        data[key[0]].session for key in keys
+                    ]
+
+                    with pytest.raises(Exception):
+                        mnode_logs.select_columns(txn, ["run_id"])
+                    with pytest.raises(Exception):
+                        mnode_logs.select_columns(txn, ["cpu_system"])
+
+
 def _test_mnodelog_bigtable(N, M, K):
     with TemporaryDirectory() as dbpath:
         with zlmdb.Database(dbpath, maxsize=(5 * 2**30)) as db:
@@ -7,10 +7,8 @@ from autobahn.twisted import util
 
 import numpy as np
 import pandas as pd
-import pyarrow as pa
 
 import zlmdb
-from zlmdb._pmap import _StringKeysMixin, PersistentMap
 
 
 try:
@@ -19,31 +17,12 @@ except ImportError:
     from backports.tempfile import TemporaryDirectory
 
 
-class _DataFrameValuesMixin(object):
-
-    def __init__(self, marshal=None, unmarshal=None):
-        self._marshal = marshal or self._zlmdb_marshal
-        self._unmarshal = unmarshal or self._zlmdb_unmarshal
-
-    def _serialize_value(self, value):
-        return pa.serialize(value).to_buffer()
-
-    def _deserialize_value(self, data):
-        return pa.deserialize(data)
-
-
-class MapStringDataFrame(_StringKeysMixin, _DataFrameValuesMixin, PersistentMap):
-
-    def __init__(self, slot=None, compress=None):
-        PersistentMap.__init__(self, slot=slot, compress=compress)
-
-
 class MySchema(zlmdb.Schema):
 
-    samples: MapStringDataFrame
+    samples: zlmdb.MapStringArrow
 
     def __init__(self):
-        self.samples = MapStringDataFrame(1)
+        self.samples = zlmdb.MapStringArrow(1)
 
 
 @inlineCallbacks
@@ -64,11 +43,13 @@ def main(reactor):
                                          columns=['A','B','C','D'])
                     schema.samples[txn, key] = value
 
-        # READ back native pandas data frames from zlmdb
+        # READ back native pandas data frames from zlmdb (stored as Arrow tables)
         with db.begin() as txn:
             for i in range(10):
                 key = 'key{}'.format(i)
                 value = schema.samples[txn, key]
+                if value is not None:
+                    value = value.to_pandas()
                 print('key={} : value=\n{}'.format(key, value))
 
     yield util.sleep(1)